@@ -0,0 +1,92 @@
+"""
+Shared helpers of the benchmarks
+"""
+
+import json
+import statistics
+import sys
+import tempfile
+
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from pathlib import Path
+from shutil import copytree, rmtree
+from typing import Any
+
+
+projectRoot = Path(__file__).parent.parent.resolve()
+_mockdata = projectRoot.joinpath('mockdata')
+_baselines = Path(__file__).parent.joinpath('baselines.json')
+
+sys.path.insert(0, str(projectRoot))
+
+
+@contextmanager
+def mockGamePath() -> Generator[Path, None, None]:
+    """Copy the mock data to a temporary directory that is removed afterwards"""
+    from tests.framework import linkGamePaths
+
+    tempdir = Path(tempfile.mkdtemp())
+    try:
+        copytree(_mockdata, tempdir, dirs_exist_ok=True)
+        linkGamePaths(tempdir)
+        yield tempdir
+    finally:
+        rmtree(tempdir, ignore_errors=True)
+
+
+def createMods(count: int, files: int) -> list[Any]:
+    """Mods with generated content, script, bin, menu and bundled files, overlapping between mods"""
+    from w3modmanager.domain.mod.fetcher import BinFile, BundledFile, ContentFile
+    from w3modmanager.domain.mod.mod import Mod
+
+    return [
+        Mod(
+            f'Package {index // 3}',
+            filename=f'modBenchmark{index:05}',
+            priority=index % 100 - 1,
+            enabled=index % 7 != 0,
+            installed=index % 5 != 0,
+            size=index * 4096,
+            version=f'1.{index % 10}',
+            contents=[ContentFile(Path(f'content/scripts/file{file}.ws' if file % 2 else f'content/file{file}.xml'), '')
+                      for file in range(files)],
+            files=[BinFile(Path(f'bin/config/file{file}.xml')) for file in range(files // 10)] + [
+                BinFile(Path(f'menu{file}.xml'), Path(f'bin/config/r4game/user_config_matrix/pc/menu{file}.xml'))
+                for file in range(files // 10)],
+            bundled=[BundledFile(Path(f'bundle/file{index}-{file}.xbm'), Path('content/blob0.bundle'))
+                     for file in range(files)],
+        )
+        for index in range(count)
+    ]
+
+
+def median(values: list[float]) -> float:
+    return round(statistics.median(values), 1)
+
+
+def readBaselines() -> dict[str, float]:
+    return json.loads(_baselines.read_text(encoding='utf-8')) if _baselines.is_file() else {}
+
+
+def recordBaselines(results: dict[str, float]) -> None:
+    # results of the other benchmarks are kept
+    _baselines.write_text(json.dumps({**readBaselines(), **results}, indent=4) + '\n', encoding='utf-8')
+
+
+def report(
+    results: dict[str, float], output: Callable[[str], None], tolerance: float = 0.25, floor: float = 5.0
+) -> int:
+    """Print the results next to the baselines, returns the number of regressions beyond the tolerance"""
+    baselines = readBaselines()
+    regressions = 0
+    output(f'{"benchmark":<48} {"median ms":>10} {"baseline":>10} {"change":>8}')
+    for name, value in results.items():
+        baseline = baselines.get(name)
+        change = f'{(value - baseline) / baseline:+.0%}' if baseline else ''
+        # short measurements vary by a few milliseconds between runs, they regress only beyond the floor
+        if baseline and value > baseline * (1 + tolerance) and value - baseline > floor:
+            regressions += 1
+            change += ' !'
+        output(f'{name:<48} {value:>10.1f} {baseline or 0:>10.1f} {change:>8}')
+    return regressions
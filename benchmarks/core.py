@@ -0,0 +1,130 @@
+"""
+Core benchmarks - detecting, hashing, loading, installing and enabling mods of generated game installs
+
+Run with `python benchmarks/core.py`, `--record` stores the results as the new baselines.
+The installs are generated by `tests/fakeinstall.py`, the same parameters always create the same files.
+"""
+
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from shutil import rmtree
+from typing import Any
+
+from common import median, recordBaselines, report
+
+
+def measure(sizes: list[int], files: int, sources: int, runs: int) -> dict[str, float]:
+    from tests.fakeinstall import FakeInstall
+    from w3modmanager.core.model import Model, ModelConflicts
+    from w3modmanager.domain.mod.mod import Mod
+    from w3modmanager.util.util import getXXHash
+
+    import asyncio
+
+    from loguru import logger
+
+    # every detected mod and unreadable bundle is logged
+    logger.remove()
+    results: dict[str, list[float]] = {}
+
+    async def timed(name: str, function: Callable[[], Awaitable[Any]]) -> None:
+        start = time.perf_counter()
+        await function()
+        results.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    async def run(install: FakeInstall, suffix: str) -> None:
+        paths = sorted(install.modspath.iterdir())
+        contents = sorted(file for file in install.modspath.glob('*/content/**/*') if file.is_file())
+
+        async def detect() -> None:
+            for path in paths:
+                await Mod.fromDirectory(path, recursive=False)
+
+        async def hashContents() -> None:
+            for file in contents:
+                getXXHash(file)
+
+        async def loadUnmanaged() -> None:
+            await model.loadInstalled()
+
+        async def loadManaged() -> None:
+            await managed.loadInstalled()
+
+        async def conflicts() -> None:
+            ModelConflicts.fromModList(model.data(), 0)
+
+        async def installSources() -> None:
+            for source in sorted(install.sourcespath.iterdir()):
+                for mod in await Mod.fromDirectory(source):
+                    await model.add(mod)
+                    installed.append(mod)
+
+        async def remove() -> None:
+            for mod in installed:
+                await model.remove(mod)
+
+        async def disable() -> None:
+            for mod in enabled:
+                await model.disable(mod)
+
+        async def enable() -> None:
+            for mod in enabled:
+                await model.enable(mod)
+
+        for _ in range(runs):
+            await timed('core detect' + suffix, detect)
+            await timed('core hash contents' + suffix, hashContents)
+
+            # mods without a manifest are scanned and get one, the next model reads the manifests
+            for manifest in install.modspath.glob('*/.w3mm'):
+                manifest.unlink()
+            model = Model(install.gamepath, install.configpath, install.cachepath)
+            await timed('core load unmanaged' + suffix, loadUnmanaged)
+            model.close()
+            managed = model = Model(install.gamepath, install.configpath, install.cachepath)
+            await timed('core load managed' + suffix, loadManaged)
+            await timed('core conflicts' + suffix, conflicts)
+
+            installed: list[Mod] = []
+            await timed('core install' + suffix, installSources)
+            await timed('core remove' + suffix, remove)
+            enabled = [mod for mod in model.values() if mod.target == 'mods' and mod.enabled]
+            await timed('core disable' + suffix, disable)
+            await timed('core enable' + suffix, enable)
+            model.close()
+
+    for size in sizes:
+        tempdir = Path(tempfile.mkdtemp())
+        try:
+            install = FakeInstall(tempdir, mods=size, files=files, sources=sources).create()
+            asyncio.run(run(install, f' ({size} mods)'))
+        finally:
+            rmtree(tempdir, ignore_errors=True)
+    return {name: median(values) for name, values in results.items()}
+
+
+def main() -> int:
+    argp = ArgumentParser(description='measure the performance of the core mod operations')
+    argp.add_argument(
+        '-m', '--mods', type=int, nargs='+', default=[100, 1000], help='numbers of installed mods')
+    argp.add_argument('-f', '--files', type=int, default=20, help='number of content files per mod')
+    argp.add_argument('-s', '--sources', type=int, default=20, help='number of mods to install')
+    argp.add_argument('-n', '--runs', type=int, default=5, help='number of runs, the median is reported')
+    argp.add_argument('--record', default=False, action='store_true', help='store the results as the new baselines')
+    args = argp.parse_args()
+
+    results = measure(args.mods, args.files, args.sources, args.runs)
+    regressions = report(results, print)
+    if args.record:
+        recordBaselines(results)
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
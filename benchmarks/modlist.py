@@ -0,0 +1,156 @@
+"""
+Mod list benchmarks - painting, scrolling, filtering and sorting mod lists of several sizes on the offscreen platform
+
+Run with `python benchmarks/modlist.py`, `--record` stores the results as the new baselines.
+"""
+
+import os
+import sys
+import time
+
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from common import createMods, median, mockGamePath, recordBaselines, report
+
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+affectedPySide = [(6, 12)]
+'''PySide6 releases that drop a reference to None whenever a python model returns None to Qt'''
+
+
+def measure(sizes: list[int], files: int, runs: int) -> dict[str, float]:
+    from w3modmanager.core.model import Model, ModelChanges
+    from w3modmanager.ui.graphical.modlist import ModList
+
+    import asyncio
+
+    from PySide6.QtCore import QSettings, Qt
+    from PySide6.QtWidgets import QApplication, QWidget
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv[:1])
+    eventloop = QEventLoop(app)
+    asyncio.set_event_loop(eventloop)
+    QSettings.setDefaultFormat(QSettings.Format.IniFormat)
+    results: dict[str, list[float]] = {}
+
+    def timed(name: str, function: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        function()
+        results.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    async def run(path: Path, rows: int) -> None:
+        QSettings.setPath(QSettings.Format.IniFormat, QSettings.Scope.UserScope, str(path.joinpath('settings')))
+        model = Model(path.joinpath('programs'), path.joinpath('documents'), path.joinpath('cache'))
+        for mod in createMods(rows, files):
+            model.data()[(mod.filename, mod.target)] = mod
+        parent = QWidget()
+        parent.resize(1150, 1000)
+        view = ModList(parent, model)
+        view.resize(1150, 1000)
+        # stay below the width that makes the list paint a cached pixmap while resizing
+        parent.show()
+        await view.downloads.stop()
+        view.updateTimer.stop()
+        suffix = f' ({rows} rows)'
+        timed('modlist first paint' + suffix, lambda: view.viewport().grab())
+        for _ in range(runs):
+            timed('modlist repaint' + suffix, lambda: view.viewport().grab())
+
+        def scroll() -> None:
+            scrollbar = view.verticalScrollBar()
+            for value in range(0, scrollbar.maximum() + 1, max(1, view.viewport().height())):
+                scrollbar.setValue(value)
+                view.viewport().grab()
+        timed('modlist scroll through' + suffix, scroll)
+
+        for column in (13, 5, 3):
+            timed('modlist sort' + suffix,
+                  lambda column=column: view.sortByColumn(column, Qt.SortOrder.AscendingOrder))
+
+        def tooltips() -> None:
+            for row in range(min(rows, 100)):
+                view.listmodel.data(view.listmodel.index(row, 7), Qt.ItemDataRole.ToolTipRole)
+        timed('modlist tooltips' + suffix, tooltips)
+
+        def search() -> None:
+            # typing a query character by character, then clearing it
+            for length in range(1, 14):
+                view.filtermodel.setSearch('benchmark0042'[:length])
+            view.filtermodel.setSearch('')
+        for _ in range(runs):
+            timed('modlist search' + suffix, search)
+
+        def keystroke() -> None:
+            # the first character of a query matches most mods
+            view.filtermodel.setSearch('0')
+            view.viewport().grab()
+        for _ in range(runs):
+            timed('modlist filter keystroke' + suffix, keystroke)
+            view.filtermodel.setSearch('')
+
+        def selectAll() -> None:
+            view.selectAll()
+            view.getSelectedMods()
+        for _ in range(runs):
+            timed('modlist select all' + suffix, selectAll)
+            view.clearSelection()
+
+        def update() -> None:
+            # settings or view options changed, every row is checked again
+            model.notify(ModelChanges(reset=True))
+            view.listmodel.update(model)
+            view.viewport().grab()
+        for _ in range(runs):
+            timed('modlist update' + suffix, update)
+
+        def change() -> None:
+            mod = model[0]
+            mod.priority += 1
+            changes = ModelChanges()
+            changes.change(mod, 'priority')
+            model.notify(changes)
+            view.listmodel.update(model)
+            view.viewport().grab()
+        for _ in range(runs):
+            timed('modlist change one mod' + suffix, change)
+        await view.headerChangedEvent.flush()
+        parent.close()
+        model.close()
+
+    with eventloop:
+        for rows in sizes:
+            with mockGamePath() as path:
+                eventloop.run_until_complete(run(path, rows))
+    return {name: median(values) for name, values in results.items()}
+
+
+def main() -> int:
+    argp = ArgumentParser(description='measure the rendering performance of the mod list')
+    argp.add_argument(
+        '-r', '--rows', type=int, nargs='+', default=[100, 1000, 5000], help='numbers of mods in the list')
+    argp.add_argument('-f', '--files', type=int, default=200, help='number of files per mod')
+    argp.add_argument('-n', '--runs', type=int, default=5, help='number of runs, the median is reported')
+    argp.add_argument('--record', default=False, action='store_true', help='store the results as the new baselines')
+    args = argp.parse_args()
+
+    import PySide6
+    if tuple(PySide6.__version_info__[:2]) in affectedPySide:
+        # the interpreter aborts with "none_dealloc" after enough repaints of a large list
+        print(f'skipping the mod list benchmarks, PySide6 {PySide6.__version__} drops references to None')  # noqa: T201
+        return 0
+
+    results = measure(args.rows, args.files, args.runs)
+    regressions = report(results, print)
+    if args.record:
+        recordBaselines(results)
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Mod benchmarks - file list partitions of mods and the conflicts between them
+
+Run with `python benchmarks/mods.py`, `--record` stores the results as the new baselines.
+The painting of the mod list is measured by `benchmarks/modlist.py`.
+"""
+
+import sys
+import time
+
+from argparse import ArgumentParser
+from collections.abc import Callable
+from typing import Any
+
+from common import createMods, median, recordBaselines, report
+
+
+def measure(count: int, files: int, runs: int) -> dict[str, float]:
+    from w3modmanager.core.model import ModelConflicts
+
+    results: dict[str, list[float]] = {}
+
+    def timed(name: str, function: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        function()
+        results.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+
+    def access(mods: list[Any], times: int) -> int:
+        # the mod list, its tooltips and the details window read every file list of a mod
+        count = 0
+        for _ in range(times):
+            for mod in mods:
+                count += len(mod.contentFiles) + len(mod.scriptFiles) + len(mod.binFiles) + len(mod.menuFiles)
+        return count
+
+    for _ in range(runs):
+        mods = createMods(count, files)
+        timed('mods first file access', lambda mods=mods: access(mods, 1))
+        timed('mods repeated file access', lambda mods=mods: access(mods, 10))
+        modlist = {(mod.filename, mod.target): mod for mod in mods}
+        timed('mods conflicts', lambda modlist=modlist: ModelConflicts.fromModList(modlist, 0))
+    return {f'{name} ({count} mods)': median(values) for name, values in results.items()}
+
+
+def main() -> int:
+    argp = ArgumentParser(description='measure the performance of mod file lists and conflicts')
+    argp.add_argument('-m', '--mods', type=int, default=5000, help='number of mods')
+    argp.add_argument('-f', '--files', type=int, default=200, help='number of files per mod')
+    argp.add_argument('-n', '--runs', type=int, default=5, help='number of runs, the median is reported')
+    argp.add_argument('--record', default=False, action='store_true', help='store the results as the new baselines')
+    args = argp.parse_args()
+
+    results = measure(args.mods, args.files, args.runs)
+    regressions = report(results, print)
+    if args.record:
+        recordBaselines(results)
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
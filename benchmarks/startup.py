@@ -0,0 +1,153 @@
+"""
+Startup benchmarks - import time of the entry modules and time to the first paint of the main window
+
+Run with `python benchmarks/startup.py`, `--record` stores the results as the new baselines.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from argparse import SUPPRESS, ArgumentParser
+from pathlib import Path
+
+from common import median, mockGamePath, projectRoot, recordBaselines, report
+
+
+modules = (
+    'w3modmanager.core.model',
+    'w3modmanager.ui.console.cli',
+    'w3modmanager.ui.graphical.mainwindow',
+)
+
+
+def importTime(module: str) -> tuple[float, dict[str, float]]:
+    """Import the module in a fresh interpreter, returns the total and the slowest packages in ms"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],  # noqa: S603
+        capture_output=True, text=True, cwd=projectRoot, check=True)
+    total = 0.0
+    packages: dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$', line)
+        if not match:
+            continue
+        cumulative, name = int(match.group(1)) / 1000, match.group(3)
+        if not match.group(2):
+            total += cumulative
+        if '.' not in name and not name.startswith('_'):
+            packages[name] = cumulative
+    slowest = dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)[:8])
+    return total, slowest
+
+
+def firstPaint() -> dict[str, float]:
+    """Start the main window on the offscreen platform with the mock data, returns the phase timings in ms"""
+    with mockGamePath() as tempdir:
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, __file__, '--paint', str(tempdir)],  # noqa: S603
+            capture_output=True, text=True, cwd=projectRoot, check=True,
+            env={**os.environ, 'QT_QPA_PLATFORM': 'offscreen'})
+        total = (time.perf_counter() - start) * 1000
+        timings: dict[str, float] = json.loads(result.stdout.splitlines()[-1])
+        return {**timings, 'process': total}
+
+
+def paint(path: Path) -> None:
+    """Child process of the first paint benchmark"""
+    start = time.perf_counter()
+    timings: dict[str, float] = {}
+
+    def mark(name: str) -> None:
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    from w3modmanager.core.model import Model
+    from w3modmanager.ui.graphical.mainwindow import MainWindow
+
+    import asyncio
+
+    from PySide6.QtCore import QEvent, QObject, QSettings
+    from PySide6.QtWidgets import QApplication
+    from qasync import QEventLoop
+    mark('imports')
+
+    QSettings.setDefaultFormat(QSettings.Format.IniFormat)
+    QSettings.setPath(QSettings.Format.IniFormat, QSettings.Scope.UserScope, str(path.joinpath('settings')))
+    app = QApplication(sys.argv[:1])
+    eventloop = QEventLoop(app)
+    asyncio.set_event_loop(eventloop)
+    model = Model(path.joinpath('programs'), path.joinpath('documents'), path.joinpath('cache'))
+    mark('model')
+
+    class PaintFilter(QObject):
+        def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+            if event.type() == QEvent.Type.Paint and 'paint' not in timings:
+                mark('paint')
+                eventloop.call_soon(eventloop.stop)
+            return False
+
+    windows: list[MainWindow] = []
+
+    def createWindow() -> None:
+        # the window starts its tasks when created, which needs the running event loop
+        window = MainWindow(model)
+        window.installEventFilter(PaintFilter(window))
+        windows.append(window)
+        mark('window')
+
+    with eventloop:
+        eventloop.call_soon(createWindow)
+        eventloop.run_forever()
+        eventloop.run_until_complete(asyncio.gather(*windows[0].mainwidget.tasks))
+        mark('loaded')
+    model.close()
+    print(json.dumps(timings))  # noqa: T201
+
+
+def measure(runs: int) -> dict[str, float]:
+    results: dict[str, list[float]] = {}
+
+    def add(name: str, value: float) -> None:
+        results.setdefault(name, []).append(value)
+
+    for _ in range(runs):
+        for module in modules:
+            total, _slowest = importTime(module)
+            add(f'import {module}', total)
+        for phase, value in firstPaint().items():
+            add(f'start {phase}', value)
+    return {name: median(values) for name, values in results.items()}
+
+
+def main() -> int:
+    argp = ArgumentParser(description='measure startup times of w3modmanager')
+    argp.add_argument('-n', '--runs', type=int, default=5, help='number of runs, the median is reported')
+    argp.add_argument('--record', default=False, action='store_true', help='store the results as the new baselines')
+    argp.add_argument('--slowest', default=False, action='store_true', help='list the slowest imports per module')
+    argp.add_argument('--paint', type=Path, help=SUPPRESS)
+    args = argp.parse_args()
+
+    if args.paint:
+        paint(args.paint)
+        return 0
+    if args.slowest:
+        for module in modules:
+            total, slowest = importTime(module)
+            print(f'{module} ({total:.1f} ms)')  # noqa: T201
+            for name, value in slowest.items():
+                print(f'    {name:<44} {value:>8.1f} ms')  # noqa: T201
+
+    results = measure(args.runs)
+    regressions = report(results, print)
+    if args.record:
+        recordBaselines(results)
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -128,3 +128,12 @@ def check(ctx: Any):
 def test(ctx: Any, changes=False):
     """runs the test suite"""
     return subprocess.run(f'python -m pytest --verbose {"--picked --mode=branch" if changes else ""}', shell=True).returncode
+
+
+@task
+def benchmark(ctx: Any, runs=5, record=False, suite=''):
+    """measure the startup, core, mod and mod list performance and compare them with the recorded baselines"""
+    suites = [suite] if suite else ['startup', 'core', 'mods', 'modlist']
+    return max(subprocess.run(
+        f'python benchmarks/{name}.py --runs {runs} {"--record" if record else ""}', shell=True
+    ).returncode for name in suites)
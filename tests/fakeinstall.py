@@ -0,0 +1,188 @@
+"""
+Deterministic generator of fake game installs with many mods, DLCs, bundles and settings
+"""
+
+from .framework import linkGamePaths
+
+import hashlib
+import random
+import struct
+import zlib
+
+from dataclasses import dataclass
+from pathlib import Path
+
+
+bundleMagic = b'POTATO70'
+bundleHeaderSize = 0x20
+bundleEntrySize = 0x140
+bundleTimestamp = 132000000000000000
+
+
+def fileContent(name: str, size: int) -> bytes:
+    # deterministic content derived from the file name, so identical names have identical content
+    pattern = hashlib.sha256(name.encode()).digest()
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def modName(prefix: str, index: int) -> str:
+    # names end in letters, trailing digits are stripped from detected mod names as versions
+    suffix = ''
+    for _ in range(4):
+        index, letter = divmod(index, 26)
+        suffix = chr(ord('a') + letter) + suffix
+    return f'{prefix}{suffix.capitalize()}'
+
+
+def writeBundle(path: Path, files: dict[str, bytes]) -> None:
+    """Write uncompressed files as a bundle in the POTATO70 layout of the game"""
+    toc = len(files) * bundleEntrySize
+    offset = bundleHeaderSize + toc
+    entries = bytearray()
+    data = bytearray()
+    for name, content in files.items():
+        entries += struct.pack(
+            '<256s16sIIIIQ16sII',
+            name.replace('/', '\\').encode(), hashlib.md5(content, usedforsecurity=False).digest(),
+            0, len(content), len(content), offset + len(data), bundleTimestamp, b'', zlib.crc32(content), 0)
+        data += content
+    size = offset + len(data)
+    header = struct.pack('<8sIII', bundleMagic, size, size, toc).ljust(bundleHeaderSize, b'\0')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(header + entries + data)
+
+
+def readBundle(path: Path) -> list[str]:
+    """List the files of a bundle in the POTATO70 layout"""
+    content = path.read_bytes()
+    magic, _size, _dummy, toc = struct.unpack_from('<8sIII', content)
+    if magic != bundleMagic:
+        raise ValueError(f'Invalid bundle: {path}')
+    names = []
+    for offset in range(bundleHeaderSize, bundleHeaderSize + toc, bundleEntrySize):
+        name, = struct.unpack_from('<256s', content, offset)
+        names.append(name.rstrip(b'\0').decode().replace('\\', '/'))
+    return names
+
+
+@dataclass
+class FakeInstall:
+    """
+    A game install at the given root with installed mods, DLCs and mods to install.
+    The same parameters always create the same files, names are shared between mods so they conflict.
+    """
+
+    root: Path
+    mods: int = 100
+    files: int = 20
+    '''Number of content files per mod, about half of them scripts'''
+    size: int = 1024
+    '''Average size of the content files in bytes'''
+    bundled: int = 50
+    '''Number of files in the bundle of every mod and DLC'''
+    settings: float = 0.25
+    '''Share of mods with user and input settings'''
+    disabled: float = 0.1
+    dlcs: int = 5
+    sources: int = 10
+    '''Number of mods outside the game directory to install'''
+    seed: int = 0
+
+    @property
+    def gamepath(self) -> Path:
+        return self.root.joinpath('programs')
+
+    @property
+    def configpath(self) -> Path:
+        return self.root.joinpath('documents')
+
+    @property
+    def cachepath(self) -> Path:
+        return self.root.joinpath('cache')
+
+    @property
+    def modspath(self) -> Path:
+        return self.gamepath.joinpath('mods')
+
+    @property
+    def dlcspath(self) -> Path:
+        return self.gamepath.joinpath('dlc')
+
+    @property
+    def sourcespath(self) -> Path:
+        return self.root.joinpath('sources')
+
+    def create(self) -> 'FakeInstall':
+        self.gamepath.joinpath('bin/x64').mkdir(parents=True, exist_ok=True)
+        self.gamepath.joinpath('bin/x64/witcher3.exe').write_bytes(b'')
+        self.gamepath.joinpath('content').mkdir(parents=True, exist_ok=True)
+        self.gamepath.joinpath('content/metadata.store').write_bytes(fileContent('metadata', 64))
+        self.modspath.mkdir(parents=True, exist_ok=True)
+        self.dlcspath.mkdir(parents=True, exist_ok=True)
+        linkGamePaths(self.root)
+        self.sourcespath.mkdir(parents=True, exist_ok=True)
+        self.cachepath.mkdir(parents=True, exist_ok=True)
+
+        # the settings of enabled mods are part of the game settings, as if they were installed by the manager
+        user = ['[Game]\nDifficulty=2\n']
+        inputs = ['[Exploration]\nIK_W=(Action=MoveForward)\n']
+        priorities = []
+        for index in range(self.mods):
+            rng = random.Random(f'{self.seed}-mod-{index}')
+            name = modName('modGenerated', index)
+            disabled = rng.random() < self.disabled
+            settings = self.createMod(self.modspath.joinpath(f'~{name}' if disabled else name), name, rng)
+            if settings and not disabled:
+                user.append(settings[0])
+                inputs.append(settings[1])
+            if rng.random() < 0.5:
+                priorities.append(f'[{name}]\nEnabled=1\nPriority={rng.randrange(1000)}\n')
+        self.configpath.mkdir(parents=True, exist_ok=True)
+        self.configpath.joinpath('user.settings').write_text('\n'.join(user), encoding='utf-8')
+        self.configpath.joinpath('input.settings').write_text('\n'.join(inputs), encoding='utf-8')
+        self.configpath.joinpath('mods.settings').write_text('\n'.join(priorities), encoding='utf-8')
+        for index in range(self.dlcs):
+            rng = random.Random(f'{self.seed}-dlc-{index}')
+            name = modName('dlcgenerated', index).lower()
+            self.createDlc(self.dlcspath.joinpath(name), name, rng)
+        for index in range(self.sources):
+            rng = random.Random(f'{self.seed}-source-{index}')
+            name = modName('modSource', index)
+            self.createMod(self.sourcespath.joinpath(f'Source {index}', name), name, rng)
+        return self
+
+    def createMod(self, path: Path, name: str, rng: random.Random) -> tuple[str, str] | None:
+        """Create the files of a mod, returns its user and input settings if it has any"""
+        for index in range(self.files):
+            # names are drawn from a pool about twice the size of a mod, so most mods share some files
+            file = rng.randrange(self.files * 2)
+            if index % 2:
+                relpath = f'content/scripts/game/generated/script{file}.ws'
+            else:
+                relpath = f'content/generated/{name.lower()}/strings{index}.w3strings'
+            size = max(1, round(rng.gauss(self.size, self.size / 4)))
+            target = path.joinpath(relpath)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(fileContent(f'{relpath}-{size}', size))
+        self.createBundle(path.joinpath('content/blob0.bundle'), rng)
+        path.joinpath('content/metadata.store').write_bytes(fileContent(f'{name}-metadata', 64))
+        path.joinpath('readme.txt').write_text(f'{name}\n\nGenerated mod for benchmarks.\n', encoding='utf-8')
+        if rng.random() >= self.settings:
+            return None
+        user = f'[{name}]\nEnabled=true\nValue={rng.randrange(100)}\n'
+        inputs = f'[{name}]\nIK_F{rng.randrange(1, 13)}=(Action={name}Action)\n'
+        path.joinpath('user.settings.part.txt').write_text(user, encoding='utf-8')
+        path.joinpath('input.settings.part.txt').write_text(inputs, encoding='utf-8')
+        return user, inputs
+
+    def createDlc(self, path: Path, name: str, rng: random.Random) -> None:
+        self.createBundle(path.joinpath('content/blob0.bundle'), rng)
+        path.joinpath('content/metadata.store').write_bytes(fileContent(f'{name}-metadata', 64))
+        path.joinpath(f'content/{name}.w2ent').write_bytes(fileContent(name, self.size))
+
+    def createBundle(self, path: Path, rng: random.Random) -> None:
+        files = {}
+        for _ in range(self.bundled):
+            relpath = f'generated/textures/texture{rng.randrange(self.bundled * 4)}.xbm'
+            files[relpath] = fileContent(relpath, rng.randrange(16, 256))
+        writeBundle(path, files)
@@ -0,0 +1,196 @@
+"""
+Local stand-in for the Nexus Mods api and file servers
+"""
+
+import asyncio
+import hashlib
+import itertools
+import re
+import time
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class FakeFile:
+    modid: int
+    fileid: int
+    size: int
+    version: str = '1.0'
+    category: str = 'MAIN'
+    uploaded: int = 1600000000
+    md5hash: str = ''
+
+    def __post_init__(self) -> None:
+        self.md5hash = hashlib.md5(self.content(), usedforsecurity=False).hexdigest()
+
+    @property
+    def name(self) -> str:
+        return f'mod{self.modid}-{self.fileid}.zip'
+
+    def content(self, start: int = 0, end: int = -1) -> bytes:
+        # deterministic content derived from the file id, so large payloads need no storage
+        end = self.size if end < 0 else end
+        pattern = hashlib.sha256(str(self.fileid).encode()).digest() * 128
+        offset = start % len(pattern)
+        repeats = -(-(end - start + offset) // len(pattern))
+        return (pattern * repeats)[offset:offset + end - start]
+
+
+@dataclass
+class FakeNexus:
+    """Serves md5_search, files.json, download_link.json and file downloads with latency and rate limits"""
+
+    latency: float = 0.0
+    hourlyLimit: int = 100000
+    burstLimit: int = 0
+    retryAfter: int = 1
+    chunkSize: int = 64 * 1024
+    files: dict[int, FakeFile] = field(default_factory=dict)
+    hashes: dict[str, FakeFile] = field(default_factory=dict)
+    requests: dict[str, int] = field(default_factory=dict)
+    limited: int = 0
+    running: int = 0
+    peak: int = 0
+    _window: list[float] = field(default_factory=list)
+
+    def addMod(self, modid: int, size: int = 1024, versions: int = 1) -> list[FakeFile]:
+        files = [
+            FakeFile(modid, modid * 100 + index, size, f'1.{index}', 'MAIN' if index == versions - 1 else 'OLD_VERSION',
+                     1600000000 + index * 1000)
+            for index in range(versions)
+        ]
+        for file in files:
+            self.files[file.fileid] = file
+            self.hashes[file.md5hash] = file
+        return files
+
+    def modFiles(self, modid: int) -> list[FakeFile]:
+        return [file for file in self.files.values() if file.modid == modid]
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url='https://api.nexusmods.com', transport=httpx.MockTransport(self.handle))
+
+    def count(self, endpoint: str) -> int:
+        return self.requests.get(endpoint, 0)
+
+    def rateLimited(self) -> bool:
+        # the burst limit applies per second, the hourly limit to all requests
+        now = time.monotonic()
+        self._window = [sent for sent in self._window if now - sent < 1.0]
+        total = sum(count for endpoint, count in self.requests.items() if endpoint != 'cdn')
+        if total >= self.hourlyLimit or self.burstLimit and len(self._window) >= self.burstLimit:
+            return True
+        self._window.append(now)
+        return False
+
+    def headers(self) -> dict[str, str]:
+        total = sum(count for endpoint, count in self.requests.items() if endpoint != 'cdn')
+        return {
+            'x-rl-hourly-limit': str(self.hourlyLimit),
+            'x-rl-hourly-remaining': str(max(0, self.hourlyLimit - total)),
+            'x-rl-hourly-reset': '2099-01-01 00:00:00 +0000',
+            'x-rl-daily-limit': '0',
+            'x-rl-daily-remaining': '0',
+            'x-rl-daily-reset': '2099-01-01 00:00:00 +0000',
+        }
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            path = request.url.path
+            if request.url.host == 'files.nexus-cdn.com':
+                return self.download(request)
+            if self.rateLimited():
+                self.limited += 1
+                return httpx.Response(429, headers={**self.headers(), 'retry-after': str(self.retryAfter)}, json={})
+            if match := re.match(r'^/v1/games/witcher3/mods/md5_search/(\w+)\.json$', path):
+                return self.md5Search(match.group(1))
+            if match := re.match(r'^/v1/games/witcher3/mods/(\d+)/files\.json$', path):
+                return self.modFileList(int(match.group(1)))
+            if match := re.match(r'^/v1/games/witcher3/mods/(\d+)/files/(\d+)/download_link\.json$', path):
+                return self.downloadLink(int(match.group(1)), int(match.group(2)))
+            return httpx.Response(404, json={'message': 'Not found'})
+        finally:
+            self.running -= 1
+
+    def record(self, endpoint: str) -> None:
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def md5Search(self, md5hash: str) -> httpx.Response:
+        self.record('md5_search')
+        file = self.hashes.get(md5hash)
+        if not file:
+            return httpx.Response(404, headers=self.headers(), json={'message': 'No file found'})
+        return httpx.Response(200, headers=self.headers(), json=[{
+            'mod': {
+                'name': f'Mod {file.modid}',
+                'summary': f'Summary of mod {file.modid}',
+                'mod_id': file.modid,
+                'category_id': 2,
+                'available': True,
+                'updated_timestamp': file.uploaded,
+            },
+            'file_details': self.fileDetails(file),
+        }])
+
+    def modFileList(self, modid: int) -> httpx.Response:
+        self.record('files')
+        files = sorted(self.modFiles(modid), key=lambda file: file.fileid)
+        if not files:
+            return httpx.Response(404, headers=self.headers(), json={'message': 'No mod found'})
+        return httpx.Response(200, headers=self.headers(), json={
+            'files': [self.fileDetails(file) for file in files],
+            'file_updates': [
+                {'old_file_id': old.fileid, 'new_file_id': new.fileid} for old, new in itertools.pairwise(files)
+            ],
+        })
+
+    def downloadLink(self, modid: int, fileid: int) -> httpx.Response:
+        self.record('download_link')
+        file = self.files.get(fileid)
+        if not file or file.modid != modid:
+            return httpx.Response(404, headers=self.headers(), json={'message': 'No file found'})
+        return httpx.Response(200, headers=self.headers(), json=[{
+            'name': 'Nexus CDN',
+            'short_name': 'Nexus CDN',
+            'URI': f'https://files.nexus-cdn.com/{modid}/{fileid}/{file.name}',
+        }])
+
+    def download(self, request: httpx.Request) -> httpx.Response:
+        self.record('cdn')
+        match = re.match(r'^/(\d+)/(\d+)/', request.url.path)
+        file = self.files.get(int(match.group(2))) if match else None
+        if not file:
+            return httpx.Response(404)
+        header = re.match(r'bytes=(\d+)-(\d*)', request.headers.get('range', ''))
+        start = int(header.group(1)) if header else 0
+        end = int(header.group(2)) + 1 if header and header.group(2) else file.size
+        headers = {'etag': f'"{file.fileid}"', 'content-length': str(end - start)}
+        if header:
+            headers['content-range'] = f'bytes {start}-{end - 1}/{file.size}'
+        return httpx.Response(206 if header else 200, headers=headers, content=self.stream(file, start, end))
+
+    async def stream(self, file: FakeFile, start: int, end: int) -> AsyncIterator[bytes]:
+        for offset in range(start, end, self.chunkSize):
+            yield file.content(offset, min(end, offset + self.chunkSize))
+
+    def fileDetails(self, file: FakeFile) -> dict[str, Any]:
+        return {
+            'file_id': file.fileid,
+            'name': file.name,
+            'version': file.version,
+            'category_name': file.category,
+            'file_name': file.name,
+            'size_kb': file.size // 1024,
+            'uploaded_timestamp': file.uploaded,
+            'uploaded_time': time.strftime('%Y-%m-%dT%H:%M:%S.000+00:00', time.gmtime(file.uploaded)),
+            'md5': file.md5hash,
+        }
@@ -24,3 +24,11 @@ def mockdata() -> Generator[Path, None, None]:
     copytree(_mockdata, tempdir, dirs_exist_ok=True)
     yield Path(tempdir)
     rmtree(tempdir)
+
+
+def linkGamePaths(mockdata: Path) -> None:
+    # mods are loaded from the capitalized directories, which differ on case-sensitive file systems
+    programs = mockdata.joinpath('programs')
+    for name, target in (('Mods', 'mods'), ('DLC', 'dlc')):
+        if not programs.joinpath(name).exists():
+            programs.joinpath(name).symlink_to(programs.joinpath(target), target_is_directory=True)
@@ -0,0 +1,126 @@
+"""
+Test cases for the archive cache
+"""
+
+from w3modmanager.core.cache import *
+from w3modmanager.domain.mod.mod import *
+from w3modmanager.util.vfs import relativePath
+
+from .framework import *
+
+import os
+import shutil
+
+
+async def detectCopy(mockdata: Path, name: str, target: Path) -> list[Mod]:
+    shutil.copytree(mockdata.joinpath('mods').joinpath(name), target)
+    return await Mod.fromDirectory(target)
+
+
+@pytest.mark.asyncio()
+async def test_archive_cache_extracted(mockdata: Path) -> None:
+    cache = ArchiveCache(mockdata.joinpath('cache'), keepExtracted=True)
+    extracted = mockdata.joinpath('staging/mod-with-inputs')
+    mods = await detectCopy(mockdata, 'mod-with-inputs', extracted)
+    archive = mockdata.joinpath('mods/mod-normal.zip')
+    cache.put('a' * 32, mods, extracted, archive)
+    assert not extracted.exists()
+    assert all(mod.source.is_dir() for mod in mods)
+    assert cache.lookupHash(archive) == 'a' * 32
+    assert cache.size > 0
+
+    # reading the index again restores the entry
+    cache = ArchiveCache(mockdata.joinpath('cache'))
+    cached = cache.get('a' * 32)
+    assert cached is not None
+    cachedMods, tree = cached
+    assert tree is not None
+    assert [mod.filename for mod in cachedMods] == [mod.filename for mod in mods]
+    assert [mod.files for mod in cachedMods] == [mod.files for mod in mods]
+    assert [mod.source for mod in cachedMods] == [mod.source for mod in mods]
+    assert cache.hits == 1
+
+    # a changed archive is not matched
+    os.utime(archive, ns=(0, 0))
+    assert cache.lookupHash(archive) == ''
+    assert cache.get('b' * 32) is None
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio()
+async def test_archive_cache_mods_only(mockdata: Path) -> None:
+    # only the detected mods are cached by default
+    cache = ArchiveCache(mockdata.joinpath('cache'))
+    extracted = mockdata.joinpath('staging/normal')
+    mods = await detectCopy(mockdata, 'normal', extracted)
+    cache.put('a' * 32, mods, extracted)
+    assert extracted.is_dir()
+    cached = cache.get('a' * 32)
+    assert cached is not None
+    cachedMods, tree = cached
+    assert tree is None
+    assert cachedMods[0].source == relativePath(mods[0].source, extracted)
+    assert cachedMods[0].contents == mods[0].contents
+
+
+def test_archive_cache_eviction(mockdata: Path) -> None:
+    cache = ArchiveCache(mockdata.joinpath('cache'), maxSize=250, keepExtracted=True)
+    for index in range(3):
+        extracted = mockdata.joinpath(f'staging/{index}')
+        extracted.mkdir(parents=True)
+        extracted.joinpath('file').write_bytes(b'0' * 100)
+        cache.put(str(index) * 32, [], extracted)
+        if index == 1:
+            # access the first entry, making the second the least recently used one
+            cache.get('0' * 32)
+    assert '0' * 32 in cache
+    assert '1' * 32 not in cache
+    assert '2' * 32 in cache
+    assert cache.size == 200
+    cache.clear()
+    assert len(cache) == 0
+    assert not mockdata.joinpath('cache').joinpath('0' * 32).exists()
+
+
+def test_archive_cache_pinned(mockdata: Path) -> None:
+    cache = ArchiveCache(mockdata.joinpath('cache'), maxSize=150, keepExtracted=True)
+    for index in range(2):
+        extracted = mockdata.joinpath(f'staging/{index}')
+        extracted.mkdir(parents=True)
+        extracted.joinpath('file').write_bytes(str(index).encode() * 100)
+        if index == 0:
+            cache.put('0' * 32, [], extracted)
+            cache.pin('0' * 32)
+        else:
+            cache.put('1' * 32, [], extracted)
+    # the pinned entry is kept over the limit and not removed while in use
+    assert '0' * 32 in cache
+    assert '1' * 32 in cache
+    cache.clear()
+    assert '0' * 32 in cache
+    assert mockdata.joinpath('cache').joinpath('0' * 32).joinpath('files/file').is_file()
+
+    # an existing tree is not replaced
+    extracted = mockdata.joinpath('staging/2')
+    extracted.mkdir(parents=True)
+    extracted.joinpath('file').write_bytes(b'2' * 100)
+    cache.put('0' * 32, [], extracted)
+    assert mockdata.joinpath('cache').joinpath('0' * 32).joinpath('files/file').read_bytes() == b'0' * 100
+
+    cache.unpin('0' * 32)
+    cache.clear()
+    assert len(cache) == 0
+    assert not mockdata.joinpath('cache').joinpath('0' * 32).exists()
+    assert not [path for path in mockdata.joinpath('cache').iterdir() if path.name.startswith('.')]
+
+
+def test_archive_cache_get_does_not_write(mockdata: Path) -> None:
+    cache = ArchiveCache(mockdata.joinpath('cache'), keepExtracted=True)
+    extracted = mockdata.joinpath('staging/0')
+    extracted.mkdir(parents=True)
+    cache.put('0' * 32, [], extracted)
+    cache.indexfile.unlink()
+    assert cache.get('0' * 32) is not None
+    assert not cache.indexfile.exists()
+    cache.flush()
+    assert cache.indexfile.is_file()
@@ -0,0 +1,126 @@
+"""
+Test cases for the headless command line interface
+"""
+
+from w3modmanager.core.pipeline import InstallPipeline
+from w3modmanager.ui.console.cli import *
+
+from .framework import *
+
+import io
+import json
+import shutil
+
+from pathlib import Path
+from typing import Any
+
+from PySide6.QtCore import QSettings
+
+
+def useSettings(mockdata: Path, **values: str) -> None:
+    # keep the settings of the graphical interface out of the tests
+    QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, str(mockdata.joinpath('settings')))
+    settings = getSettings()
+    for key, value in values.items():
+        settings.setValue(key, value)
+    settings.sync()
+
+
+async def runCommand(mockdata: Path, *command: str) -> tuple[int, list[dict[str, Any]]]:
+    useSettings(mockdata)
+    stream = io.StringIO()
+    args = createParser().parse_args([
+        '-g', str(mockdata.joinpath('programs')),
+        '-s', str(mockdata.joinpath('documents')),
+        '-c', str(mockdata.joinpath('cache')),
+        *command
+    ])
+    result = await run(args, Output(stream))
+    return result, [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.mark.asyncio()
+async def test_cli_install_list_remove(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    result, records = await runCommand(
+        mockdata, 'install', str(mockdata.joinpath('mods/mod-with-inputs')), str(mockdata.joinpath('mods/patch')))
+    assert result == 0
+    assert [record['command'] for record in records] == ['install', 'install', 'summary']
+    assert all(record['ok'] for record in records[:2])
+    assert records[-1]['succeeded'] == 2
+    assert records[-1]['failed'] == 0
+    installed = {filename for record in records[:2] for filename in record['installed']}
+
+    result, records = await runCommand(mockdata, 'list')
+    assert result == 0
+    assert installed <= {record['filename'] for record in records if record['command'] == 'list'}
+
+    name = sorted(installed)[0]
+    result, records = await runCommand(mockdata, 'remove', name, 'modDoesNotExist')
+    assert result == 1
+    assert [record['ok'] for record in records[:2]] == [True, False]
+    assert records[-1] == {**records[-1], 'succeeded': 1, 'failed': 1}
+
+    result, records = await runCommand(mockdata, 'list')
+    assert name not in {record['filename'] for record in records if record['command'] == 'list'}
+
+
+@pytest.mark.asyncio()
+async def test_cli_enable_disable_verify(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    result, records = await runCommand(mockdata, 'install', str(mockdata.joinpath('mods/mod-with-inputs')))
+    assert result == 0
+    name = records[0]['installed'][0]
+
+    result, records = await runCommand(mockdata, 'disable', name)
+    assert result == 0
+    result, records = await runCommand(mockdata, 'list')
+    assert [record['enabled'] for record in records if record.get('filename') == name] == [False]
+
+    result, records = await runCommand(mockdata, 'verify')
+    assert result == 0
+    assert all(record['ok'] for record in records if record['command'] == 'verify')
+
+    result, records = await runCommand(mockdata, 'enable', name)
+    assert result == 0
+    result, records = await runCommand(mockdata, 'list')
+    assert [record['enabled'] for record in records if record.get('filename') == name] == [True]
+
+
+@pytest.mark.asyncio()
+async def test_cli_invalid_install(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    result, records = await runCommand(mockdata, 'install', str(mockdata.joinpath('documents')))
+    assert result == 1
+    assert records[0]['ok'] is False
+    assert records[0]['errors']
+    assert records[-1]['failed'] == 1
+
+
+@pytest.mark.asyncio()
+async def test_cli_install_settings(mockdata: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    linkGamePaths(mockdata)
+
+    async def extract(self: InstallPipeline, archive: Path, staging: Path) -> Path:
+        # the bundled extractor is not available on every platform
+        shutil.unpack_archive(archive, staging.joinpath(f'.{archive.stem}'))
+        return staging.joinpath(f'.{archive.stem}')
+
+    monkeypatch.setattr(InstallPipeline, 'extract', extract)
+    archive = shutil.make_archive(
+        str(mockdata.joinpath('mod-with-inputs')), 'zip', mockdata.joinpath('mods'), 'mod-with-inputs')
+    archives = mockdata.joinpath('cache/archives')
+
+    useSettings(mockdata, cacheArchives='False', deduplicateFiles='True')
+    result, records = await runCommand(mockdata, 'install', archive)
+    assert result == 0
+    assert not [path for path in archives.iterdir() if path.is_dir()]
+    assert any(mockdata.joinpath('cache/store').iterdir())
+
+    result, records = await runCommand(mockdata, 'remove', *records[0]['installed'])
+    assert result == 0
+    useSettings(mockdata, cacheArchives='True', deduplicateFiles='False')
+    result, records = await runCommand(mockdata, 'install', archive)
+    assert result == 0
+    # only the detected mods are cached by default
+    assert [path.joinpath('files').exists() for path in archives.iterdir() if path.is_dir()] == [False]
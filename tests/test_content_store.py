@@ -0,0 +1,79 @@
+"""
+Test cases for the content store
+"""
+
+from w3modmanager.core import store as storemodule
+from w3modmanager.core.store import *
+
+from .framework import *
+
+import errno
+import os
+
+
+def test_store_deduplicates(mockdata: Path) -> None:
+    store = ContentStore(mockdata.joinpath('store'))
+    source = mockdata.joinpath('source')
+    source.mkdir()
+    source.joinpath('shared.txt').write_bytes(b'shared' * 100)
+    source.joinpath('other.txt').write_bytes(b'other')
+    first = mockdata.joinpath('first')
+    second = mockdata.joinpath('second')
+    first.mkdir()
+    second.mkdir()
+
+    shared = store.link(source.joinpath('shared.txt'), first.joinpath('shared.txt'))
+    assert store.link(source.joinpath('shared.txt'), second.joinpath('shared.txt')) == shared
+    other = store.link(source.joinpath('other.txt'), second.joinpath('other.txt'))
+    assert shared != other
+    assert first.joinpath('shared.txt').read_bytes() == b'shared' * 100
+    assert first.joinpath('shared.txt').samefile(second.joinpath('shared.txt'))
+    assert store.references(shared) == 2
+    assert store.references(other) == 1
+    assert store.bytesSaved == 600
+    store.writeRecord(first, [shared])
+    store.writeRecord(second, [shared, other])
+    store.write()
+
+    # references survive reading the index again
+    store = ContentStore(mockdata.joinpath('store'))
+    assert store.references(shared) == 2
+    store.release(store.readRecord(second))
+    assert store.references(shared) == 1
+    assert other not in store
+    assert not store.objectPath(other).exists()
+    assert store.bytesSaved == 0
+    store.release(store.readRecord(first))
+    assert len(store) == 0
+    assert not store.objectPath(shared).exists()
+    assert first.joinpath('shared.txt').read_bytes() == b'shared' * 100
+
+
+def test_store_release_unknown(mockdata: Path) -> None:
+    store = ContentStore(mockdata.joinpath('store'))
+    store.release(['0' * 40, ''])
+    assert store.readRecord(mockdata) == []
+    assert len(store) == 0
+
+
+def test_store_bypassed_without_links(mockdata: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    probes: list[Path] = []
+
+    def link(source: Path, target: Path) -> None:
+        probes.append(Path(target))
+        raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+
+    monkeypatch.setattr(storemodule.os, 'link', link)
+    store = ContentStore(mockdata.joinpath('store'))
+    source = mockdata.joinpath('source')
+    source.mkdir()
+    source.joinpath('file.txt').write_bytes(b'file')
+    target = mockdata.joinpath('target')
+    target.mkdir()
+    # files are copied without hashing or storing them, the volume is probed only once
+    assert store.link(source.joinpath('file.txt'), target.joinpath('first.txt')) == ''
+    assert store.link(source.joinpath('file.txt'), target.joinpath('second.txt')) == ''
+    assert target.joinpath('second.txt').read_bytes() == b'file'
+    assert len(probes) == 1
+    assert len(store) == 0
+    assert not [path for path in mockdata.joinpath('store').rglob('*') if path.is_file()]
@@ -0,0 +1,34 @@
+"""
+Test cases for the file lists of the details window
+"""
+
+from w3modmanager.ui.graphical.detailswindow import FileListModel
+
+from .framework import *
+
+from PySide6.QtCore import QModelIndex
+
+
+def test_file_list_loads_in_batches() -> None:
+    files = [f'file{index}' for index in range(1200)]
+    model = FileListModel(files, str)
+    assert model.rowCount() == 0
+    model.fetchMore(QModelIndex())
+    assert model.rowCount() == FileListModel.batchSize
+    while model.canFetchMore(QModelIndex()):
+        model.fetchMore(QModelIndex())
+    assert model.rowCount() == len(files)
+    assert model.index(1199).data() == 'file1199'
+
+
+def test_file_list_lists_conflicts_first_and_filters() -> None:
+    files = [f'file{index}' for index in range(1000)]
+    model = FileListModel(files, str, {'file500': 'other', 'file20': 'another'}, 'overridden by')
+    model.fetchMore(QModelIndex())
+    assert model.texts(range(3)) == ['file500  overridden by other', 'file20  overridden by another', 'file0']
+    assert len(model.texts()) == len(files)
+    model.setFilter('FILE99')
+    assert model.texts() == ['file99', *(f'file{index}' for index in range(990, 1000))]
+    assert model.rowCount() == 11
+    model.setFilter('overridden')
+    assert model.rowCount() == 2
@@ -0,0 +1,152 @@
+"""
+Test cases for segmented downloads
+"""
+
+from w3modmanager.domain.web.download import *
+
+from .framework import *
+
+import hashlib
+import re
+
+from collections.abc import AsyncIterator
+
+import httpx
+
+
+class FileServer:
+    """Local stand-in for a download server with optional range support and injected failures"""
+
+    def __init__(self, content: bytes, ranges: bool = True, etag: str = '"1"') -> None:
+        self.content = content
+        self.ranges = ranges
+        self.etag = etag
+        self.requests: list[str] = []
+        self.failAfter = -1
+        self.failures = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        header = request.headers.get('range', '')
+        self.requests.append(header)
+        match = re.match(r'bytes=(\d+)-(\d*)', header)
+        if not self.ranges or not match:
+            return httpx.Response(200, headers={'etag': self.etag}, content=self.stream(0, len(self.content)))
+        start = int(match.group(1))
+        end = int(match.group(2)) + 1 if match.group(2) else len(self.content)
+        return httpx.Response(206, headers={
+            'etag': self.etag,
+            'content-range': f'bytes {start}-{end - 1}/{len(self.content)}',
+            'content-length': str(end - start),
+        }, content=self.stream(start, end))
+
+    async def stream(self, start: int, end: int) -> AsyncIterator[bytes]:
+        fail = self.failures > 0
+        self.failures -= 1
+        for offset in range(start, end, 1000):
+            if fail and offset - start >= self.failAfter:
+                raise httpx.ReadError('Connection reset')
+            yield self.content[offset:min(end, offset + 1000)]
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+@pytest.fixture()
+def content() -> bytes:
+    return bytes(range(256)) * 400
+
+
+@pytest.mark.asyncio()
+async def test_download_segmented(mockdata: Path, content: bytes) -> None:
+    server = FileServer(content)
+    events: list[DownloadProgress] = []
+    async with server.client() as client:
+        downloader = Downloader(client, segments=4, minSegmentSize=10000, chunkSize=1000)
+        downloader.progressInterval = 0
+        target = mockdata.joinpath('download/file.zip')
+        md5hash = await downloader.download('https://files/file.zip', target, progress=events.append)
+    assert target.read_bytes() == content
+    assert md5hash == hashlib.md5(content, usedforsecurity=False).hexdigest()
+    assert len(server.requests) == 4
+    assert server.requests[0] == 'bytes=0-'
+    assert events[-1].finished
+    assert events[-1].received == len(content)
+    assert not getPartPath(target).exists()
+    assert not getStatePath(target).exists()
+
+
+@pytest.mark.asyncio()
+async def test_download_without_ranges(mockdata: Path, content: bytes) -> None:
+    server = FileServer(content, ranges=False)
+    async with server.client() as client:
+        target = mockdata.joinpath('download/file.zip')
+        md5hash = await Downloader(client, minSegmentSize=1000).download('https://files/file.zip', target)
+    assert target.read_bytes() == content
+    assert md5hash == hashlib.md5(content, usedforsecurity=False).hexdigest()
+    assert len(server.requests) == 1
+
+
+@pytest.mark.asyncio()
+async def test_download_retry(mockdata: Path, content: bytes) -> None:
+    server = FileServer(content)
+    server.failAfter = 5000
+    server.failures = 1
+    async with server.client() as client:
+        downloader = Downloader(client, segments=1, chunkSize=1000)
+        downloader.retryDelay = 0
+        target = mockdata.joinpath('download/file.zip')
+        md5hash = await downloader.download('https://files/file.zip', target)
+    assert target.read_bytes() == content
+    assert md5hash == hashlib.md5(content, usedforsecurity=False).hexdigest()
+    assert server.requests == ['bytes=0-', f'bytes=5000-{len(content) - 1}']
+
+
+@pytest.mark.asyncio()
+async def test_download_resume(mockdata: Path, content: bytes) -> None:
+    server = FileServer(content)
+    server.failAfter = 6000
+    server.failures = 100
+    target = mockdata.joinpath('download/file.zip')
+    async with server.client() as client:
+        downloader = Downloader(client, segments=2, minSegmentSize=10000, chunkSize=1000, retries=0)
+        with pytest.raises(httpx.ReadError):
+            await downloader.download('https://files/file.zip', target)
+        state = readDownloadState(target, 'https://files/file.zip')
+        assert state is not None
+        assert state.received >= 6000
+        assert not target.exists()
+
+        server.failures = 0
+        server.requests.clear()
+        md5hash = await downloader.download('https://files/file.zip', target)
+    assert target.read_bytes() == content
+    assert md5hash == hashlib.md5(content, usedforsecurity=False).hexdigest()
+    assert all(request != 'bytes=0-' for request in server.requests)
+
+
+@pytest.mark.asyncio()
+async def test_download_changed(mockdata: Path, content: bytes) -> None:
+    server = FileServer(content)
+    server.failAfter = 6000
+    server.failures = 100
+    target = mockdata.joinpath('download/file.zip')
+    async with server.client() as client:
+        downloader = Downloader(client, segments=2, minSegmentSize=10000, chunkSize=1000, retries=0)
+        with pytest.raises(httpx.ReadError):
+            await downloader.download('https://files/file.zip', target)
+        server.failures = 0
+        server.content = content[::-1]
+        server.etag = '"2"'
+        md5hash = await downloader.download('https://files/file.zip', target)
+    assert target.read_bytes() == content[::-1]
+    assert md5hash == hashlib.md5(content[::-1], usedforsecurity=False).hexdigest()
+
+
+@pytest.mark.asyncio()
+async def test_download_not_found(mockdata: Path) -> None:
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda _: httpx.Response(404))) as client:
+        target = mockdata.joinpath('download/file.zip')
+        with pytest.raises(DownloadResponseError) as error:
+            await Downloader(client).download('https://files/file.zip', target)
+    assert error.value.status == 404
+    assert not getPartPath(target).exists()
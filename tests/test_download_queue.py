@@ -0,0 +1,174 @@
+"""
+Test cases for the download queue
+"""
+
+from w3modmanager.domain.web.download import *
+from w3modmanager.domain.web.downloadqueue import *
+
+from .framework import *
+
+import asyncio
+import time
+
+
+class FakeDownloads:
+    def __init__(self) -> None:
+        self.started: list[str] = []
+        self.running = 0
+        self.peak = 0
+        self.release = asyncio.Event()
+
+    async def download(
+        self, url: str, target: Path, progress: ProgressCallback, limiter: BandwidthLimiter, key: str
+    ) -> str:
+        self.started.append(url)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+            target.write_bytes(url.encode())
+            progress(DownloadProgress(url, target, len(url), len(url)))
+        finally:
+            self.running -= 1
+        return 'a' * 32
+
+
+@pytest.mark.asyncio()
+async def test_queue_priorities_and_limit(mockdata: Path) -> None:
+    fake = FakeDownloads()
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fake.download, maxConcurrent=2)
+    completed: list[str] = []
+    queue.completedCallbacks.append(lambda item: completed.append(item.url))
+    queue.add('https://files/low.zip', priority=-1)
+    queue.add('https://files/first.zip')
+    queue.add('https://files/second.zip')
+    queue.add('https://files/high.zip', priority=5)
+    queue.start()
+    await asyncio.sleep(0)
+    assert fake.started == ['https://files/high.zip', 'https://files/first.zip']
+    assert queue.running == 2
+    fake.release.set()
+    await queue.join()
+    assert fake.peak == 2
+    assert completed == [
+        'https://files/high.zip', 'https://files/first.zip', 'https://files/second.zip', 'https://files/low.zip'
+    ]
+    item = queue.items[0]
+    assert item.state == 'completed'
+    assert item.md5hash == 'a' * 32
+    assert queue.getTarget(item).read_bytes() == item.url.encode()
+    queue.remove(item.id)
+    assert not queue.getTarget(item).exists()
+    assert len(queue) == 3
+
+
+@pytest.mark.asyncio()
+async def test_queue_persistence(mockdata: Path) -> None:
+    fake = FakeDownloads()
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fake.download, maxConcurrent=1)
+    running = queue.add('https://files/running.zip', modid=1, fileid=2)
+    paused = queue.add('https://files/paused.zip')
+    queue.pause(paused.id)
+    queue.start()
+    await asyncio.sleep(0)
+    assert running.state == 'downloading'
+    assert paused.state == 'paused'
+    await queue.stop()
+
+    # reading the queue again resumes interrupted and paused downloads, pauses last until closing
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fake.download, maxConcurrent=1)
+    assert [item.id for item in queue.items] == [running.id, paused.id]
+    assert queue[running.id].state == 'queued'
+    assert queue[running.id].key == 'nexus:1:2'
+    assert queue[paused.id].state == 'queued'
+    queue.pause(paused.id)
+    fake.release.set()
+    queue.start()
+    await queue.join()
+    assert queue[running.id].state == 'completed'
+    assert queue[paused.id].state == 'paused'
+    queue.resume(paused.id)
+    await queue.join()
+    assert queue[paused.id].state == 'completed'
+
+
+def test_queue_restored_before_event_loop(mockdata: Path) -> None:
+    fake = FakeDownloads()
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fake.download)
+    running = queue.add('https://files/running.zip')
+    completed = queue.add('https://files/completed.zip')
+    running.state = 'downloading'
+    completed.state = 'completed'
+    queue.getTarget(completed).parent.mkdir(parents=True)
+    queue.getTarget(completed).write_bytes(b'')
+    queue.add('https://files/installed.zip').state = 'completed'
+    queue.flush()
+
+    # starting without a running event loop keeps the persisted state
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fake.download)
+    installed: list[str] = []
+    queue.completedCallbacks.append(lambda item: installed.append(item.id))
+    assert [item.id for item in queue.items] == [running.id, completed.id]
+    queue.start()
+    assert queue[running.id].state == 'queued'
+    assert installed == [completed.id]
+
+    async def resume() -> None:
+        fake.release.set()
+        queue.start()
+        await queue.join()
+
+    asyncio.run(resume())
+    assert queue[running.id].state == 'completed'
+    assert installed == [completed.id, running.id]
+
+
+@pytest.mark.asyncio()
+async def test_queue_failure(mockdata: Path) -> None:
+    async def fail(url: str, target: Path, progress: ProgressCallback, limiter: BandwidthLimiter, key: str) -> str:
+        raise DownloadResponseError(404)
+
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fail)
+    item = queue.add('https://files/missing.zip')
+    queue.start()
+    await queue.join()
+    assert item.state == 'failed'
+    assert item.error == 'Unexpected response: Status 404'
+    assert item.attempts == 1
+
+
+@pytest.mark.asyncio()
+async def test_queue_failure_retried(mockdata: Path) -> None:
+    async def fail(url: str, target: Path, progress: ProgressCallback, limiter: BandwidthLimiter, key: str) -> str:
+        getPartPath(target).write_bytes(b'partial')
+        raise DownloadResponseError(503)
+
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fail, maxAttempts=2)
+    item = queue.add('https://files/unavailable.zip')
+    queue.start()
+    await queue.join()
+    assert item.state == 'failed'
+    assert getPartPath(queue.getTarget(item)).is_file()
+    queue.flush()
+
+    # failed downloads are retried after the next start and dropped with their data after the last attempt
+    queue = DownloadQueue(mockdata.joinpath('downloads'), fail, maxAttempts=2)
+    assert queue[item.id].state == 'queued'
+    assert queue[item.id].attempts == 1
+    queue.start()
+    await queue.join()
+    assert len(queue) == 0
+    assert not queue.getTarget(item).parent.exists()
+
+
+@pytest.mark.asyncio()
+async def test_bandwidth_limiter() -> None:
+    limiter = BandwidthLimiter(100000)
+    start = time.monotonic()
+    for _ in range(5):
+        await limiter.consume(10000)
+    assert time.monotonic() - start >= 0.04
+    limiter.setRate(0)
+    start = time.monotonic()
+    await limiter.consume(10 ** 9)
+    assert time.monotonic() - start < 0.01
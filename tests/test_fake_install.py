@@ -0,0 +1,53 @@
+"""
+Test cases for the generated game installs of the benchmarks
+"""
+
+from w3modmanager.core.model import *
+
+from .fakeinstall import FakeInstall, readBundle
+from .framework import *
+
+import tempfile
+
+from pathlib import Path
+from shutil import rmtree
+
+
+def listFiles(path: Path) -> dict[str, bytes]:
+    return {file.relative_to(path).as_posix(): file.read_bytes() for file in path.glob('**/*') if file.is_file()}
+
+
+def test_fake_install_is_deterministic() -> None:
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        install = FakeInstall(Path(first), mods=8, dlcs=2, sources=2).create()
+        files = listFiles(install.root)
+        assert files == listFiles(FakeInstall(Path(second), mods=8, dlcs=2, sources=2).create().root)
+        rmtree(second)
+        assert files != listFiles(FakeInstall(Path(second), mods=8, dlcs=2, sources=2, seed=1).create().root)
+
+        bundle = install.modspath.glob('*/content/blob0.bundle').__next__()
+        names = readBundle(bundle)
+        assert len(names) <= install.bundled
+        assert all(name.startswith('generated/textures/') for name in names)
+
+
+@pytest.mark.asyncio()
+async def test_fake_install_loads() -> None:
+    with tempfile.TemporaryDirectory() as tempdir:
+        install = FakeInstall(Path(tempdir), mods=20, dlcs=3, sources=2, settings=0.5).create()
+        model = Model(install.gamepath, install.configpath, install.cachepath)
+        try:
+            await model.loadInstalled()
+            assert len([mod for mod in model.values() if mod.target == 'mods']) == 20
+            assert len([mod for mod in model.values() if mod.target == 'dlc']) == 3
+            assert any(not mod.enabled for mod in model.values())
+            assert any(mod.settings and mod.inputs for mod in model.values())
+            assert any(ModelConflicts.fromModList(model.data(), 0).scripts.values())
+
+            mods = await Mod.fromDirectory(install.sourcespath)
+            assert sorted(mod.filename for mod in mods) == ['modSourceAaaa', 'modSourceAaab']
+            for mod in mods:
+                await model.add(mod)
+            assert len(model) == 25
+        finally:
+            model.close()
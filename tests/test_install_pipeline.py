@@ -0,0 +1,108 @@
+"""
+Test cases for the install pipeline
+"""
+
+from w3modmanager.core.cache import *
+from w3modmanager.core.model import *
+from w3modmanager.core.pipeline import *
+
+from .framework import *
+
+import asyncio
+import shutil
+
+from typing import cast
+
+
+@pytest.mark.asyncio()
+async def test_pipeline_stage_limits() -> None:
+    pipeline = InstallPipeline(cast(Model, None), cpuLimit=2, ioLimit=1)
+    running = {'cpu': 0, 'io': 0}
+    peak = {'cpu': 0, 'io': 0}
+
+    async def work(kind: StageKind) -> None:
+        async with pipeline.stage(kind, kind):
+            running[kind] += 1
+            peak[kind] = max(peak[kind], running[kind])
+            await asyncio.sleep(0.01)
+            running[kind] -= 1
+
+    tasks = [asyncio.create_task(work('cpu' if i % 2 else 'io')) for i in range(10)]
+    await asyncio.sleep(0)
+    assert pipeline.queueDepth == {'io': 4, 'cpu': 3}
+    assert pipeline.busy
+    await asyncio.gather(*tasks)
+    assert peak == {'cpu': 2, 'io': 1}
+    assert pipeline.queueDepth == {'io': 0, 'cpu': 0}
+    assert not pipeline.busy
+    assert pipeline.stats['cpu'].completed == 5
+    assert pipeline.stats['io'].completed == 5
+    assert pipeline.stats['io'].totalTime >= 0.05
+    assert pipeline.stats['io'].maxTime > 0
+
+
+@pytest.mark.asyncio()
+async def test_pipeline_stage_failure() -> None:
+    pipeline = InstallPipeline(cast(Model, None))
+    with pytest.raises(ValueError):
+        async with pipeline.stage('extract', 'io'):
+            raise ValueError()
+    assert pipeline.stats['extract'].failed == 1
+    assert pipeline.stats['extract'].completed == 0
+    assert not pipeline.busy
+    pipeline.resetStats()
+    assert not pipeline.stats
+
+
+def test_pipeline_unique_staging() -> None:
+    pipeline = InstallPipeline(cast(Model, None))
+    first = pipeline.stagingPath()
+    second = pipeline.stagingPath()
+    try:
+        assert first != second
+        assert first.is_dir()
+        assert second.is_dir()
+    finally:
+        pipeline.removeStagingPath(first)
+        pipeline.removeStagingPath(second)
+    assert not first.exists()
+    assert not second.exists()
+
+
+@pytest.mark.asyncio()
+async def test_pipeline_job_directory(mockdata: Path) -> None:
+    pipeline = InstallPipeline(cast(Model, None))
+    path = mockdata.joinpath('mods/mod-with-inputs')
+    async with pipeline.job(path) as job:
+        mods = await job.read()
+        assert job.source is None
+        assert await job.getHash() == ''
+    assert [mod.filename for mod in mods] == ['modWithInputs']
+    assert pipeline.stats['detect'].completed == 1
+    mockdata.joinpath('empty').mkdir()
+    with pytest.raises(InvalidPathError):
+        async with pipeline.job(mockdata.joinpath('empty')) as job:
+            await job.read()
+
+
+@pytest.mark.asyncio()
+async def test_pipeline_job_cached_archive(mockdata: Path) -> None:
+    cache = ArchiveCache(mockdata.joinpath('cache'), keepExtracted=True)
+    extracted = mockdata.joinpath('staging/mod-with-inputs')
+    shutil.copytree(mockdata.joinpath('mods/mod-with-inputs'), extracted)
+    archive = mockdata.joinpath('mods/mod-normal.zip')
+    cache.put('a' * 32, await Mod.fromDirectory(extracted), extracted, archive)
+
+    pipeline = InstallPipeline(cast(Model, None))
+    async with pipeline.job(archive, cache=cache) as job:
+        assert job.md5hash == 'a' * 32
+        assert job.hashrequest is None
+        mods = await job.read()
+        assert [mod.filename for mod in mods] == ['modWithInputs']
+        assert job.path.is_dir()
+        # the cached files are neither extracted again nor removed while in use
+        assert 'extract' not in pipeline.stats
+        cache.clear()
+        assert 'a' * 32 in cache
+    cache.clear()
+    assert 'a' * 32 not in cache
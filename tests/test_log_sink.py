@@ -0,0 +1,43 @@
+"""
+Test cases for the log sink of the output pane
+"""
+
+from w3modmanager.ui.graphical.logsink import LogBuffer, LogLine, formatRecord
+
+from .framework import *
+
+from datetime import datetime, timezone
+
+
+def test_format_record() -> None:
+    time = datetime.now(tz=timezone.utc)
+    line = formatRecord('Installed <mod>', 'SUCCESS', time, {'name': 'modA', 'path': 'C:/mods/modA'}, False)
+    assert line is not None
+    assert line.output
+    assert '&lt;mod&gt;' in line.key
+    assert line.key in line.html
+    assert formatRecord('Detected MOD', 'DEBUG', time, {}, False) is None
+    assert formatRecord('Detected MOD', 'DEBUG', time, {}, True) is not None
+    assert formatRecord('', 'INFO', time, {}, False) == LogLine()
+
+
+def test_log_buffer_collapses_repeated_lines() -> None:
+    buffer = LogBuffer(100)
+    assert buffer.push(LogLine('1 a', 'a'))
+    assert not buffer.push(LogLine('2 a', 'a'))
+    assert not buffer.push(LogLine('3 b', 'b'))
+    lines = buffer.take()
+    assert [(line.text(), line.replace) for line in lines] == [('2 a <font color="#aaa">(2&times;)</font>', False),
+                                                               ('3 b', False)]
+    assert buffer.push(LogLine('4 b', 'b'))
+    assert [(line.count, line.replace) for line in buffer.take()] == [(2, True)]
+    assert buffer.stats.merged == 2
+    assert buffer.stats.shown == 3
+
+
+def test_log_buffer_drops_oldest_lines() -> None:
+    buffer = LogBuffer(10)
+    for index in range(25):
+        buffer.push(LogLine(str(index), str(index)))
+    assert [line.html for line in buffer.take()] == [str(index) for index in range(15, 25)]
+    assert buffer.stats.dropped == 15
@@ -0,0 +1,91 @@
+"""
+Test cases for the runtime metrics
+"""
+
+from w3modmanager.core.model import *
+from w3modmanager.ui.console.cli import *
+from w3modmanager.util.metrics import *
+
+from .framework import *
+
+import io
+import json
+
+from pathlib import Path
+
+
+def test_metrics_registry_records_values(tmp_path: Path) -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter('files', 'Files')
+    assert registry.counter('files') is counter
+    counter.inc()
+    counter.inc(2)
+    registry.gauge('mods').set(5)
+    histogram = registry.histogram('time', bounds=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+    with histogram.time():
+        pass
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'] == {'files': 3}
+    assert snapshot['gauges'] == {'mods': 5}
+    assert snapshot['histograms']['time']['count'] == 4
+    assert snapshot['histograms']['time']['max'] == 2.0
+    assert snapshot['histograms']['time']['buckets'] == {'<=0.1': 2, '<=1': 1, '+inf': 1}
+    with pytest.raises(ValueError):
+        registry.gauge('files')
+
+    registry.dump(tmp_path.joinpath('metrics.json'))
+    assert json.loads(tmp_path.joinpath('metrics.json').read_text(encoding='utf-8'))['counters'] == {'files': 3}
+    registry.reset()
+    assert registry.snapshot()['counters'] == {'files': 0}
+    assert registry.snapshot()['histograms']['time']['count'] == 0
+
+
+def test_metrics_disabled_records_nothing() -> None:
+    registry = MetricsRegistry(enabled=False)
+    registry.counter('files').inc()
+    registry.gauge('mods').set(5)
+    with registry.histogram('time').time():
+        pass
+    assert registry.snapshot() == {'counters': {'files': 0}, 'gauges': {'mods': 0}, 'histograms': {
+        'time': registry.histogram('time').snapshot()}}
+    assert registry.histogram('time').count == 0
+
+
+@pytest.mark.asyncio()
+async def test_metrics_of_model_operations(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    metrics.reset()
+    model = Model(mockdata.joinpath('programs'), mockdata.joinpath('documents'), mockdata.joinpath('cache'))
+    try:
+        await model.loadInstalled()
+        snapshot = model.metrics.snapshot()
+        assert snapshot['histograms']['hash.time']['count'] > 0
+        assert snapshot['gauges']['model.mods'] == len(model)
+        assert snapshot['histograms']['model.load.time']['count'] == 1
+        await model.flush()
+    finally:
+        model.close()
+
+
+@pytest.mark.asyncio()
+async def test_metrics_cli_output(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    stream = io.StringIO()
+    args = createParser().parse_args([
+        '-g', str(mockdata.joinpath('programs')),
+        '-s', str(mockdata.joinpath('documents')),
+        '-c', str(mockdata.joinpath('cache')),
+        '--metrics', '--metrics-file', str(mockdata.joinpath('metrics.json')),
+        'install', str(mockdata.joinpath('mods/mod-with-inputs'))
+    ])
+    assert await run(args, Output(stream)) == 0
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record['command'] for record in records] == ['install', 'metrics', 'summary']
+    assert records[1]['counters']['model.installed'] >= 1
+    assert records[1]['counters']['copy.files'] >= 1
+    dumped = json.loads(mockdata.joinpath('metrics.json').read_text(encoding='utf-8'))
+    assert dumped['enabled']
+    assert dumped['counters']['model.installed'] == records[1]['counters']['model.installed']
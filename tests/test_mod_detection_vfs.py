@@ -0,0 +1,120 @@
+"""
+Test cases for mod detection on virtual filesystems
+"""
+
+from w3modmanager.domain.mod.fetcher import *
+from w3modmanager.domain.mod.mod import *
+from w3modmanager.util.vfs import *
+
+from .framework import *
+
+
+@pytest.mark.asyncio()
+async def test_vfs_zip_normal(mockdata: Path) -> None:
+    archive = mockdata.joinpath('mods/mod-normal.zip')
+    assert archiveContainsValidMod(archive) == (True, True)
+    mods = await Mod.fromDirectory(openArchive(archive).root(), searchCommonRoot=False)
+    assert len(mods) == 1
+    mod = mods[0]
+    assert mod.package == 'normal'
+    assert mod.filename == 'modNormal'
+    assert mod.datatype == 'mod'
+    assert mod.contentFiles == ['content/blob0.bundle', 'content/metadata.store']
+
+
+@pytest.mark.asyncio()
+async def test_vfs_zip_long_name(mockdata: Path) -> None:
+    archive = mockdata.joinpath('mods/mod-with-long-name.zip')
+    mods = await Mod.fromDirectory(openArchive(archive).root(), searchCommonRoot=False)
+    assert len(mods) == 1
+    mod = mods[0]
+    assert mod.package == 'with long name'
+    assert mod.filename == 'mod000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000'  # noqa
+    assert mod.contentFiles == ['content/blob0.bundle', 'content/metadata.store']
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('name', [
+    'normal', 'mod-direct', 'mod-without-dlc', 'mod-with-dlc', 'mod-with-dlc-same-name',
+    'mod-with-inputs', 'mod-with-inputs-readme', 'mod-with-split-bins', 'only-dlc', 'valid', 'weird',
+])
+async def test_vfs_directory_parity(mockdata: Path, name: str) -> None:
+    source = mockdata.joinpath('mods').joinpath(name)
+    expected = await Mod.fromDirectory(source)
+    actual = await Mod.fromDirectory(DirectoryFilesystem(source).root())
+    assert len(actual) == len(expected)
+    for a, e in zip(actual, expected, strict=True):
+        assert a.package == e.package
+        assert a.filename == e.filename
+        assert a.datatype == e.datatype
+        assert a.size == e.size
+        assert sorted(a.contentFiles) == sorted(e.contentFiles)
+        assert sorted(a.binFiles) == sorted(e.binFiles)
+        assert sorted(a.menuFiles) == sorted(e.menuFiles)
+        assert [str(s) for s in a.settings] == [str(s) for s in e.settings]
+        assert [str(s) for s in a.inputs] == [str(s) for s in e.inputs]
+
+
+@pytest.mark.asyncio()
+async def test_vfs_memory_mod_with_settings() -> None:
+    filesystem = MemoryFilesystem('mod-memory', {
+        'modMemory/content/blob0.bundle': b'',
+        'modMemory/content/scripts/game/r4Game.ws': b'class CR4Game {}',
+        'input.settings.part.txt': b'[Exploration]\nIK_W=(Action=MoveForward)\n',
+        'input.xml': b'<UserConfig></UserConfig>',
+    })
+    root = filesystem.root()
+    assert containsValidMod(root) == (True, True)
+    assert containsScripts(root.joinpath('modMemory'))
+    mods = await Mod.fromDirectory(root)
+    assert len(mods) == 2
+    mod = mods[0]
+    assert mod.filename == 'modMemory'
+    assert mod.contentFiles == ['content/blob0.bundle']
+    assert mod.scriptFiles == ['content/scripts/game/r4Game.ws']
+    assert mod.size == len(b'class CR4Game {}')
+    mod = mods[1]
+    assert mod.datatype == 'bin'
+    assert mod.menuFiles == ['input.xml (bin/config/r4game/user_config_matrix/pc/input.xml)']
+    assert len(mod.inputs) == 1
+    assert len(mod.inputs[0]) == 1
+
+
+def test_vfs_memory_invalid() -> None:
+    filesystem = MemoryFilesystem('invalid', {
+        'docs/readme.md': b'no mod here',
+        'docs/images/preview.png': b'',
+    })
+    assert containsValidMod(filesystem.root()) == (False, True)
+
+
+def test_vfs_member_names() -> None:
+    filesystem = MemoryFilesystem('names', {
+        'a\\b\\c.txt': b'',
+        './d/../e.txt': b'',
+        '../outside.txt': b'',
+    })
+    root = filesystem.root()
+    assert root.joinpath('a/b/c.txt').is_file()
+    assert root.joinpath('e.txt').is_file()
+    assert [p.name for p in root.iterdir()] == ['a', 'e.txt']
+    assert [p.as_posix() for p in root.glob('**/*.txt')] == ['e.txt', 'a/b/c.txt']
+    assert not root.parent.is_dir()
+
+
+def test_vfs_builtin_archive_check(mockdata: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    listed: list[Path] = []
+
+    def listArchive(archive: Path) -> list[tuple[str, int, bool]]:
+        listed.append(archive)
+        return []
+
+    monkeypatch.setattr(util, 'listArchive', listArchive)
+    archive = tmp_path.joinpath('mod-normal.rar')
+    archive.write_bytes(mockdata.joinpath('mods/mod-normal.zip').read_bytes())
+    # archives that need a 7-zip listing are assumed valid without listing them
+    assert archiveContainsValidMod(archive, external=False) == (True, False)
+    assert not listed
+    assert archiveContainsValidMod(mockdata.joinpath('mods/mod-normal.zip'), external=False) == (True, True)
+    assert archiveContainsValidMod(archive) == (False, True)
+    assert listed == [archive]
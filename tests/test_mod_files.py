@@ -0,0 +1,41 @@
+"""
+Test cases for the partitioned file lists of mods
+"""
+
+from w3modmanager.domain.mod.fetcher import BinFile, ContentFile
+from w3modmanager.domain.mod.mod import Mod
+
+from .framework import *
+
+from pathlib import Path
+
+
+def test_mod_files_are_partitioned_once() -> None:
+    mod = Mod(
+        'package',
+        contents=[ContentFile(Path('content/scripts/a.ws')), ContentFile(Path('content/blob0.bundle'))],
+        files=[BinFile(Path('bin/config/a.xml'), Path('bin/config/a.xml')),
+               BinFile(Path('a.xml'), Path('bin/config/r4game/user_config_matrix/pc/a.xml'))],
+    )
+    assert mod.scriptFiles == ['content/scripts/a.ws']
+    assert mod.contentFiles == ['content/blob0.bundle']
+    assert [str(file) for file in mod.binFiles] == ['bin/config/a.xml']
+    assert [str(file.target) for file in mod.menuFiles] == ['bin/config/r4game/user_config_matrix/pc/a.xml']
+    assert mod.scriptFiles is mod.scriptFiles
+    assert 'contentFiles' not in mod.to_dict()
+
+
+def test_mod_files_follow_changed_lists() -> None:
+    mod = Mod('package', contents=[ContentFile(Path('content/scripts/a.ws'))])
+    assert len(mod.scriptFiles) == 1
+    mod.contents.append(ContentFile(Path('content/scripts/b.ws')))
+    assert len(mod.scriptFiles) == 2
+    mod.contents = [ContentFile(Path('content/blob0.bundle'))]
+    assert mod.scriptFiles == []
+    assert mod.contentFiles == ['content/blob0.bundle']
+    # files replaced in place are partitioned again as well
+    mod.contents[0] = ContentFile(Path('content/scripts/c.ws'))
+    assert mod.scriptFiles == ['content/scripts/c.ws']
+    assert mod.contentFiles == []
+    mod.contents[0] = ContentFile(Path('content/blob0.bundle'))
+    assert Mod.from_json(mod.to_json()).contentFiles == ['content/blob0.bundle']
@@ -0,0 +1,90 @@
+"""
+Test cases for the changes recorded by the model
+"""
+
+from w3modmanager.core.model import *
+
+from .framework import *
+
+from pathlib import Path
+
+
+def test_model_changes_merge() -> None:
+    first, second, third = Mod('First'), Mod('Second'), Mod('Third')
+    changes = ModelChanges()
+    changes.add(first)
+    changes.change(first, 'priority')
+    changes.change(second, 'enabled')
+    changes.remove(third)
+    assert list(changes.added.values()) == [first]
+    assert changes.changed[id(second)] == (second, frozenset({'enabled'}))
+
+    later = ModelChanges(conflicts=True)
+    later.remove(first)
+    later.change(second, 'priority')
+    later.add(third)
+    changes.merge(later)
+    # a mod added and removed again is no change, a mod removed and added again changed
+    assert not changes.added
+    assert not changes.removed
+    assert changes.changed[id(second)] == (second, frozenset({'enabled', 'priority'}))
+    assert changes.changed[id(third)] == (third, None)
+    assert changes.conflicts
+    assert changes.touches('enabled')
+    assert changes.touches('package')
+
+    changes = ModelChanges()
+    assert not changes
+    changes.change(second, 'priority')
+    assert changes.touches('priority')
+    assert not changes.touches('enabled')
+
+
+@pytest.mark.asyncio()
+async def test_model_changes_since_revision(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    model = Model(mockdata.joinpath('programs'), mockdata.joinpath('documents'), mockdata.joinpath('cache'))
+    try:
+        await model.loadInstalled()
+        loaded = model.revision
+        mod = model[('modAlreadyInstalled', 'mods')]
+        assert loaded > 0
+        assert model.changesSince(0).reset
+
+        await model.disable(mod)
+        await model.setPackage(mod, 'Package')
+        # the setters publish their changes
+        assert model.changesSince(model.revision - 1).changed == {id(mod): (mod, frozenset({'package'}))}
+        changes = model.changesSince(loaded)
+        assert model.revision > loaded
+        assert not changes.reset
+        assert not changes.added
+        assert not changes.removed
+        assert changes.changed == {id(mod): (mod, frozenset({'enabled', 'package'}))}
+        assert changes.lastUpdate
+        assert not model.changesSince(model.revision)
+
+        current = model.revision
+        await model.remove(mod)
+        model.notify()
+        changes = model.changesSince(current)
+        assert changes.removed == {id(mod): mod}
+        assert not changes.changed
+    finally:
+        model.close()
+
+
+@pytest.mark.asyncio()
+async def test_model_changes_journal_overflow(mockdata: Path) -> None:
+    linkGamePaths(mockdata)
+    model = Model(mockdata.joinpath('programs'), mockdata.joinpath('documents'), mockdata.joinpath('cache'))
+    try:
+        mod = Mod('Changed')
+        for _ in range(300):
+            changes = ModelChanges()
+            changes.change(mod, 'priority')
+            model.notify(changes)
+        assert model.changesSince(model.revision - 10).changed == {id(mod): (mod, frozenset({'priority'}))}
+        assert model.changesSince(model.revision - 299).reset
+    finally:
+        model.close()
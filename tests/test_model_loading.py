@@ -0,0 +1,50 @@
+"""
+Test cases for progressively loading the installed mods
+"""
+
+from w3modmanager.core.model import *
+
+from .framework import *
+
+import asyncio
+
+from pathlib import Path
+from shutil import copytree
+
+
+@pytest.mark.asyncio()
+async def test_model_progressive_loading(mockdata: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    linkGamePaths(mockdata)
+    mods = mockdata.joinpath('programs/mods')
+    copytree(mods.joinpath('modAlreadyInstalled'), mods.joinpath('modManaged'))
+    mods.joinpath('modManaged/.w3mm').write_text(Mod('Managed', filename='modManaged').to_json(), encoding='utf-8')
+
+    scanning = asyncio.Event()
+    fromDirectory = Mod.fromDirectory
+
+    async def blockedFromDirectory(path: Path, searchCommonRoot: bool = True, recursive: bool = True) -> list[Mod]:
+        await scanning.wait()
+        return await fromDirectory(path, searchCommonRoot, recursive)
+
+    monkeypatch.setattr(Mod, 'fromDirectory', blockedFromDirectory)
+    model = Model(mockdata.joinpath('programs'), mockdata.joinpath('documents'), mockdata.joinpath('cache'))
+    try:
+        loading = asyncio.create_task(model.loadInstalled())
+        await asyncio.sleep(0.01)
+        # the managed mod is complete and the unmanaged directories are listed as placeholders
+        assert str(model.loadingStatus) == 'loading 1/3'
+        assert not model.isPlaceholder(model[('modManaged', 'mods')])
+        assert model.isPlaceholder(model[('modAlreadyInstalled', 'mods')])
+        assert model.isPlaceholder(model[('ep1', 'dlc')])
+        assert len(model) == 3
+
+        scanning.set()
+        await loading
+        assert str(model.loadingStatus) == 'loaded'
+        assert not model.loadingStatus.loading
+        assert not model.isPlaceholder(model[('modAlreadyInstalled', 'mods')])
+        assert ('ep1', 'dlc') not in model
+        assert mods.joinpath('modAlreadyInstalled/.w3mm').is_file()
+        assert list(model.keys()).index(('modAlreadyInstalled', 'mods')) == 1
+    finally:
+        model.close()
@@ -0,0 +1,49 @@
+"""
+Test cases for the mod list model formatting
+"""
+
+from w3modmanager.domain.mod.fetcher import ContentFile
+from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.ui.graphical.modlistmodel import ModListRow, formatTooltip
+
+from .framework import *
+
+from pathlib import Path
+
+
+def test_format_tooltip_matches_full_formatting() -> None:
+    for value in ('text', 42, [], [Path('a'), Path('b')], ['x' * 3000], list(range(1000))):
+        text = str(value)
+        expected = text[:2000] + ' ...' if len(text) > 2000 else text
+        assert formatTooltip(value) == expected
+
+
+def test_format_tooltip_stops_early() -> None:
+    class Counted:
+        formatted = 0
+
+        def __repr__(self) -> str:
+            Counted.formatted += 1
+            return 'c' * 100
+
+    assert formatTooltip([Counted() for _ in range(10000)]).endswith(' ...')
+    assert Counted.formatted < 30
+
+
+def test_row_sort_keys_are_typed() -> None:
+    header = [('', 'priority'), ('', 'size'), ('', 'filename'), ('', 'scriptFiles')]
+    mods = [
+        Mod('b', filename='modB', priority=-1, size=9000),
+        Mod('a', filename='moda', priority=10, size=100,
+            contents=[ContentFile(Path('content/scripts/a.ws'), ''), ContentFile(Path('content/a.xml'), '')]),
+        Mod('c', filename='modC', priority=2, size=20000),
+    ]
+    rows = [ModListRow(mod, (0,), header) for mod in mods]
+
+    def order(column: int) -> list[str]:
+        return [row.mod.filename for row in sorted(rows, key=lambda row: row.sort[column])]
+
+    assert order(0) == ['modC', 'moda', 'modB']
+    assert order(1) == ['moda', 'modB', 'modC']
+    assert order(2) == ['moda', 'modB', 'modC']
+    assert order(3) == ['modB', 'modC', 'moda']
@@ -0,0 +1,104 @@
+"""
+Load tests for the Nexus Mods client against a local stand-in server
+"""
+
+from w3modmanager.domain.web import nexus
+from w3modmanager.domain.web.downloadqueue import DownloadItem, DownloadQueue
+from w3modmanager.domain.web.nexus import *
+
+from .fakenexus import FakeNexus
+from .framework import *
+
+import asyncio
+import time
+
+from collections.abc import AsyncGenerator
+
+import pytest_asyncio
+
+from loguru import logger
+
+
+@pytest_asyncio.fixture()
+async def server(monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[FakeNexus, None]:
+    server = FakeNexus(latency=0.001)
+    session = server.client()
+    setSession(session)
+    # the client is measured without pacing, the rate limits are enforced by the server
+    setScheduler(RequestScheduler(maxConcurrent=16, rate=100000, burst=1000, backoff=0, minRate=100000))
+    getResponseCache().setPath(None)
+    monkeypatch.setattr(nexus, 'getAPIKey', lambda: 'apikey')
+    yield server
+    await session.aclose()
+    setSession(None)
+    setScheduler(RequestScheduler())
+    getResponseCache().invalidate()
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    # the throughput is shown in the captured log of the test
+    logger.bind(name=name).info(f'{count} in {elapsed:.2f}s ({count / elapsed:.0f}/s)')
+
+
+async def resolveDownloadUrl(item: DownloadItem) -> str:
+    urls = await getModFileUrls(item.modid, item.fileid)
+    return str(urls[0]['URI'])
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize('count', [10, 100, 1000])
+async def test_details_throughput(server: FakeNexus, count: int) -> None:
+    files = [server.addMod(modid)[0] for modid in range(1, count + 1)]
+    start = time.perf_counter()
+    # selections often contain the same archive more than once
+    results = await asyncio.gather(*[getModInformation(file.md5hash) for file in files + files[:count // 2]])
+    report('details', len(results), time.perf_counter() - start)
+    assert [result[0]['mod']['mod_id'] for result in results[:count]] == [file.modid for file in files]
+    assert server.count('md5_search') == count
+    assert server.peak <= 16
+
+    # repeated requests are answered from the cache
+    await asyncio.gather(*[getModInformation(file.md5hash) for file in files])
+    assert server.count('md5_search') == count
+    assert getResponseCache().hits >= count
+
+
+@pytest.mark.asyncio()
+async def test_details_rate_limited(server: FakeNexus) -> None:
+    server.burstLimit = 50
+    files = [server.addMod(modid)[0] for modid in range(1, 101)]
+    results = await asyncio.gather(*[getModInformation(file.md5hash) for file in files])
+    assert len(results) == 100
+    assert server.limited > 0
+    assert getScheduler().retried == server.limited
+
+
+@pytest.mark.asyncio()
+async def test_details_budget_exhausted(server: FakeNexus) -> None:
+    server.hourlyLimit = 50
+    files = [server.addMod(modid)[0] for modid in range(1, 101)]
+    results = await asyncio.gather(
+        *[getModInformation(file.md5hash) for file in files], return_exceptions=True
+    )
+    assert sum(isinstance(result, list) for result in results) == 50
+    assert all(isinstance(result, RequestLimitReachedError) for result in results if not isinstance(result, list))
+    assert getScheduler().budget.exhausted
+
+
+@pytest.mark.asyncio()
+@pytest.mark.parametrize(('count', 'size'), [(10, 2 * 1024 ** 2), (100, 128 * 1024), (1000, 8 * 1024)])
+async def test_download_throughput(server: FakeNexus, mockdata: Path, count: int, size: int) -> None:
+    files = [server.addMod(modid, size)[0] for modid in range(1, count + 1)]
+    queue = DownloadQueue(mockdata.joinpath('downloads'), downloadFile, 8, resolve=resolveDownloadUrl)
+    for file in files:
+        queue.add('', file.name, modid=file.modid, fileid=file.fileid)
+    start = time.perf_counter()
+    queue.start()
+    await queue.join()
+    elapsed = time.perf_counter() - start
+    report('downloads', count, elapsed)
+    report('download bytes', count * size, elapsed)
+    assert all(item.state == 'completed' for item in queue.items)
+    assert sorted(item.md5hash for item in queue.items) == sorted(file.md5hash for file in files)
+    assert server.count('download_link') == count
+    assert server.count('cdn') == count
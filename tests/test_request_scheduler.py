@@ -0,0 +1,149 @@
+"""
+Test cases for the rate limit aware request scheduler
+"""
+
+from w3modmanager.domain.web.nexus import *
+
+from .framework import *
+
+import asyncio
+import time
+
+import httpx
+
+
+class ApiServer:
+    """Local stand-in for the api with rate limit headers and injected failures"""
+
+    def __init__(self, remaining: int = 100) -> None:
+        self.remaining = remaining
+        self.responses: list[int] = []
+        self.running = 0
+        self.peak = 0
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        status = self.responses.pop(0) if self.responses else 200
+        if status == 200:
+            self.remaining -= 1
+        return httpx.Response(status, headers={
+            'x-rl-hourly-limit': '100',
+            'x-rl-hourly-remaining': str(max(0, self.remaining)),
+            'x-rl-hourly-reset': '2099-01-01 00:00:00 +0000',
+            'x-rl-daily-limit': '2500',
+            'x-rl-daily-remaining': '0',
+            'x-rl-daily-reset': '2099-01-01T00:00:00+00:00',
+        }, json={})
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+
+
+@pytest.mark.asyncio()
+async def test_scheduler_budget() -> None:
+    server = ApiServer(3)
+    scheduler = RequestScheduler(backoff=0)
+    statuses: list[RequestStatus] = []
+    scheduler.statusCallbacks.append(statuses.append)
+    async with server.client() as client:
+        response = await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert response.status_code == 200
+        assert scheduler.budget.hourlyLimit == 100
+        assert scheduler.budget.remaining == 2
+        assert scheduler.budget.hourlyReset == 4070908800
+        assert scheduler.budget.dailyReset == 4070908800
+        await scheduler.request(client, 'GET', 'https://api/files.json')
+        await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert scheduler.budget.exhausted
+        # no further requests are sent once the allowance is used up
+        with pytest.raises(RequestLimitReachedError):
+            await scheduler.request(client, 'GET', 'https://api/files.json')
+    assert server.requests == 3
+    assert statuses[-1].queued == 0
+    assert statuses[-1].running == 0
+
+
+@pytest.mark.asyncio()
+async def test_scheduler_retries() -> None:
+    server = ApiServer()
+    server.responses = [429, 503, 200, 404]
+    scheduler = RequestScheduler(retries=2, backoff=0)
+    async with server.client() as client:
+        response = await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert response.status_code == 200
+        assert scheduler.retried == 2
+        # client errors are returned without retrying
+        response = await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert response.status_code == 404
+        server.responses = [503, 503, 503]
+        response = await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert response.status_code == 503
+    assert server.requests == 7
+
+
+@pytest.mark.asyncio()
+async def test_scheduler_transport_errors() -> None:
+    failures = 2
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        nonlocal failures
+        failures -= 1
+        if failures >= 0:
+            raise httpx.ConnectError('Connection refused')
+        return httpx.Response(200)
+
+    scheduler = RequestScheduler(retries=2, backoff=0)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handle)) as client:
+        response = await scheduler.request(client, 'GET', 'https://api/files.json')
+        assert response.status_code == 200
+        failures = 3
+        with pytest.raises(httpx.ConnectError):
+            await scheduler.request(client, 'GET', 'https://api/files.json')
+
+
+@pytest.mark.asyncio()
+async def test_scheduler_limits() -> None:
+    server = ApiServer()
+    scheduler = RequestScheduler(maxConcurrent=3, rate=200, burst=5, minRate=200)
+    async with server.client() as client:
+        start = time.monotonic()
+        await asyncio.gather(*[scheduler.request(client, 'GET', 'https://api/files.json') for _ in range(15)])
+        # the first five requests use the burst, the remaining ten are paced
+        assert time.monotonic() - start >= 10 / 200
+    assert server.requests == 15
+    assert server.peak == 3
+    assert scheduler.queued == 0
+    assert scheduler.running == 0
+
+
+def test_scheduler_rate() -> None:
+    scheduler = RequestScheduler(rate=5, minRate=0.5)
+    now = time.time()
+    # the rate is unchanged until the allowance is known
+    scheduler.updateRate()
+    assert scheduler.rate == 5
+    scheduler.budget = RequestBudget(hourlyRemaining=20, hourlyReset=now + 10, dailyRemaining=0, dailyReset=now + 100)
+    scheduler.updateRate()
+    assert 1.9 < scheduler.rate < 2.1
+    scheduler.budget.hourlyRemaining = 1000
+    scheduler.updateRate()
+    assert scheduler.rate == 5
+    scheduler.budget.hourlyRemaining = 1
+    scheduler.updateRate()
+    assert scheduler.rate == 0.5
+    # the hourly allowance is used up, the daily one is spread until its reset
+    scheduler.budget = RequestBudget(hourlyRemaining=0, hourlyReset=now + 10, dailyRemaining=300, dailyReset=now + 100)
+    scheduler.updateRate()
+    assert 2.9 < scheduler.rate < 3.1
+
+
+def test_scheduler_delay() -> None:
+    scheduler = RequestScheduler(backoff=1.0, maxDelay=10.0)
+    assert all(0 <= scheduler.getDelay(2) <= 4 for _ in range(100))
+    assert scheduler.getDelay(1, retryAfter=5) == 5
+    assert scheduler.getDelay(10) <= 10
@@ -0,0 +1,69 @@
+"""
+Test cases for the web response cache
+"""
+
+from w3modmanager.domain.web.responsecache import *
+
+from .framework import *
+
+import asyncio
+import time
+
+
+class Endpoint:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def fetch(self) -> dict[str, int]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {'calls': self.calls}
+
+    async def fail(self) -> dict[str, int]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError('Not found')
+
+
+@pytest.mark.asyncio()
+async def test_cache_ttl_and_persistence(mockdata: Path) -> None:
+    endpoint = Endpoint()
+    cache = ResponseCache(mockdata.joinpath('nexus'), {'files': 60, 'download_link': 0})
+    assert await cache.get('files', '1', endpoint.fetch) == {'calls': 1}
+    assert await cache.get('files', '1', endpoint.fetch) == {'calls': 1}
+    assert await cache.get('files', '2', endpoint.fetch) == {'calls': 2}
+    assert (cache.hits, cache.misses) == (1, 2)
+    # endpoints without a lifetime are never cached
+    assert await cache.get('download_link', '1', endpoint.fetch) == {'calls': 3}
+    assert await cache.get('download_link', '1', endpoint.fetch) == {'calls': 4}
+    # responses are written together after the write interval or when flushed
+    assert not mockdata.joinpath('nexus', 'files.json').exists()
+    cache.flush()
+    assert not mockdata.joinpath('nexus', 'download_link.json').exists()
+
+    cache = ResponseCache(mockdata.joinpath('nexus'), {'files': 60})
+    assert await cache.get('files', '1', endpoint.fetch) == {'calls': 1}
+    assert endpoint.calls == 4
+    cache.entries('files')['1'].time = time.time() - 61
+    assert await cache.get('files', '1', endpoint.fetch) == {'calls': 5}
+    cache.invalidate()
+    assert not mockdata.joinpath('nexus', 'files.json').exists()
+    assert await cache.get('files', '2', endpoint.fetch) == {'calls': 6}
+
+
+@pytest.mark.asyncio()
+async def test_cache_coalescing() -> None:
+    endpoint = Endpoint()
+    cache = ResponseCache(ttl={'md5_search': 60})
+    results = await asyncio.gather(*[cache.get('md5_search', 'a', endpoint.fetch) for _ in range(5)])
+    assert results == [{'calls': 1}] * 5
+    assert endpoint.calls == 1
+    assert (cache.misses, cache.coalesced) == (1, 4)
+
+    # errors are shared by waiting callers but not cached
+    results = await asyncio.gather(
+        *[cache.get('md5_search', 'b', endpoint.fail) for _ in range(3)], return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+    assert endpoint.calls == 2
+    assert await cache.get('md5_search', 'b', endpoint.fetch) == {'calls': 3}
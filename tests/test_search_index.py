@@ -0,0 +1,59 @@
+"""
+Test cases for the mod search index
+"""
+
+from w3modmanager.core.search import *
+
+from .framework import *
+
+
+def createMods() -> list[Mod]:
+    return [
+        Mod('Brutal Combat', filename='modBrutalCombat', category='Gameplay', version='1.2'),
+        Mod('Café Lighting', filename='modLighting', category='Visuals', summary='Warmer interiors'),
+        Mod('Combat Camera', filename='modCamera', category='Camera', version='2.0'),
+    ]
+
+
+def test_search_terms() -> None:
+    mods = createMods()
+    index = SearchIndex()
+    index.rebuild(mods)
+    assert index.search('') is None
+    assert all(index.accepts(mod) for mod in mods)
+    assert index.search('combat') == {id(mods[0]), id(mods[2])}
+    assert index.search('combat cam') == {id(mods[2])}
+    assert index.search('cafe') == {id(mods[1])}
+    assert index.search('INTERIOR') == {id(mods[1])}
+    assert index.search('g') == {id(mods[0]), id(mods[1])}
+    assert index.search('missing') == set()
+    assert not index.accepts(mods[0])
+
+
+def test_search_regular_expression() -> None:
+    mods = createMods()
+    index = SearchIndex()
+    index.rebuild(mods)
+    assert index.search('^modc') == {id(mods[2])}
+    assert index.search('1\\.2') == {id(mods[0])}
+    # invalid expressions are searched as terms
+    assert index.search('combat(') == {id(mods[0]), id(mods[2])}
+
+
+def test_search_incremental_updates() -> None:
+    mods = createMods()
+    index = SearchIndex()
+    index.rebuild(mods[:2])
+    assert not index.prepare(1)
+    assert index.prepare()
+    assert index.search('combat') == {id(mods[0])}
+    index.add(mods[2])
+    assert index.accepts(mods[2])
+    mods[2].package = 'Camera'
+    index.add(mods[2])
+    assert not index.accepts(mods[2])
+    index.remove(mods[0])
+    assert not index.accepts(mods[0])
+    assert index.search('combat') == set()
+    assert len(index) == 2
+    assert mods[0] not in index
@@ -0,0 +1,70 @@
+"""
+Test cases for tracing and profiling named operations
+"""
+
+from w3modmanager.core.model import *
+from w3modmanager.util.trace import *
+
+from .framework import *
+
+import json
+import pstats
+
+from pathlib import Path
+
+
+def test_trace_spans_export_chrome_events(tmp_path: Path) -> None:
+    tracer = Tracer(enabled=True)
+    with tracer.span('outer', path=Path('a')), tracer.span('inner'):
+        pass
+    target = tracer.export(tmp_path)
+    assert target is not None
+    events = json.loads(target.read_text(encoding='utf-8'))['traceEvents']
+    spans = [event for event in events if event['ph'] == 'X']
+    assert [span['name'] for span in spans] == ['inner', 'outer']
+    assert spans[1]['args'] == {'path': 'a'}
+    # the inner span lies within the outer span on the same track
+    assert spans[0]['tid'] == spans[1]['tid']
+    assert spans[1]['ts'] <= spans[0]['ts']
+    assert spans[0]['ts'] + spans[0]['dur'] <= spans[1]['ts'] + spans[1]['dur']
+    assert any(event['name'] == 'thread_name' for event in events if event['ph'] == 'M')
+    # exported spans are not exported again
+    assert tracer.export(tmp_path) is None
+
+
+def test_trace_disabled_records_nothing(tmp_path: Path) -> None:
+    tracer = Tracer()
+    with tracer.span('operation'):
+        pass
+    assert not tracer.events
+    assert tracer.export(tmp_path) is None
+
+
+def test_trace_profiles_chosen_operations(tmp_path: Path) -> None:
+    tracer = Tracer(profile=['profiled'])
+    with tracer.span('profiled'):
+        sum(range(1000))
+    with tracer.span('other'):
+        pass
+    assert not tracer.events
+    tracer.export(tmp_path)
+    profiles = list(tmp_path.glob('profile-*-profiled.prof'))
+    assert len(profiles) == 1
+    assert pstats.Stats(str(profiles[0])).get_stats_profile().func_profiles
+    assert not list(tmp_path.glob('profile-*-other.prof'))
+
+
+@pytest.mark.asyncio()
+async def test_trace_model_loading(mockdata: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    linkGamePaths(mockdata)
+    monkeypatch.setattr(tracer, 'enabled', True)
+    model = Model(mockdata.joinpath('programs'), mockdata.joinpath('documents'), mockdata.joinpath('cache'))
+    await model.loadInstalled()
+    model.close()
+    traces = list(mockdata.joinpath('cache/traces').glob('trace-*.json'))
+    assert len(traces) == 1
+    events = json.loads(traces[0].read_text(encoding='utf-8'))['traceEvents']
+    names = {event['name'] for event in events}
+    assert {'loadInstalled', 'fromDirectory', 'hash'} <= names
+    # calls of the traced function keep the named arguments
+    assert any(event['name'] == 'fromDirectory' and event['args']['path'] for event in events)
@@ -0,0 +1,88 @@
+"""
+Test cases for the mod update checker
+"""
+
+from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.domain.web.updates import *
+
+from .framework import *
+
+from typing import Any
+
+
+def files(*entries: tuple[int, str, str, int], updates: list[tuple[int, int]] | None = None) -> dict[str, Any]:
+    return {
+        'files': [{
+            'file_id': fileid,
+            'name': f'File {fileid}',
+            'version': version,
+            'category_name': category,
+            'uploaded_timestamp': uploaded,
+        } for fileid, version, category, uploaded in entries],
+        'file_updates': [
+            {'old_file_id': old, 'new_file_id': new} for old, new in updates or []
+        ],
+    }
+
+
+def test_newer_files_chain() -> None:
+    mod = Mod(filename='modA', modid=1, fileid=10, version='1.0')
+    response = files(
+        (10, '1.0', 'OLD_VERSION', 100),
+        (11, '1.1', 'OLD_VERSION', 200),
+        (12, '1.2', 'MAIN', 300),
+        (20, '1.0', 'OPTIONAL', 150),
+        updates=[(10, 11), (11, 12), (20, 21)],
+    )
+    assert [file.fileid for file in findNewerFiles(mod, response)] == [12]
+    mod.fileid = 12
+    assert findNewerFiles(mod, response) == []
+
+
+def test_newer_files_without_chain() -> None:
+    mod = Mod(filename='modA', modid=1, fileid=10, version='1.0')
+    response = files(
+        (10, '1.0', 'MAIN', 100),
+        (11, '1.1', 'MAIN', 200),
+        (12, '1.0', 'MAIN', 300),
+        (13, '1.2', 'OPTIONAL', 400),
+        (14, '1.3', 'ARCHIVED', 500),
+    )
+    assert [file.fileid for file in findNewerFiles(mod, response)] == [11]
+    mod.fileid = 13
+    assert findNewerFiles(mod, response) == []
+
+
+@pytest.mark.asyncio()
+async def test_update_checker(mockdata: Path) -> None:
+    requests: list[int] = []
+
+    async def getFiles(modid: int) -> dict[str, Any]:
+        requests.append(modid)
+        if modid == 3:
+            raise ValueError('Not found')
+        return files((modid * 10, '1.0', 'MAIN', 100), (modid * 10 + 1, '2.0', 'MAIN', 200))
+
+    mods = [
+        Mod(filename='modA', modid=1, fileid=10, version='1.0'),
+        Mod(filename='modB', modid=1, fileid=11, version='2.0'),
+        Mod(filename='modC', modid=2, fileid=20, version='1.0'),
+        Mod(filename='modD', modid=3, fileid=30, version='1.0'),
+        Mod(filename='modE'),
+    ]
+    checker = UpdateChecker(mockdata.joinpath('updates.json'), getFiles)
+    assert checker.due(60)
+    updates = await checker.check(mods)
+    # mods sharing a mod id share a single file listing request
+    assert sorted(requests) == [1, 2, 3]
+    assert sorted(updates) == ['modA', 'modC']
+    assert updates['modA'].newest.fileid == 11
+    assert updates['modA'].newest.version == '2.0'
+    assert not checker.due(60)
+
+    # results are kept between sessions
+    checker = UpdateChecker(mockdata.joinpath('updates.json'), getFiles)
+    assert sorted(checker.updates) == ['modA', 'modC']
+    assert checker.updates['modC'].files == updates['modC'].files
+    checker.remove('modA')
+    assert 'modA' not in UpdateChecker(mockdata.joinpath('updates.json'), getFiles)
@@ -110,8 +110,9 @@ def main(gamePath: str | None = None,
     from w3modmanager.core.errors import InvalidConfigPath, InvalidGamePath, OtherInstanceError
     from w3modmanager.core.model import Model
     from w3modmanager.domain.system.permissions import getWritePermissions, setWritePermissions
-    from w3modmanager.domain.web.nexus import closeSession
+    from w3modmanager.domain.web.nexus import closeSession, setCachePath
     from w3modmanager.ui.graphical.mainwindow import MainWindow
+    from w3modmanager.util.trace import tracer
     from w3modmanager.util.util import getRuntimePath
 
     from PySide6.QtCore import QSettings, Qt
@@ -287,13 +288,17 @@ def main(gamePath: str | None = None,
 
     exception_hook_set = False
 
+    if settings.value('traceOperations', 'False') == 'True':
+        tracer.enabled = True
+
     def createModel(ignorelock: bool = False) -> Model:
         nonlocal settings
         return Model(
             Path(str(settings.value('gamePath'))),
             Path(str(settings.value('configPath'))),
             Path(appdirs.user_data_dir(w3modmanager.NAME, w3modmanager.ORG_NAME)),
-            ignorelock)
+            ignorelock,
+            settings.value('deduplicateFiles', 'False') == 'True')
     try:
         # try to initialize the mod management model
         try:
@@ -317,6 +322,7 @@ def main(gamePath: str | None = None,
                 or not setWritePermissions(path):
                     raise PermissionError(f'Not enough permissions for {path}')
 
+        setCachePath(model.cachepath.joinpath('nexus'))
         window = MainWindow(model)
         app.setActiveWindow(window)
 
@@ -331,6 +337,8 @@ def main(gamePath: str | None = None,
         with eventloop:
             status = eventloop.run_forever()
             eventloop.run_until_complete(closeSession())
+            # writes the recorded timings if enabled
+            model.close()
             sys.exit(status)
 
     except OtherInstanceError as e:
@@ -354,10 +362,15 @@ def main(gamePath: str | None = None,
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
+    if sys.argv[1:2] == ['cli']:
+        # the headless interface never loads the graphical interface
+        from w3modmanager.ui.console.cli import main as cli
+        sys.exit(cli(sys.argv[2:]))
     argp = ArgumentParser(
         prog=w3modmanager.NAME,
         description=w3modmanager.SUBTITLE,
-        epilog=f'See {w3modmanager.URL_WEB} for the latest updates.')
+        epilog=f'Run "%(prog)s cli --help" for the headless interface. '
+        f'See {w3modmanager.URL_WEB} for the latest updates.')
     argp.add_argument(
         '-v', '--version', default=False, action='version',
         help='show the version number and exit', version=f'%(prog)s {w3modmanager.VERSION}')
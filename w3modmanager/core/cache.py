@@ -0,0 +1,277 @@
+"""Cache of detected mods and extracted archive trees, keyed by archive MD5"""
+
+from __future__ import annotations
+
+from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.util.util import removeDirectory
+from w3modmanager.util.vfs import relativePath
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dataclasses_json import DataClassJsonMixin
+from loguru import logger
+
+
+@dataclass
+class ArchiveCacheEntry(DataClassJsonMixin):
+    size: int = 0
+    accessed: float = 0.0
+    extracted: bool = False
+
+
+class ArchiveCache:
+    """
+    Size-bounded LRU cache mapping archive hashes to their detected mods and optionally their extracted files.
+    Entries are pinned while mods are installed from their files, pinned entries are neither evicted nor replaced.
+    """
+
+    def __init__(self, path: Path, maxSize: int = 4 * 1024 ** 3, keepExtracted: bool = False) -> None:
+        self.path = path
+        self.maxSize = maxSize
+        self.keepExtracted = keepExtracted
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._entries: dict[str, ArchiveCacheEntry] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._pins: dict[str, int] = {}
+        self._dirty = False
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.read()
+        # remove the leftovers of entries that were being added or removed when a session ended,
+        # recent ones can belong to another running instance
+        self._delete([
+            leftover for leftover in self.path.glob('.*')
+            if leftover.is_dir() and time.time() - leftover.stat().st_mtime > 60 * 60
+        ])
+
+    @property
+    def indexfile(self) -> Path:
+        return self.path.joinpath('index.json')
+
+    @property
+    def size(self) -> int:
+        return sum(entry.size for entry in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, md5hash: str) -> bool:
+        return md5hash in self._entries
+
+    def read(self) -> None:
+        with self._lock:
+            try:
+                index = json.loads(self.indexfile.read_text(encoding='utf-8'))
+                self._entries = {
+                    md5hash: ArchiveCacheEntry.from_dict(entry) for md5hash, entry in index['entries'].items()
+                    if self.path.joinpath(md5hash, 'mods.json').is_file()
+                }
+                self._fingerprints = {
+                    fingerprint: md5hash for fingerprint, md5hash in index['fingerprints'].items()
+                    if md5hash in self._entries
+                }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.bind(path=self.indexfile).warning(f'Could not read archive cache index: {e}')
+
+    def write(self) -> None:
+        with self._lock:
+            self._dirty = False
+            index = {
+                'entries': {md5hash: entry.to_dict() for md5hash, entry in self._entries.items()},
+                'fingerprints': self._fingerprints,
+            }
+            try:
+                self.indexfile.write_text(json.dumps(index), encoding='utf-8')
+            except OSError as e:
+                logger.bind(path=self.indexfile).warning(f'Could not write archive cache index: {e}')
+
+    def flush(self) -> None:
+        """Write the access times of the entries if they changed since the index was last written"""
+        if self._dirty:
+            self.write()
+
+    def pin(self, md5hash: str) -> None:
+        """Keep the entry and its files until it is unpinned as often as it was pinned"""
+        with self._lock:
+            self._pins[md5hash] = self._pins.get(md5hash, 0) + 1
+
+    def unpin(self, md5hash: str) -> None:
+        # entries over the size limit are evicted by the next put
+        with self._lock:
+            if self._pins.get(md5hash, 0) > 1:
+                self._pins[md5hash] -= 1
+            else:
+                self._pins.pop(md5hash, None)
+
+    def lookupHash(self, archive: Path) -> str:
+        """Get the cached hash of an unchanged archive without reading it"""
+        with self._lock:
+            try:
+                return self._fingerprints.get(archiveFingerprint(archive), '')
+            except OSError:
+                return ''
+
+    def get(self, md5hash: str) -> tuple[list[Mod], Path | None] | None:
+        """Get the cached mods of an archive and, if kept, the directory their sources are relative to"""
+        with self._lock:
+            entry = self._entries.get(md5hash)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                root = self.path.joinpath(md5hash)
+                mods = [
+                    Mod.from_dict(data, infer_missing=True)
+                    for data in json.loads(root.joinpath('mods.json').read_text(encoding='utf-8'))
+                ]
+            except Exception as e:
+                logger.bind(path=self.path.joinpath(md5hash)).warning(f'Could not read cached archive: {e}')
+                self.remove(md5hash)
+                self.misses += 1
+                return None
+            tree = root.joinpath('files')
+            if not entry.extracted or not tree.is_dir():
+                tree = None
+            for mod in mods:
+                mod.installdate = datetime.now(tz=timezone.utc)
+                # the sources are stored relative to the archive root
+                if tree and isinstance(mod.source, Path):
+                    mod.source = tree.joinpath(mod.source)
+            entry.accessed = time.time()
+            self.hits += 1
+            # access times only order the eviction, they are written with the next change or flush
+            self._dirty = True
+            return mods, tree
+
+    def put(self, md5hash: str, mods: list[Mod], extracted: Path, archive: Path | None = None) -> None:
+        """Cache the mods of an extracted archive, moving its files into the cache if enabled"""
+        data = []
+        for mod in mods:
+            serialized = mod.to_dict(encode_json=True)
+            serialized['source'] = relativePath(mod.source, extracted).as_posix()
+            data.append(serialized)
+        size = directorySize(extracted) if self.keepExtracted else 0
+        keepExtracted = self.keepExtracted and size <= self.maxSize
+        # the entry is prepared outside of the lock, moving the files is a full copy across file systems
+        staging: Path | None = None
+        try:
+            staging = Path(tempfile.mkdtemp(prefix=f'.{md5hash}-', dir=self.path))
+            staging.joinpath('mods.json').write_text(json.dumps(data), encoding='utf-8')
+            if keepExtracted:
+                shutil.move(extracted, staging.joinpath('files'))
+        except Exception as e:
+            logger.bind(path=self.path.joinpath(md5hash)).warning(f'Could not cache archive: {e}')
+            if staging:
+                self._delete([staging])
+            return
+        removed: list[Path] = []
+        tree = staging.joinpath('files') if keepExtracted else None
+        with self._lock:
+            root = self.path.joinpath(md5hash)
+            existing = self._entries.get(md5hash)
+            if existing is not None and existing.extracted:
+                # the archive was cached by another install in the meantime, its files are the same
+                removed.append(staging)
+                tree = root.joinpath('files')
+            else:
+                removed.extend(self._detach(md5hash))
+                try:
+                    os.replace(staging, root)
+                except OSError as e:
+                    # the staged files are removed with the leftovers when the cache is opened again
+                    logger.bind(path=root).warning(f'Could not cache archive: {e}')
+                else:
+                    self._entries[md5hash] = ArchiveCacheEntry(
+                        size=size if keepExtracted else 0, accessed=time.time(), extracted=keepExtracted)
+                    tree = root.joinpath('files') if keepExtracted else None
+            if archive and md5hash in self._entries:
+                self._fingerprints[archiveFingerprint(archive)] = md5hash
+            removed.extend(self._evict(keep=md5hash))
+            self.write()
+        if keepExtracted and tree:
+            # the mods are installed from the cached files from now on
+            for mod, serialized in zip(mods, data, strict=True):
+                mod.source = tree.joinpath(serialized['source'])
+        self._delete(removed)
+
+    def remove(self, md5hash: str) -> None:
+        with self._lock:
+            removed = self._detach(md5hash)
+            self.write()
+        self._delete(removed)
+
+    def evict(self, keep: str = '') -> None:
+        """Remove the least recently used entries until the cache fits its size limit"""
+        with self._lock:
+            removed = self._evict(keep)
+            self.write()
+        self._delete(removed)
+
+    def clear(self) -> None:
+        """Remove all entries that are not pinned"""
+        with self._lock:
+            removed = [path for md5hash in list(self._entries) if md5hash not in self._pins
+                       for path in self._detach(md5hash)]
+            self.write()
+        self._delete(removed)
+
+    def _evict(self, keep: str = '') -> list[Path]:
+        removed: list[Path] = []
+        with self._lock:
+            for md5hash, _ in sorted(self._entries.items(), key=lambda item: item[1].accessed):
+                if self.size <= self.maxSize:
+                    break
+                if md5hash != keep and md5hash not in self._pins:
+                    logger.bind(name=md5hash).debug('Evicting cached archive')
+                    removed.extend(self._detach(md5hash))
+        return removed
+
+    def _detach(self, md5hash: str) -> list[Path]:
+        # remove the entry and move its directory aside, the directory is deleted without holding the lock
+        with self._lock:
+            self._entries.pop(md5hash, None)
+            self._fingerprints = {
+                fingerprint: md5 for fingerprint, md5 in self._fingerprints.items() if md5 != md5hash
+            }
+            root = self.path.joinpath(md5hash)
+            if not root.exists():
+                return []
+            try:
+                trash = Path(tempfile.mkdtemp(prefix=f'.removed-{md5hash}-', dir=self.path))
+                os.replace(root, trash.joinpath(md5hash))
+            except OSError:
+                logger.bind(path=root).warning('Could not remove cached archive')
+                return []
+            return [trash]
+
+    def _delete(self, paths: list[Path]) -> None:
+        for path in paths:
+            try:
+                removeDirectory(path)
+            except Exception:
+                logger.bind(path=path).warning('Could not remove cached archive')
+
+
+def archiveFingerprint(archive: Path) -> str:
+    stat = archive.stat()
+    return f'{archive.resolve()}|{stat.st_size}|{stat.st_mtime_ns}'
+
+
+def directorySize(path: Path) -> int:
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
@@ -1,6 +1,11 @@
+from w3modmanager.util.vfs import AnyPath
+
 import os
 
-from pathlib import Path
+
+def formatErrorPath(path: AnyPath) -> str:
+    # virtual paths have no absolute representation on disk
+    return os.path.abspath(path) if isinstance(path, os.PathLike) else str(path)
 
 
 #
@@ -9,15 +14,15 @@ from pathlib import Path
 
 
 class InvalidPathError(IOError):
-    def __init__(self, path: Path, message: str = '') -> None:
-        super().__init__(f'{f"{message}: " if message else ""}{os.path.abspath(path)!s}')
+    def __init__(self, path: AnyPath, message: str = '') -> None:
+        super().__init__(f'{f"{message}: " if message else ""}{formatErrorPath(path)}')
         self.path = path
         self.message = message
 
 
 class UnexpectedInputError(IOError):
-    def __init__(self, path: Path, message: str = '') -> None:
-        super().__init__(f'{f"{message}: " if message else ""}{os.path.abspath(path)!s}')
+    def __init__(self, path: AnyPath, message: str = '') -> None:
+        super().__init__(f'{f"{message}: " if message else ""}{formatErrorPath(path)}')
         self.path = path
         self.message = message
 
@@ -28,10 +33,10 @@ class UnexpectedInputError(IOError):
 
 
 class ModelError(IOError):
-    def __init__(self, path: Path, message: str = '') -> None:
+    def __init__(self, path: AnyPath, message: str = '') -> None:
         if message:
             self.message = message
-        super().__init__(f'{self.message}: \'{os.path.abspath(path)!s}\'')
+        super().__init__(f'{self.message}: \'{formatErrorPath(path)}\'')
         self.path = path
     message = 'Model Error'
 
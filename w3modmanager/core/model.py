@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from w3modmanager.core.cache import ArchiveCache
 from w3modmanager.core.errors import (
     InvalidCachePath,
     InvalidConfigPath,
@@ -12,31 +13,47 @@ from w3modmanager.core.errors import (
     ModNotFoundError,
     OtherInstanceError,
 )
+from w3modmanager.core.store import ContentStore
 from w3modmanager.domain.bin.modifier import (
     addSettings,
     removeSettings,
 )
 from w3modmanager.domain.bin.watcher import CallbackList, WatchedConfigFile
-from w3modmanager.domain.mod.fetcher import BundledFile, ContentFile
+from w3modmanager.domain.mod.fetcher import BundledFile, ContentFile, formatPackageName
 from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.util.metrics import MetricsRegistry, metrics
+from w3modmanager.util.trace import traced, tracer
 from w3modmanager.util.util import debounce, removeDirectory
+from w3modmanager.util.vfs import VirtualPath
 
 import asyncio
 import contextlib
 import re
 
-from collections.abc import Iterator, KeysView, ValuesView
+from collections import deque
+from collections.abc import Callable, Iterator, KeysView, ValuesView
 from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from functools import partial
 from pathlib import Path
 from shutil import copyfile
+from typing import Any
 
 from fasteners import InterProcessLock
 from loguru import logger
 
 
+_listedMods = metrics.gauge('model.mods', 'Listed mods and DLCs')
+_loadTime = metrics.histogram('model.load.time', 'Seconds to load the installed mods')
+_installedMods = metrics.counter('model.installed', 'Mods installed')
+_copiedFiles = metrics.counter('copy.files', 'Files copied or linked into the game directory')
+_installedBytes = metrics.counter('model.installed.bytes', 'Bytes of installed mods')
+_copyTime = metrics.histogram('copy.time', 'Seconds per batch of copied files')
+_conflictUpdates = metrics.counter('conflicts.updates', 'Conflict recomputations')
+_conflictTime = metrics.histogram('conflicts.time', 'Seconds per conflict recomputation')
+
+
 ModelIndexType = Mod | tuple[str, str] | int
 '''The type for indexing the model - options are mod, (modname, target) tuple, or index'''
 
@@ -75,10 +92,78 @@ class ModelConflicts:
         )
 
 
+@dataclass
+class ModelLoadingStatus:
+    loaded: int = 0
+    total: int = 0
+
+    @property
+    def loading(self) -> bool:
+        return self.loaded < self.total
+
+    def __str__(self) -> str:
+        return f'loading {self.loaded}/{self.total}' if self.loading else 'loaded'
+
+
+@dataclass
+class ModelChanges:
+    """Mods added, removed and changed between revisions of the model, keyed by mod identity"""
+    added: dict[int, Mod] = field(default_factory=dict)
+    removed: dict[int, Mod] = field(default_factory=dict)
+    changed: dict[int, tuple[Mod, frozenset[str] | None]] = field(default_factory=dict)
+    conflicts: bool = False
+    lastUpdate: bool = False
+    reset: bool = False
+
+    def add(self, mod: Mod) -> None:
+        if self.removed.pop(id(mod), None) is not None:
+            # the same mod was listed again, possibly at another position
+            self.change(mod)
+        else:
+            self.added[id(mod)] = mod
+
+    def remove(self, mod: Mod) -> None:
+        self.changed.pop(id(mod), None)
+        if self.added.pop(id(mod), None) is None:
+            self.removed[id(mod)] = mod
+
+    def change(self, mod: Mod, *fields: str) -> None:
+        """Record changed fields of a mod, without fields any field may have changed"""
+        if id(mod) in self.added:
+            return
+        previous = self.changed.get(id(mod))
+        if previous is not None and (previous[1] is None or not fields):
+            self.changed[id(mod)] = (mod, None)
+        else:
+            self.changed[id(mod)] = (mod, frozenset(fields).union((previous[1] or ()) if previous else ()) or None)
+
+    def merge(self, other: ModelChanges) -> None:
+        """Add changes that happened after these changes"""
+        for mod in other.removed.values():
+            self.remove(mod)
+        for mod in other.added.values():
+            self.add(mod)
+        for mod, fields in other.changed.values():
+            self.change(mod, *(fields or ()))
+        self.conflicts |= other.conflicts
+        self.lastUpdate |= other.lastUpdate
+        self.reset |= other.reset
+
+    def touches(self, name: str) -> bool:
+        """Whether the field could have changed for any mod, including added and removed mods"""
+        return self.reset or bool(self.added) or bool(self.removed) or any(
+            fields is None or name in fields for _, fields in self.changed.values())
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed or self.conflicts or self.lastUpdate or self.reset)
+
+
 class Model:
     """The mod management model"""
 
-    def __init__(self, gamePath: Path, configPath: Path, cachePath: Path, ignorelock: bool = False) -> None:
+    def __init__(
+        self, gamePath: Path, configPath: Path, cachePath: Path, ignorelock: bool = False, deduplicate: bool = False
+    ) -> None:
         self._gamePath: Path = Path()
         self._configPath: Path = Path()
         self._cachePath: Path = Path()
@@ -87,20 +172,30 @@ class Model:
 
         self._modList: dict[tuple[str, str], Mod] = {}
         self._lock = None
-        self._pool = None
+        self._pool: ProcessPoolExecutor | None = None
 
         _cachePath = verifyCachePath(cachePath)
         if not _cachePath:
             raise InvalidCachePath(cachePath)
         self._cachePath = _cachePath
 
+        # changes are recorded until the listeners are notified, listeners ask for the changes since the
+        # revision they have seen last
+        self.revision = 0
+        self._changes = ModelChanges()
+        self._journal: deque[tuple[int, ModelChanges]] = deque(maxlen=256)
+
         self.setPaths(gamePath, configPath)
 
         self.updateCallbacks = CallbackList()
         self.updateLock = asyncio.Lock()
 
         self.conflicts = ModelConflicts()
-        self._pool = ProcessPoolExecutor()
+        self.loadingStatus = ModelLoadingStatus()
+        self._placeholders: dict[Path, Mod] = {}
+        self.archiveCache = ArchiveCache(self.cachepath.joinpath('archives'))
+        self.contentStore = ContentStore(self.cachepath.joinpath('store'))
+        self.deduplicate = deduplicate
         self._iteration = 0
 
         self._lock = InterProcessLock(self.lockfile)
@@ -155,18 +250,21 @@ class Model:
         self.lastInitialization = datetime.now(tz=timezone.utc)
 
         self._modList = {}
+        self._changes.reset = True
 
 
     @debounce(25)
     async def updateBundledContentsConflicts(self) -> None:
         self._iteration += 1
-        conflicts = await asyncio.get_running_loop().run_in_executor(
-            self._pool,
-            partial(ModelConflicts.fromModList, self._modList, self._iteration)
-        )
+        with tracer.span('updateConflicts', mods=len(self._modList)), _conflictTime.time():
+            conflicts = await asyncio.get_running_loop().run_in_executor(
+                self.pool,
+                partial(ModelConflicts.fromModList, self._modList, self._iteration)
+            )
+        _conflictUpdates.inc()
         if conflicts.iteration == self._iteration:
             self.conflicts = conflicts
-            self.updateCallbacks.fire(self)
+            self.notify(ModelChanges(conflicts=True))
 
 
     async def loadInstalledMod(self, path: Path) -> None:
@@ -186,13 +284,14 @@ class Model:
                 if (mod.filename, mod.target) in self._modList:
                     logger.bind(path=path).error('Ignoring duplicate MOD')
                     if not self._modList[(mod.filename, mod.target)].enabled:
-                        self._modList[(mod.filename, mod.target)] = mod
+                        self._setMod(mod)
                 else:
-                    self._modList[(mod.filename, mod.target)] = mod
+                    self._setMod(mod)
                 # TODO: incomplete: detect changed files
             except Exception as e:
                 logger.bind(path=path).exception(f'Could not load MOD: {e}')
         else:
+            placeholder = self._placeholders.get(path)
             try:
                 for mod in await Mod.fromDirectory(path, recursive=False):
                     mod.installdate = datetime.fromtimestamp(path.stat().st_ctime, tz=timezone.utc)
@@ -207,15 +306,18 @@ class Model:
                         enabled = self._modsSettings.getValue(mod.filename, 'Enabled', '1')
                         if enabled == '0':
                             mod.enabled = False
-                    if (mod.filename, mod.target) in self._modList:
+                    existing = self._modList.get((mod.filename, mod.target))
+                    if existing is not None and existing is not placeholder:
                         logger.bind(path=path).error('Ignoring duplicate MOD')
-                        if not self._modList[(mod.filename, mod.target)].enabled:
-                            self._modList[(mod.filename, mod.target)] = mod
+                        if not existing.enabled:
+                            self._setMod(mod)
                     else:
-                        self._modList[(mod.filename, mod.target)] = mod
+                        self._setMod(mod)
                         await self.update(mod)
             except InvalidPathError:
                 logger.bind(path=path).debug('Invalid MOD')
+            finally:
+                self.removePlaceholder(path)
 
     async def loadInstalledDlc(self, path: Path) -> None:
         if path.joinpath('.w3mm').is_file():
@@ -225,7 +327,7 @@ class Model:
                                       for file in path.glob('**/*') if file.is_file()
                                       and file.name != '.w3mm')
                 mod.filename = path.name
-                self._modList[(mod.filename, mod.target)] = mod
+                self._setMod(mod)
             except Exception as e:
                 logger.bind(path=path).exception(f'Could not load DLC: {e}')
         else:
@@ -238,20 +340,72 @@ class Model:
                                           for file in path.glob('**/*') if file.is_file()
                                           and file.name != '.w3mm')
                     mod.filename = path.name
-                    self._modList[(mod.filename, mod.target)] = mod
+                    self._setMod(mod)
                     await self.update(mod)
             except InvalidPathError:
                 logger.bind(path=path).debug('Invalid DLC')
+            finally:
+                self.removePlaceholder(path)
 
+    @traced('loadInstalled')
     async def loadInstalled(self) -> None:
-        await asyncio.gather(
-            *[self.loadInstalledMod(path) for path in self.modspath.iterdir()]
-        )
-        await asyncio.gather(
-            *[self.loadInstalledDlc(path) for path in self.dlcspath.iterdir()]
-        )
+        with _loadTime.time():
+            await self._loadInstalled()
+
+    async def _loadInstalled(self) -> None:
+        paths = [
+            *((path, 'mods') for path in self.modspath.iterdir()),
+            *((path, 'dlc') for path in self.dlcspath.iterdir()),
+        ]
+        self.loadingStatus = ModelLoadingStatus(0, len(paths))
+        # mods with a manifest are listed right away, unmanaged directories are listed as placeholders
+        # until their contents are scanned in the background
+        scans: list[tuple[Path, str]] = []
+        for path, target in paths:
+            if path.joinpath('.w3mm').is_file():
+                await (self.loadInstalledMod(path) if target == 'mods' else self.loadInstalledDlc(path))
+                self.loadingStatus.loaded += 1
+            else:
+                scans.append((path, target))
+        for path, target in scans:
+            self.addPlaceholder(path, target)
         self.updateBundledContentsConflicts()
-        self.updateCallbacks.fire(self)
+        self.notify()
+
+        async def scan(path: Path, target: str) -> None:
+            try:
+                await (self.loadInstalledMod(path) if target == 'mods' else self.loadInstalledDlc(path))
+            finally:
+                self.loadingStatus.loaded += 1
+                self.updateBundledContentsConflicts()
+                self.notify()
+
+        await asyncio.gather(*[scan(path, target) for path, target in scans])
+
+    def addPlaceholder(self, path: Path, target: str) -> None:
+        filename = path.name if target == 'dlc' else re.sub(r'^(~)', r'', path.name)
+        if (filename, target) in self._modList:
+            return
+        placeholder = Mod(
+            formatPackageName(path.name),
+            filename=filename,
+            datatype='dlc' if target == 'dlc' else 'mod',
+            target=target,
+            priority=-2 if target == 'dlc' else -1,
+            enabled=target == 'dlc' or not path.name.startswith('~'),
+            source=path,
+        )
+        self._placeholders[path] = placeholder
+        self._setMod(placeholder)
+
+    def removePlaceholder(self, path: Path) -> None:
+        placeholder = self._placeholders.pop(path, None)
+        if placeholder is not None and self._modList.get((placeholder.filename, placeholder.target)) is placeholder:
+            self._deleteMod((placeholder.filename, placeholder.target))
+
+    def isPlaceholder(self, mod: Mod) -> bool:
+        """Whether the mod is listed while its directory is still being scanned"""
+        return isinstance(mod.source, Path) and self._placeholders.get(mod.source) is mod
 
 
     def get(self, mod: ModelIndexType) -> Mod:
@@ -266,9 +420,25 @@ class Model:
     def data(self) -> dict[tuple[str, str], Mod]:
         return self._modList
 
+    def _setMod(self, mod: Mod, key: tuple[str, str] | None = None) -> None:
+        key = key or (mod.filename, mod.target)
+        previous = self._modList.get(key)
+        if previous is not None:
+            self._changes.remove(previous)
+        self._modList[key] = mod
+        self._changes.add(mod)
+
+    def _deleteMod(self, key: tuple[str, str]) -> None:
+        self._changes.remove(self._modList.pop(key))
+
 
     async def add(self, mod: Mod) -> None:
         # TODO: incomplete: always override compilation trigger mod
+        if isinstance(mod.source, VirtualPath):
+            realpath = mod.source.realpath()
+            if realpath is None:
+                raise InvalidSourcePath(mod.source, 'Invalid mod source: Mods have to be extracted before installing')
+            mod.source = realpath
         if self.modspath in [mod.source, *mod.source.parents]:
             raise InvalidSourcePath(mod.source, 'Invalid mod source: Mods cannot be installed from the mods directory')
         async with self.updateLock:
@@ -280,8 +450,10 @@ class Model:
                 raise ModExistsError(mod.filename, mod.target)
             settings = 0
             inputs = 0
+            stored: list[str] = []
+            # hardlink identical files from the content store instead of copying them if enabled
+            install = self.contentStore.link if self.deduplicate else copyfile
             try:
-                event_loop = asyncio.get_running_loop()
                 target.mkdir(parents=True)
                 # copy mod files
                 copies = list[tuple[Path, Path]]()
@@ -291,11 +463,7 @@ class Model:
                     targetFile = target.joinpath(_file.source)
                     targetFile.parent.mkdir(parents=True, exist_ok=True)
                     copies.append((sourceFile, targetFile))
-                await asyncio.gather(*[
-                    event_loop.run_in_executor(
-                        None,
-                        partial(copyfile, _copy[0], _copy[1])) for _copy in copies
-                ])
+                await self.installFiles(install, copies, stored)
                 copies = list[tuple[Path, Path]]()
                 logger.bind(name=mod.filename, path=target).debug('Copying content files')
                 for _content in mod.contents:
@@ -303,11 +471,9 @@ class Model:
                     targetFile = target.joinpath(_content.source)
                     targetFile.parent.mkdir(parents=True, exist_ok=True)
                     copies.append((sourceFile, targetFile))
-                await asyncio.gather(*[
-                    event_loop.run_in_executor(
-                        None,
-                        partial(copyfile, _copy[0], _copy[1])) for _copy in copies
-                ])
+                await self.installFiles(install, copies, stored)
+                if self.deduplicate:
+                    self.contentStore.writeRecord(target, stored)
                 mod.installed = True
                 # update settings
                 logger.bind(name=mod.filename, path=target).debug('Updating settings')
@@ -317,19 +483,46 @@ class Model:
                 await self.update(mod)
             except Exception as e:
                 removeDirectory(target)
+                if stored:
+                    self.contentStore.release(stored)
+                    self.contentStore.write()
                 if settings:
                     removeSettings(mod.settings, self.configpath.joinpath('user.settings'))
                 if inputs:
                     removeSettings(mod.inputs, self.configpath.joinpath('input.settings'))
                 self._modsSettings.removeSection(mod.filename)
                 raise e
-            self._modList[(mod.filename, mod.target)] = mod
+            self._setMod(mod)
+            _installedMods.inc()
+            _installedBytes.inc(mod.size)
+            if stored:
+                self.contentStore.write()
+                logger.bind(name=mod.filename).debug(
+                    f'Deduplicated files, {self.contentStore.bytesSaved} bytes saved in total')
         self._modsSettings.write()
         self.updateBundledContentsConflicts()
         self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
-    async def update(self, mod: Mod) -> None:
-        # serialize and store mod structure
+    async def installFiles(
+        self, install: Callable[[Path, Path], Any], copies: list[tuple[Path, Path]], stored: list[str]
+    ) -> None:
+        event_loop = asyncio.get_running_loop()
+        with tracer.span('copy', files=len(copies)), _copyTime.time():
+            results = await asyncio.gather(*[
+                event_loop.run_in_executor(
+                    None,
+                    partial(install, _copy[0], _copy[1])) for _copy in copies
+            ], return_exceptions=True)
+        # remember stored files even if some copies failed so they can be released again
+        stored.extend(result for result in results if isinstance(result, str) and result)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        _copiedFiles.inc(len(copies))
+
+    async def update(self, mod: Mod, *fields: str) -> None:
+        """Store the mod structure and record the changed fields, all fields if none are given"""
+        self._changes.change(mod, *fields)
         target = self.getModPath(mod, True)
         try:
             with target.joinpath('.w3mm').open('w', encoding='utf-8') as modInfoFile:
@@ -341,7 +534,7 @@ class Model:
     async def replace(self, filename: str, target: str, mod: Mod) -> None:
         # TODO: incomplete: handle possible conflict with existing mods
         async with self.updateLock:
-            self._modList[(filename, target)] = mod
+            self._setMod(mod, (filename, target))
         self.updateBundledContentsConflicts()
         self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
@@ -350,7 +543,11 @@ class Model:
             async with self.updateLock:
                 mod = self[mod]
                 target = self.getModPath(mod, True)
+                stored = self.contentStore.readRecord(target)
                 removeDirectory(target)
+                if stored:
+                    self.contentStore.release(stored)
+                    self.contentStore.write()
                 try:
                     removeSettings(mod.settings, self.configpath.joinpath('user.settings'))
                 except Exception as e:
@@ -360,7 +557,7 @@ class Model:
                 except Exception as e:
                     logger.bind(name=mod.filename).warning(f'Could not remove settings from input.settings: {e}')
                 self._modsSettings.removeSection(mod.filename)
-                del self._modList[(mod.filename, mod.target)]
+                self._deleteMod((mod.filename, mod.target))
             self._modsSettings.write()
             self.updateBundledContentsConflicts()
             self.setLastUpdateTime(datetime.now(tz=timezone.utc))
@@ -390,7 +587,7 @@ class Model:
                             renames.append(renamed)
                 settings = addSettings(mod.settings, self.configpath.joinpath('user.settings'))
                 inputs = addSettings(mod.inputs, self.configpath.joinpath('input.settings'))
-                await self.update(mod)
+                await self.update(mod, 'enabled')
             except PermissionError:
                 logger.bind(path=oldpath).exception(
                     'Could not enable mod, invalid permissions. Is it open in the explorer?')
@@ -446,7 +643,7 @@ class Model:
                             renames.append(renamed)
                 settings = removeSettings(mod.settings, self.configpath.joinpath('user.settings'))
                 inputs = removeSettings(mod.inputs, self.configpath.joinpath('input.settings'))
-                await self.update(mod)
+                await self.update(mod, 'enabled')
             except PermissionError:
                 logger.bind(path=oldpath).exception(
                     'Could not disable mod, invalid permissions. Is it open in the explorer?')
@@ -494,7 +691,7 @@ class Model:
                     oldpath.rename(newpath)
                     renamed = True
                 self._modsSettings.renameSection(oldname, filename)
-                await self.update(mod)
+                await self.update(mod, 'filename', 'enabled')
             except PermissionError:
                 logger.bind(path=oldpath).exception(
                     'Could not rename mod, invalid permissions. Is it open in the explorer?')
@@ -510,21 +707,21 @@ class Model:
                 self._modsSettings.renameSection(filename, oldname)
         self.writeModsSettings()
         self.updateBundledContentsConflicts()
-        self.setLastUpdateTime(datetime.now(tz=timezone.utc), False)
+        self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
     async def setPackage(self, mod: ModelIndexType, package: str) -> None:
         async with self.updateLock:
             mod = self[mod]
             mod.package = package
-            await self.update(mod)
-        self.setLastUpdateTime(datetime.now(tz=timezone.utc), False)
+            await self.update(mod, 'package')
+        self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
     async def setCategory(self, mod: ModelIndexType, category: str) -> None:
         async with self.updateLock:
             mod = self[mod]
             mod.category = category
-            await self.update(mod)
-        self.setLastUpdateTime(datetime.now(tz=timezone.utc), False)
+            await self.update(mod, 'category')
+        self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
     async def setPriority(self, mod: ModelIndexType, priority: int) -> None:
         async with self.updateLock:
@@ -532,10 +729,10 @@ class Model:
             mod.priority = priority
             if mod.target == 'mods':
                 self._modsSettings.setValue(mod.filename, 'Priority', str(priority) if priority >= 0 else '')
-            await self.update(mod)
+            await self.update(mod, 'priority')
         self._modsSettings.write()
         self.updateBundledContentsConflicts()
-        self.setLastUpdateTime(datetime.now(tz=timezone.utc), False)
+        self.setLastUpdateTime(datetime.now(tz=timezone.utc))
 
 
     def readModsSettings(self) -> None:
@@ -549,6 +746,7 @@ class Model:
             mod.enabled = enabled == '1'
             with contextlib.suppress(ValueError):
                 mod.priority = int(priority)
+            self._changes.change(mod, 'enabled', 'priority')
 
         self.updateBundledContentsConflicts()
         self.setLastUpdateTime(datetime.now(tz=timezone.utc))
@@ -564,8 +762,31 @@ class Model:
 
     def setLastUpdateTime(self, time: datetime, fireUpdateCallbacks: bool = True) -> None:
         self.lastUpdate = time
+        self._changes.lastUpdate = True
         if fireUpdateCallbacks:
-            self.updateCallbacks.fire(self)
+            self.notify()
+
+    def notify(self, changes: ModelChanges | None = None) -> None:
+        """Publish the recorded changes as a new revision and notify the update listeners"""
+        if changes is not None:
+            self._changes.merge(changes)
+        if self._changes:
+            self.revision += 1
+            self._journal.append((self.revision, self._changes))
+            self._changes = ModelChanges()
+        _listedMods.set(len(self._modList))
+        self.updateCallbacks.fire(self)
+
+    def changesSince(self, revision: int) -> ModelChanges:
+        """Get the published changes after a revision, as a reset if they are no longer known"""
+        changes = ModelChanges()
+        if revision < self.revision - len(self._journal):
+            changes.reset = True
+            return changes
+        for entry, recorded in self._journal:
+            if entry > revision:
+                changes.merge(recorded)
+        return changes
 
 
     def getModPath(self, mod: ModelIndexType, resolve: bool = False) -> Path:
@@ -610,11 +831,38 @@ class Model:
     def __iter__(self) -> Iterator[tuple[str, str]]:
         yield from self._modList
 
-    def __del__(self) -> None:
+    async def flush(self) -> None:
+        """Write pending settings changes, skipping deferred conflict updates"""
+        self.updateBundledContentsConflicts.cancel()
+        await self._modsSettings.write.flush()
+
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """The runtime metrics of the process, updated by the model and the operations it runs"""
+        return metrics
+
+    def close(self) -> None:
         if self._lock is not None and self._lock.acquired:
+            # only the instance holding the lock writes the cache index
+            self.archiveCache.flush()
             self._lock.release()
         if self._pool is not None:
             self._pool.shutdown(wait=False)
+        # the model is closed before it is fully initialized if another instance holds the lock
+        with contextlib.suppress(AttributeError):
+            self._modsSettings.watcher.stop()
+        if tracer.enabled or tracer.profile:
+            tracer.export(self.cachepath.joinpath('traces'))
+
+    def __del__(self) -> None:
+        self.close()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        # worker processes are only needed once conflicts are computed
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor()
+        return self._pool
 
     @property
     def lockfile(self) -> Path:
@@ -0,0 +1,240 @@
+"""Staged scheduling of mod installations"""
+
+from __future__ import annotations
+
+from w3modmanager.core.cache import ArchiveCache
+from w3modmanager.core.errors import InvalidPathError
+from w3modmanager.core.model import Model
+from w3modmanager.domain.mod.fetcher import archiveContainsValidMod, containsValidMod
+from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.util.util import extractMod, getMD5Hash, removeDirectory
+
+import asyncio
+import os
+import tempfile
+import time
+
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Literal
+
+from loguru import logger
+
+
+StageKind = Literal['cpu', 'io', 'net']
+'''The resource a pipeline stage is bound by - each kind has its own concurrency limit'''
+
+
+@dataclass
+class StageStats:
+    kind: StageKind
+    queued: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    totalTime: float = 0.0
+    maxTime: float = 0.0
+
+    @property
+    def averageTime(self) -> float:
+        finished = self.completed + self.failed
+        return self.totalTime / finished if finished else 0.0
+
+
+class InstallPipeline:
+    """Runs the stages of concurrent mod installations with separate limits for cpu, disk and network work"""
+
+    def __init__(self, model: Model, cpuLimit: int = 0, ioLimit: int = 2, netLimit: int = 4) -> None:
+        self.model = model
+        self.limits: dict[StageKind, int] = {
+            'cpu': cpuLimit if cpuLimit > 0 else max(1, (os.cpu_count() or 1) - 1),
+            'io': max(1, ioLimit),
+            'net': max(1, netLimit),
+        }
+        self._semaphores: dict[StageKind, asyncio.Semaphore] = {
+            kind: asyncio.Semaphore(limit) for kind, limit in self.limits.items()
+        }
+        self.stats: dict[str, StageStats] = {}
+
+    @asynccontextmanager
+    async def stage(self, name: str, kind: StageKind) -> AsyncGenerator[None, None]:
+        """Wait for a free slot of the given kind and record the stage timing"""
+        stats = self.stats.setdefault(name, StageStats(kind))
+        stats.queued += 1
+        try:
+            await self._semaphores[kind].acquire()
+        finally:
+            stats.queued -= 1
+        stats.running += 1
+        start = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            elapsed = time.perf_counter() - start
+            self._semaphores[kind].release()
+            stats.running -= 1
+            stats.totalTime += elapsed
+            stats.maxTime = max(stats.maxTime, elapsed)
+            if failed:
+                stats.failed += 1
+            else:
+                stats.completed += 1
+
+    @property
+    def queueDepth(self) -> dict[str, int]:
+        return {name: stats.queued for name, stats in self.stats.items()}
+
+    @property
+    def busy(self) -> bool:
+        return any(stats.queued or stats.running for stats in self.stats.values())
+
+    def summary(self) -> str:
+        return ', '.join(
+            f'{name}: {stats.completed + stats.failed} in {stats.totalTime:.2f}s'
+            f' (avg {stats.averageTime:.2f}s, max {stats.maxTime:.2f}s, {stats.queued} queued)'
+            for name, stats in self.stats.items()
+        )
+
+    def resetStats(self) -> None:
+        self.stats = {
+            name: StageStats(stats.kind) for name, stats in self.stats.items() if stats.queued or stats.running
+        }
+
+    def stagingPath(self) -> Path:
+        """Create a unique staging directory for a single install"""
+        cache = Path(tempfile.gettempdir()).joinpath('w3modmanager/cache')
+        cache.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix='install-', dir=cache))
+
+    def removeStagingPath(self, path: Path) -> None:
+        try:
+            removeDirectory(path)
+        except Exception:
+            logger.bind(path=path).warning('Could not remove temporary directory')
+
+    async def hashArchive(self, archive: Path) -> str:
+        async with self.stage('hash', 'cpu'):
+            return await asyncio.get_running_loop().run_in_executor(None, partial(getMD5Hash, archive))
+
+    async def extract(self, archive: Path, staging: Path) -> Path:
+        # keep the archive stem as the directory name, it is used as the package name
+        async with self.stage('extract', 'io'):
+            return await extractMod(archive, staging.joinpath(f'.{archive.stem}'))
+
+    async def validate(self, path: Path, searchlimit: int = 0) -> tuple[bool, bool]:
+        async with self.stage('validate', 'cpu'):
+            return await asyncio.get_running_loop().run_in_executor(
+                None, partial(containsValidMod, path, searchlimit=searchlimit))
+
+    async def detect(self, path: Path, searchCommonRoot: bool = True) -> list[Mod]:
+        async with self.stage('detect', 'cpu'):
+            return await Mod.fromDirectory(path, searchCommonRoot=searchCommonRoot)
+
+    async def add(self, mod: Mod) -> None:
+        async with self.stage('copy', 'io'):
+            await self.model.add(mod)
+
+    def job(self, path: Path, md5hash: str = '', cache: ArchiveCache | None = None) -> InstallJob:
+        """Prepare the install of a directory or archive, to be used as an async context manager"""
+        return InstallJob(self, path, md5hash, cache)
+
+
+class InstallJob:
+    """Reads the mods of a directory or archive through the pipeline, reusing and filling the archive cache"""
+
+    def __init__(
+        self, pipeline: InstallPipeline, path: Path, md5hash: str = '', cache: ArchiveCache | None = None
+    ) -> None:
+        self.pipeline = pipeline
+        self.cache = cache
+        self.path = path
+        '''The directory the mods are read from, the extracted files for archives'''
+        self.source = path if path.is_file() else None
+        '''The archive being installed, if any'''
+        self.md5hash = md5hash
+        self.hashrequest: asyncio.Task[str] | None = None
+        self._staging: Path | None = None
+        self._pinned = ''
+
+    async def __aenter__(self) -> InstallJob:
+        if self.source:
+            # the hash is computed alongside listing and extraction unless it is already known
+            if not self.md5hash and self.cache is not None:
+                self.md5hash = self.cache.lookupHash(self.source)
+            if self.md5hash:
+                self.pin(self.md5hash)
+            else:
+                self.hashrequest = asyncio.create_task(self.pipeline.hashArchive(self.source))
+        return self
+
+    async def __aexit__(
+        self, exctype: type[BaseException] | None, value: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        if self.hashrequest and not self.hashrequest.done():
+            self.hashrequest.cancel()
+        if self.cache is not None and self._pinned:
+            self.cache.unpin(self._pinned)
+            self._pinned = ''
+        if self._staging:
+            self.pipeline.removeStagingPath(self._staging)
+            self._staging = None
+
+    def pin(self, md5hash: str) -> None:
+        # keep the cached files until the mods are installed from them
+        if self.cache is not None and not self._pinned:
+            self.cache.pin(md5hash)
+            self._pinned = md5hash
+
+    async def getHash(self) -> str:
+        if self.hashrequest:
+            self.md5hash = await self.hashrequest
+        return self.md5hash
+
+    async def read(self, searchlimit: int = 8, searchFurther: Callable[[], bool] | None = None) -> list[Mod]:
+        """Return the mods of the directory or archive, searching past the limit if confirmed by the callback"""
+        mods: list[Mod] | None = None
+        if self.source:
+            cached = self.cache.get(self.md5hash) if self.cache is not None and self.md5hash else None
+            if cached and cached[1]:
+                # reuse the cached files and mods, skipping extraction and detection
+                logger.bind(path=str(self.source), dots=True).debug('Using cached archive')
+                mods, self.path = cached[0], cached[1]
+            else:
+                if not cached:
+                    # reject archives without a mod before unpacking them
+                    async with self.pipeline.stage('list', 'io'):
+                        valid, exhausted = await asyncio.get_running_loop().run_in_executor(
+                            None, partial(archiveContainsValidMod, self.source, 8))
+                    if not valid and exhausted:
+                        raise InvalidPathError(self.source, 'Invalid mod')
+                logger.bind(path=str(self.source), dots=True).debug('Unpacking archive')
+                self._staging = self.pipeline.stagingPath()
+                self.path = await self.pipeline.extract(self.source, self._staging)
+                if cached:
+                    # reuse the cached mods, skipping detection
+                    mods = cached[0]
+                    for mod in mods:
+                        if isinstance(mod.source, Path):
+                            mod.source = self.path.joinpath(mod.source)
+
+        if mods is None:
+            valid, exhausted = await self.pipeline.validate(self.path, searchlimit=searchlimit)
+            if not valid and not exhausted and searchFurther and searchFurther():
+                valid, exhausted = await self.pipeline.validate(self.path)
+            if not valid:
+                raise InvalidPathError(self.path, 'Invalid mod' if exhausted else 'Stopped searching for mod')
+            mods = await self.pipeline.detect(self.path, searchCommonRoot=not self.source)
+
+            md5hash = await self.getHash()
+            if self.cache is not None and self.source and md5hash:
+                self.pin(md5hash)
+                async with self.pipeline.stage('cache', 'io'):
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, partial(self.cache.put, md5hash, mods, self.path, self.source))
+        return mods
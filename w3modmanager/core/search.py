@@ -0,0 +1,161 @@
+"""Search index over the text fields of mods, answering filter queries without scanning every mod"""
+
+from __future__ import annotations
+
+from w3modmanager.domain.mod.mod import Mod
+
+import itertools
+import re
+import unicodedata
+
+from collections.abc import Iterable
+
+
+def normalizeText(text: str, casefold: bool = True) -> str:
+    """Strip accents and case fold, so 'Café' is found by 'cafe'"""
+    if text.isascii():
+        return text.lower() if casefold else text
+    decomposed = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return text.casefold() if casefold else text
+
+
+def trigrams(token: str) -> set[str]:
+    return {token[index:index + 3] for index in range(len(token) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over normalized mod fields, keeping the matches of the current query up to date"""
+
+    fields = ('filename', 'package', 'category', 'version', 'summary')
+    '''The mod fields that are searched'''
+
+    def __init__(self) -> None:
+        # mods are indexed in batches by prepare, or all at once by the next search
+        self._mods: dict[int, Mod] = {}
+        self._pending: dict[int, Mod] = {}
+        self._documents: dict[int, str] = {}
+        self._trigrams: dict[int, set[str]] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._query = ''
+        self._terms: list[str] = []
+        self._pattern: re.Pattern[str] | None = None
+        self._matches: set[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._mods)
+
+    def __contains__(self, mod: Mod) -> bool:
+        return id(mod) in self._mods
+
+    @property
+    def query(self) -> str:
+        return self._query
+
+    def add(self, mod: Mod) -> None:
+        """Add a mod or update the indexed fields of an added mod"""
+        key = id(mod)
+        if key in self._mods:
+            self.remove(mod)
+        self._mods[key] = mod
+        if self._matches is None:
+            self._pending[key] = mod
+        else:
+            # the matches of the current query include the mod right away
+            self.index(mod)
+
+    def index(self, mod: Mod) -> None:
+        key = id(mod)
+        document = '\n'.join(normalizeText(str(getattr(mod, name))) for name in self.fields)
+        grams = set[str]()
+        for token in set(re.findall(r'\w{3,}', document)):
+            grams.update(token[index:index + 3] for index in range(len(token) - 2))
+        self._documents[key] = document
+        self._trigrams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+        if self._matches is not None and self.matchDocument(document):
+            self._matches.add(key)
+
+    def remove(self, mod: Mod) -> None:
+        key = id(mod)
+        if self._mods.pop(key, None) is None or self._pending.pop(key, None) is not None:
+            return
+        del self._documents[key]
+        for gram in self._trigrams.pop(key):
+            posting = self._postings[gram]
+            posting.discard(key)
+            if not posting:
+                del self._postings[gram]
+        if self._matches is not None:
+            self._matches.discard(key)
+
+    def rebuild(self, mods: Iterable[Mod]) -> None:
+        self._mods.clear()
+        self._pending.clear()
+        self._documents.clear()
+        self._trigrams.clear()
+        self._postings.clear()
+        if self._matches is not None:
+            self._matches.clear()
+        for mod in mods:
+            self.add(mod)
+
+    def prepare(self, limit: int | None = None) -> bool:
+        """Index up to limit pending mods, returns whether all mods are indexed"""
+        for key in list(itertools.islice(self._pending, limit)):
+            self.index(self._pending.pop(key))
+        return not self._pending
+
+    def accepts(self, mod: Mod) -> bool:
+        """Whether the mod matches the current query, every mod matches an empty query"""
+        return self._matches is None or id(mod) in self._matches
+
+    def search(self, query: str) -> set[int] | None:
+        """Set the current query, returns the ids of the matching mods or None if every mod matches"""
+        previous, previousPattern = self._query, self._pattern
+        self._query = query
+        self._pattern = None
+        self._terms = []
+        if not query.strip():
+            self._matches = None
+            return None
+        self.prepare()
+        if re.search(r'[.^$*+?{}\[\]\\|()]', query):
+            # queries looking like regular expressions are matched as such, as the filter always did
+            try:
+                self._pattern = re.compile(normalizeText(query, False), re.IGNORECASE | re.MULTILINE)
+            except re.error:
+                self._pattern = None
+        if self._pattern is not None:
+            self._matches = {key for key, document in self._documents.items() if self._pattern.search(document)}
+            return self._matches
+        self._terms = sorted(re.findall(r'\w+', normalizeText(query)), key=len, reverse=True)
+        candidates: set[int] | None = None
+        if previous and query.startswith(previous) and previousPattern is None and self._matches is not None:
+            # typing on narrows the previous matches
+            candidates = set(self._matches)
+        for term in self._terms:
+            if len(term) == 3:
+                # a term of three characters is a trigram, the posting is exact
+                posting = self._postings.get(term, set())
+                candidates = posting & candidates if candidates is not None else set(posting)
+            else:
+                for gram in sorted(trigrams(term), key=lambda gram: len(self._postings.get(gram, ()))):
+                    posting = self._postings.get(gram, set())
+                    candidates = posting & candidates if candidates is not None else set(posting)
+                    if not candidates:
+                        break
+                # longer terms can match trigrams in different places, shorter terms have no trigrams
+                documents = self._documents
+                candidates = {key for key in (documents if candidates is None else candidates)
+                              if term in documents[key]}
+            if not candidates:
+                break
+        self._matches = candidates if candidates is not None else set(self._documents)
+        return self._matches
+
+    def matchDocument(self, document: str) -> bool:
+        if self._pattern is not None:
+            return bool(self._pattern.search(document))
+        return all(term in document for term in self._terms)
@@ -0,0 +1,177 @@
+"""Content-addressed store deduplicating identical files of installed mods"""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import hashlib
+import json
+import os
+import threading
+
+from pathlib import Path
+from shutil import copyfile
+
+from loguru import logger
+
+
+class ContentStore:
+    """Store holding one copy of every distinct file, hardlinked into the installed mods"""
+
+    recordfile = '.w3mmstore'
+    '''The name of the file listing the stored files linked into an installed mod directory'''
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._objects: dict[str, list[int]] = {}
+        self._linkable: dict[int, bool] = {}
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.read()
+
+    @property
+    def indexfile(self) -> Path:
+        return self.path.joinpath('index.json')
+
+    @property
+    def size(self) -> int:
+        return sum(size for size, _ in self._objects.values())
+
+    @property
+    def bytesSaved(self) -> int:
+        return sum(size * (refs - 1) for size, refs in self._objects.values() if refs > 1)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._objects
+
+    def references(self, key: str) -> int:
+        return self._objects[key][1] if key in self._objects else 0
+
+    def objectPath(self, key: str) -> Path:
+        return self.path.joinpath(key[:2]).joinpath(key)
+
+    def read(self) -> None:
+        with self._lock:
+            try:
+                self._objects = {
+                    key: [int(size), int(refs)]
+                    for key, (size, refs) in json.loads(self.indexfile.read_text(encoding='utf-8')).items()
+                    if self.objectPath(key).is_file()
+                }
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.bind(path=self.indexfile).warning(f'Could not read content store index: {e}')
+
+    def write(self) -> None:
+        with self._lock:
+            try:
+                self.indexfile.write_text(json.dumps(self._objects), encoding='utf-8')
+            except OSError as e:
+                logger.bind(path=self.indexfile).warning(f'Could not write content store index: {e}')
+
+    def canLink(self, directory: Path) -> bool:
+        """Whether stored files can be hardlinked into the directory, probed once per volume"""
+        device = directory.stat().st_dev
+        with self._lock:
+            linkable = self._linkable.get(device)
+        if linkable is None:
+            linkable = device == self.path.stat().st_dev and probeLink(self.path, directory)
+            with self._lock:
+                self._linkable[device] = linkable
+        return linkable
+
+    def link(self, source: Path, target: Path) -> str:
+        """Install a file by hardlinking its stored copy, returns the content key or an empty string if copied"""
+        if not self.canLink(target.parent):
+            # the store is bypassed on volumes it can't be linked into, e.g. the game on another drive
+            copyfile(source, target)
+            return ''
+        key = getContentKey(source)
+        size = source.stat().st_size
+        stored = self.objectPath(key)
+        with self._lock:
+            known = key in self._objects
+        if not known:
+            # copy outside of the lock so installs of different files don't wait for each other
+            stored.parent.mkdir(parents=True, exist_ok=True)
+            temporary = stored.with_name(f'{key}.{threading.get_ident()}.tmp')
+            copyfile(source, temporary)
+            with self._lock:
+                if key not in self._objects:
+                    os.replace(temporary, stored)
+                    self._objects[key] = [size, 0]
+                else:
+                    temporary.unlink()
+        linked = False
+        with self._lock:
+            # the stored file may have been released in the meantime
+            if key in self._objects:
+                try:
+                    os.link(stored, target)
+                    self._objects[key][1] += 1
+                    linked = True
+                except OSError as e:
+                    # links can still fail for single files, e.g. beyond the link count limit
+                    if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                        raise e
+                    if not self._objects[key][1]:
+                        self._objects.pop(key)
+                        stored.unlink(missing_ok=True)
+        if not linked:
+            copyfile(source, target)
+            return ''
+        return key
+
+    def release(self, keys: list[str]) -> None:
+        """Drop references to stored files, removing files that are no longer used"""
+        with self._lock:
+            for key in keys:
+                if key not in self._objects:
+                    continue
+                self._objects[key][1] -= 1
+                if self._objects[key][1] <= 0:
+                    self._objects.pop(key)
+                    try:
+                        self.objectPath(key).unlink(missing_ok=True)
+                    except OSError:
+                        logger.bind(path=self.objectPath(key)).warning('Could not remove stored file')
+
+    def writeRecord(self, modpath: Path, keys: list[str]) -> None:
+        keys = [key for key in keys if key]
+        if keys:
+            modpath.joinpath(self.recordfile).write_text('\n'.join(keys), encoding='utf-8')
+
+    def readRecord(self, modpath: Path) -> list[str]:
+        try:
+            return modpath.joinpath(self.recordfile).read_text(encoding='utf-8').split()
+        except FileNotFoundError:
+            return []
+
+
+def probeLink(source: Path, target: Path) -> bool:
+    """Whether a file in the source directory can be hardlinked into the target directory"""
+    probe = source.joinpath(f'.probe.{threading.get_ident()}')
+    linked = target.joinpath(probe.name)
+    try:
+        probe.touch()
+        os.link(probe, linked)
+        return True
+    except OSError:
+        return False
+    finally:
+        for path in (linked, probe):
+            with contextlib.suppress(OSError):
+                path.unlink(missing_ok=True)
+
+
+def getContentKey(path: Path) -> str:
+    # xxhash digests of mod contents are too weak to identify files, use a cryptographic hash instead
+    hash_blake2 = hashlib.blake2b(digest_size=20)
+    with path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            hash_blake2.update(chunk)
+    return hash_blake2.hexdigest()
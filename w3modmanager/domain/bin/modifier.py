@@ -1,4 +1,5 @@
 from w3modmanager.domain.mod.mod import Settings
+from w3modmanager.util.trace import traced
 from w3modmanager.util.util import detectEncoding
 
 from collections.abc import Sequence
@@ -6,6 +7,7 @@ from configparser import ConfigParser
 from pathlib import Path
 
 
+@traced('writeSettings', 'path')
 def addSettings(settingslist: Sequence[Settings], path: Path) -> int:
     if not path.is_file():
         path.touch()
@@ -26,6 +28,7 @@ def addSettings(settingslist: Sequence[Settings], path: Path) -> int:
     return modified
 
 
+@traced('writeSettings', 'path')
 def removeSettings(settingslist: Sequence[Settings], path: Path) -> int:
     if not path.is_file():
         return 0
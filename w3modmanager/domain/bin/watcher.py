@@ -1,6 +1,8 @@
+from w3modmanager.util.trace import tracer
 from w3modmanager.util.util import debounce, detectEncoding
 
 import asyncio
+import contextlib
 
 from collections.abc import Callable
 from configparser import ConfigParser
@@ -8,7 +10,6 @@ from pathlib import Path
 from typing import Any, TypeVar
 
 from loguru import logger
-from PySide6.QtCore import QObject, Signal
 from watchdog.events import PatternMatchingEventHandler
 from watchdog.observers import Observer
 
@@ -32,24 +33,21 @@ class CallbackList(list[Callable[..., Any]]):
                 self._skip = max(0, self._skip - 1)
 
 
-class FileWatcher(QObject):
-    _signal = Signal(Path)
-
+class FileWatcher:
     def __init__(self, path: Path | str, files: list[str]) -> None:
-        super().__init__()
-
         self.path = path
         self.callbacks = CallbackList()
 
-        self._signal.connect(self._callback)
+        # events arrive on the observer thread and are handed over to the event loop
+        self._loop = asyncio.get_event_loop()
         self._paused = False
 
         self._observer = Observer()
         self._handler = PatternMatchingEventHandler(
             patterns=files, ignore_patterns=[], ignore_directories=True, case_sensitive=False)
-        self._handler.on_modified = lambda event: self._signal.emit(Path(event.src_path))
-        self._handler.on_created = lambda event: self._signal.emit(Path(event.src_path))
-        self._handler.on_deleted = lambda event: self._signal.emit(Path(event.src_path))
+        self._handler.on_modified = lambda event: self._emit(Path(event.src_path))
+        self._handler.on_created = lambda event: self._emit(Path(event.src_path))
+        self._handler.on_deleted = lambda event: self._emit(Path(event.src_path))
         self._observer.schedule(self._handler, str(path), recursive=False)
         self._observer.start()
 
@@ -59,13 +57,21 @@ class FileWatcher(QObject):
     def resume(self) -> None:
         self._paused = False
 
+    def _emit(self, path: Path) -> None:
+        if not self._loop.is_closed():
+            with contextlib.suppress(RuntimeError):
+                self._loop.call_soon_threadsafe(self._callback, path)
+
     def _callback(self, path: Path) -> None:
         if not self._paused:
             self.callbacks.fire(path)
 
-    def __del__(self) -> None:
+    def stop(self) -> None:
         self._observer.stop()
 
+    def __del__(self) -> None:
+        self.stop()
+
 
 class WatchedConfigFile:
     _SectionGet = TypeVar('_SectionGet', str, int, None)
@@ -119,7 +125,8 @@ class WatchedConfigFile:
         try:
             if not self.path.parent.is_dir():
                 self.path.parent.mkdir(parents=True)
-            with open(self.path, 'w', encoding=self.encoding) as file:  # noqa: ASYNC101
+            with tracer.span('writeSettings', path=self.path), \
+                    open(self.path, 'w', encoding=self.encoding) as file:  # noqa: ASYNC101
                 self.config.write(file, space_around_delimiters=False)
         except Exception as e:
             logger.bind(path=self.path).exception(f'Could not write settings file: {e}')
@@ -1,4 +1,7 @@
 from w3modmanager.util import util
+from w3modmanager.util.metrics import metrics
+from w3modmanager.util.trace import tracer
+from w3modmanager.util.vfs import AnyPath, VirtualPath, isSamePath, openArchive, openBuiltinArchive, relativePath
 
 import itertools
 import os
@@ -13,6 +16,11 @@ from dataclasses_json import config as JsonConfig
 from loguru import logger
 
 
+_failedBundles = metrics.counter('bundles.failed', 'Bundles that could not be scanned')
+_bundledFiles = metrics.counter('bundles.files', 'Files found in scanned bundles')
+_bundleScanTime = metrics.histogram('bundles.time', 'Seconds per scanned bundle')
+
+
 #
 # string formatting
 #
@@ -103,7 +111,7 @@ def formatDlcName(name: str) -> str:
 # mod validation
 #
 
-def containsValidMod(path: Path, searchlimit: int = 0) -> tuple[bool, bool]:
+def containsValidMod(path: AnyPath, searchlimit: int = 0) -> tuple[bool, bool]:
     # valid if contains a valid mod or dlc dir
     dirs = [path]
     for check in dirs:
@@ -121,7 +129,21 @@ def containsValidMod(path: Path, searchlimit: int = 0) -> tuple[bool, bool]:
     return False, True
 
 
-def isValidModDirectory(path: Path) -> bool:
+def archiveContainsValidMod(archive: Path, searchlimit: int = 0, external: bool = True) -> tuple[bool, bool]:
+    # check the member listing of an archive without extracting it.
+    # if the archive can't be listed, or only by an external process and external is false,
+    # assume it's valid and leave the decision to the extraction
+    try:
+        filesystem = openArchive(archive) if external else openBuiltinArchive(archive)
+    except Exception as e:
+        logger.bind(path=archive).debug(f'Could not list archive: {e}')
+        return True, False
+    if filesystem is None:
+        return True, False
+    return containsValidMod(filesystem.root(), searchlimit)
+
+
+def isValidModDirectory(path: AnyPath) -> bool:
     # valid if path starts with mod and contains a non-empty content dir
     # and is not contained in a dlc dir
     if path.is_dir() \
@@ -132,7 +154,7 @@ def isValidModDirectory(path: Path) -> bool:
     return False
 
 
-def isValidDlcDirectory(path: Path) -> bool:
+def isValidDlcDirectory(path: AnyPath) -> bool:
     # valid if path starts with dlc and contains a non-empty content dir
     # or ends with dlc and doesn't start with mod
     # or starts with mod and is contained in a dlc dir
@@ -146,22 +168,22 @@ def isValidDlcDirectory(path: Path) -> bool:
     return False
 
 
-def maybeModOrDlcDirectory(path: Path, root: Path) -> bool:
+def maybeModOrDlcDirectory(path: AnyPath, root: AnyPath) -> bool:
     # desperate check for mods with invalid naming.
     # if only one dir in root and it contains a content dir,
     # it's probably a misnamed mod or dlc
-    if path.is_dir() and path.parent.samefile(root) \
+    if path.is_dir() and isSamePath(path.parent, root) \
     and any(d for d in path.iterdir() if d.is_dir()):
         return containsContentDirectory(path)
     return False
 
 
-def containsContentDirectory(path: Path) -> bool:
+def containsContentDirectory(path: AnyPath) -> bool:
     # check if a non-empty content folder is contained
     return 'content' in (d.name.lower() for d in path.iterdir() if d.is_dir() and d.iterdir())
 
 
-def containsScripts(path: Path) -> bool:
+def containsScripts(path: AnyPath) -> bool:
     # check if path contains .ws scripts inside content/scripts/
     return any(f.is_file() for f in path.glob('content/**/*.ws'))
 
@@ -170,34 +192,34 @@ def containsScripts(path: Path) -> bool:
 # mod directory extraction
 #
 
-def fetchModDirectories(path: Path) -> list[Path]:
+def fetchModDirectories(path: AnyPath) -> list[Path]:
     bins = []
     dirs = [path]
     for check in dirs:
         if isValidModDirectory(check):
-            bins.append(check.relative_to(path))
+            bins.append(relativePath(check, path))
         elif not isValidDlcDirectory(check):
             dirs += sorted(d for d in check.iterdir() if d.is_dir())
     return bins
 
 
-def fetchDlcDirectories(path: Path) -> list[Path]:
+def fetchDlcDirectories(path: AnyPath) -> list[Path]:
     bins = []
     dirs = [path]
     for check in dirs:
         if isValidDlcDirectory(check):
-            bins.append(check.relative_to(path))
+            bins.append(relativePath(check, path))
         elif not isValidModDirectory(check):
             dirs += sorted(d for d in check.iterdir() if d.is_dir())
     return bins
 
 
-def fetchUnsureDirectories(path: Path) -> list[Path]:
+def fetchUnsureDirectories(path: AnyPath) -> list[Path]:
     bins = []
     dirs = [path]
     for check in dirs:
         if maybeModOrDlcDirectory(check, path):
-            bins.append(check.relative_to(path))
+            bins.append(relativePath(check, path))
         dirs += sorted(
             d for d in check.iterdir() if d.is_dir()
             and not isValidModDirectory(d) and not isValidDlcDirectory(d)
@@ -379,7 +401,7 @@ class InputSettings(Settings):
     pass
 
 
-def fetchBinFiles(path: Path, onlyUngrouped: bool = False) -> \
+def fetchBinFiles(path: AnyPath, onlyUngrouped: bool = False) -> \
         tuple[list[BinFile], list[UserSettings], list[InputSettings]]:
     bins = []
     user = []
@@ -390,7 +412,7 @@ def fetchBinFiles(path: Path, onlyUngrouped: bool = False) -> \
             f for f in check.iterdir()
             if f.is_file() and f.suffix.lower() in ('.ini', '.xml', '.txt', '.settings', '.dll', '.asi')
         ):
-            relpath: Path = file.relative_to(path)
+            relpath: Path = relativePath(file, path)
 
             # if the binfile is placed under bin, use its path relative to its bin dir
             if 'bin' in relpath.parts:
@@ -433,7 +455,7 @@ def fetchBinFiles(path: Path, onlyUngrouped: bool = False) -> \
                 ))
                 # add cfgs coming with it
                 bins.extend(sorted(BinFile(
-                    cfg.relative_to(path),
+                    relativePath(cfg, path),
                     Path(f'bin/x64/{cfg.name}')
                 ) for cfg in file.parent.iterdir()
                     if re.match(r'.+(\.cfg)$', cfg.name, re.IGNORECASE) and cfg not in bins
@@ -467,7 +489,7 @@ def fetchBinFiles(path: Path, onlyUngrouped: bool = False) -> \
     return (bins, user, inpu)
 
 
-def fetchReadmeFiles(path: Path, onlyUngrouped: bool = False) -> list[ReadmeFile]:
+def fetchReadmeFiles(path: AnyPath, onlyUngrouped: bool = False) -> list[ReadmeFile]:
     contents = []
     dirs = [path]
     for check in dirs:
@@ -475,7 +497,7 @@ def fetchReadmeFiles(path: Path, onlyUngrouped: bool = False) -> list[ReadmeFile
             f for f in check.iterdir()
             if f.is_file() and f.suffix.lower() in ('.txt', '.md')
         ):
-            relpath: Path = file.relative_to(path)
+            relpath: Path = relativePath(file, path)
             if re.match(r'^(.*readme.*)\.(txt|md)', file.name, re.IGNORECASE):
                 contents.append(ReadmeFile(relpath, util.readText(file)))
             dirs += sorted(
@@ -485,13 +507,13 @@ def fetchReadmeFiles(path: Path, onlyUngrouped: bool = False) -> list[ReadmeFile
     return contents
 
 
-def fetchContentFiles(path: Path) -> list[ContentFile]:
+def fetchContentFiles(path: AnyPath) -> list[ContentFile]:
     contents = []
     dirs = [path]
     for check in dirs:
         if check.is_dir() and check.name == 'content':
             contents.extend([
-                ContentFile(x.relative_to(path), util.getXXHash(x))
+                ContentFile(relativePath(x, path), util.getXXHash(x))
                 for x in check.glob('**/*') if x.is_file()
             ])
         else:
@@ -499,17 +521,17 @@ def fetchContentFiles(path: Path) -> list[ContentFile]:
     return contents
 
 
-def fetchPatchFiles(path: Path) -> list[ContentFile]:
+def fetchPatchFiles(path: AnyPath) -> list[ContentFile]:
     contents = []
     for check in sorted(d for d in path.iterdir() if d.is_dir() and d.name == 'content'):
         contents.extend([
-            ContentFile(x.relative_to(path), util.getXXHash(x))
+            ContentFile(relativePath(x, path), util.getXXHash(x))
             for x in sorted(check.glob('**/*')) if x.is_file()
         ])
     return contents
 
 
-def resolveCommonBinRoot(root: Path, files: list[BinFile]) -> Path:
+def resolveCommonBinRoot(root: AnyPath, files: list[BinFile]) -> AnyPath:
     # find the innermost common root path for bin files
     if not files:
         return root
@@ -530,14 +552,28 @@ def resolveCommonBinRoot(root: Path, files: list[BinFile]) -> Path:
     return root.joinpath(common)
 
 
-async def fetchBundleContents(root: Path, path: Path) -> list[BundledFile]:
+async def fetchBundleContents(root: AnyPath, path: AnyPath) -> list[BundledFile]:
+    if isinstance(path, VirtualPath):
+        # bundles can only be scanned on disk
+        realpath = path.realpath()
+        if realpath is None:
+            logger.bind(path=path).debug('Skipping bundle inside virtual filesystem')
+            return []
+        relpath = path.relative_to(root) if isinstance(root, VirtualPath) else Path(path.path)
+        path = realpath
+    else:
+        relpath = relativePath(path, root)
     logger.bind(path=path).debug('Scanning bundle')
     try:
-        return [
-            BundledFile(path.relative_to(root), Path(bundled))
-            for bundled
-            in await util.scanBundle(path)]
+        with tracer.span('scanBundle', path=path), _bundleScanTime.time():
+            files = [
+                BundledFile(relpath, Path(bundled))
+                for bundled
+                in await util.scanBundle(path)]
+        _bundledFiles.inc(len(files))
+        return files
     except Exception:
+        _failedBundles.inc()
         logger.bind(path=path).warning('Could not parse bundle')
     return []
 
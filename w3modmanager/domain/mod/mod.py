@@ -1,17 +1,31 @@
 from __future__ import annotations
 
 from w3modmanager.domain.mod.fetcher import *
+from w3modmanager.util.trace import traced
 from w3modmanager.util.util import *
+from w3modmanager.util.vfs import AnyPath
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import NamedTuple
 
 from dataclasses_json import DataClassJsonMixin
 from dataclasses_json import config as JsonConfig
 from loguru import logger
 
 
+_menuPath = Path('bin/config/r4game/user_config_matrix/pc')
+
+
+class ModFiles(NamedTuple):
+    """Content, script, bin and menu files of a mod, shared between accesses and not to be modified"""
+    contentFiles: list[ContentFile]
+    scriptFiles: list[ContentFile]
+    binFiles: list[BinFile]
+    menuFiles: list[BinFile]
+
+
 @dataclass
 class Mod(DataClassJsonMixin):
 
@@ -23,7 +37,7 @@ class Mod(DataClassJsonMixin):
     datatype: str = 'mod'
     target: str = 'mods'
     installdate: datetime = field(default_factory=lambda: datetime.now(tz=timezone.utc))
-    source: Path = field(metadata=JsonConfig(encoder=str, decoder=Path), default_factory=Path)
+    source: AnyPath = field(metadata=JsonConfig(encoder=str, decoder=Path), default_factory=Path)
     size: int = 0
     md5hash: str = ''
 
@@ -78,30 +92,19 @@ class Mod(DataClassJsonMixin):
 
     @property
     def contentFiles(self) -> list[ContentFile]:
-        return list(filter(
-            lambda f: f.source.suffix != '.ws',
-            self.contents))
+        return self.partitionFiles().contentFiles
 
     @property
     def scriptFiles(self) -> list[ContentFile]:
-        return list(filter(
-            lambda f: f.source.suffix == '.ws',
-            self.contents))
+        return self.partitionFiles().scriptFiles
 
     @property
     def binFiles(self) -> list[BinFile]:
-        return list(filter(
-            lambda f: f.target.parent not in (
-                Path('bin/config/r4game/user_config_matrix/pc'),
-            ),
-            self.files))
+        return self.partitionFiles().binFiles
 
     @property
     def menuFiles(self) -> list[BinFile]:
-        return list(filter(
-            lambda f: f.target.parent in (
-                Path('bin/config/r4game/user_config_matrix/pc'),
-            ), self.files))
+        return self.partitionFiles().menuFiles
 
     @property
     def bundledFiles(self) -> list[BundledFile]:
@@ -111,12 +114,29 @@ class Mod(DataClassJsonMixin):
     def readmeFiles(self) -> list[ReadmeFile]:
         return self.readmes
 
+    def partitionFiles(self) -> ModFiles:
+        """Files of the mod by kind, partitioned again only when the file lists changed"""
+        # the partitions are kept outside of the dataclass fields so they are not serialized or compared,
+        # the snapshots of the file lists detect replaced, added and removed files
+        files, contents = self.files, self.contents
+        cached: tuple[list[BinFile], list[ContentFile], ModFiles] | None = getattr(self, '_partitions', None)
+        if cached is not None and cached[0] == files and cached[1] == contents:
+            return cached[2]
+        partitions = ModFiles([], [], [], [])
+        for content in contents:
+            (partitions.scriptFiles if content.source.suffix == '.ws' else partitions.contentFiles).append(content)
+        for file in files:
+            (partitions.menuFiles if file.target.parent == _menuPath else partitions.binFiles).append(file)
+        object.__setattr__(self, '_partitions', (list(files), list(contents), partitions))
+        return partitions
+
 
     @classmethod
+    @traced('fromDirectory', 'path')
     async def fromDirectory(
-        cls: type[Mod], path: Path, searchCommonRoot: bool = True, recursive: bool = True
+        cls: type[Mod], path: AnyPath, searchCommonRoot: bool = True, recursive: bool = True
     ) -> list[Mod]:
-        if not os.path.isdir(path):
+        if not path.is_dir():
             raise InvalidPathError(path, 'Invalid mod')
         mods: list[Mod] = []
         dirs = [path]
@@ -0,0 +1,345 @@
+"""Segmented and resumable downloads over a shared http client"""
+
+from __future__ import annotations
+
+from w3modmanager.util.util import getMD5Hash
+
+import asyncio
+import contextlib
+import hashlib
+import re
+import time
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import IO, Any
+
+from dataclasses_json import DataClassJsonMixin
+from httpx import AsyncClient, Response, TransportError
+from loguru import logger
+
+
+class DownloadError(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+class DownloadResponseError(DownloadError):
+    def __init__(self, status: int, message: str = '') -> None:
+        super().__init__(message or f'Unexpected response: Status {status}')
+        self.status = status
+
+
+class DownloadChangedError(DownloadError):
+    def __init__(self, message: str = 'Remote file changed') -> None:
+        super().__init__(message)
+
+
+@dataclass
+class DownloadSegment(DataClassJsonMixin):
+    start: int
+    end: int
+    done: int = 0
+
+    @property
+    def position(self) -> int:
+        return self.start + self.done
+
+    @property
+    def complete(self) -> bool:
+        return self.end > 0 and self.position >= self.end
+
+
+@dataclass
+class DownloadState(DataClassJsonMixin):
+    key: str
+    size: int = 0
+    etag: str = ''
+    segments: list[DownloadSegment] = field(default_factory=list)
+
+    @property
+    def received(self) -> int:
+        return sum(segment.done for segment in self.segments)
+
+
+@dataclass
+class DownloadProgress:
+    url: str
+    target: Path
+    received: int
+    total: int
+    resumed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def speed(self) -> float:
+        return (self.received - self.resumed) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.total > 0 and self.received >= self.total
+
+
+ProgressCallback = Callable[[DownloadProgress], Any]
+
+
+class BandwidthLimiter:
+    """Token bucket limiting the combined transfer rate of all downloads using it"""
+
+    def __init__(self, rate: int = 0) -> None:
+        self.rate = rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def setRate(self, rate: int) -> None:
+        self.rate = max(0, rate)
+        self._tokens = min(self._tokens, float(self.rate))
+
+    async def consume(self, amount: int) -> None:
+        if self.rate <= 0:
+            return
+        # waiting downloads queue up on the lock, so the bandwidth is shared in order
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.rate), self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+                self._tokens = 0.0
+                self._updated = time.monotonic()
+
+
+class Downloader:
+    """Downloads files over a shared client, in parallel segments if the server supports range requests"""
+
+    def __init__(
+        self, client: AsyncClient, segments: int = 4, minSegmentSize: int = 8 * 1024 ** 2,
+        chunkSize: int = 256 * 1024, retries: int = 3, timeout: float = 250.0, limiter: BandwidthLimiter | None = None
+    ) -> None:
+        self.client = client
+        self.limiter = limiter
+        self.segments = max(1, segments)
+        self.minSegmentSize = max(1, minSegmentSize)
+        self.chunkSize = chunkSize
+        self.retries = retries
+        self.timeout = timeout
+        self.retryDelay = 0.5
+        self.stateInterval = 1.0
+        self.progressInterval = 0.1
+
+    async def download(
+        self, url: str, target: Path, headers: dict[str, str] | None = None, progress: ProgressCallback | None = None,
+        key: str = ''
+    ) -> str:
+        """Download a file to the target path, resuming a previous attempt if possible, returns the MD5 hash"""
+        # the key identifies the file for resuming if the url changes between attempts, e.g. with expiring links
+        try:
+            return await _Download(self, url, key or url, target, headers or {}, progress).run()
+        except DownloadChangedError:
+            logger.bind(name=url).debug('Remote file changed, restarting download')
+            discardPartialDownload(target)
+            return await _Download(self, url, key or url, target, headers or {}, progress).run()
+
+
+class _Download:
+    def __init__(
+        self, downloader: Downloader, url: str, key: str, target: Path, headers: dict[str, str],
+        progress: ProgressCallback | None
+    ) -> None:
+        self.downloader = downloader
+        self.url = url
+        self.key = key
+        self.target = target
+        self.headers = headers
+        self.progress = progress
+        self.partfile = getPartPath(target)
+        self.statefile = getStatePath(target)
+        self.state = DownloadState(key)
+        self.md5: Any = None
+        self.resumable = False
+        self.resumed = 0
+        self.started = time.perf_counter()
+        self.lastState = 0.0
+        self.lastProgress = 0.0
+
+    async def run(self) -> str:
+        state = readDownloadState(self.target, self.key)
+        try:
+            if state:
+                self.state = state
+                self.resumable = True
+                self.resumed = state.received
+                logger.bind(name=self.url, path=self.target).debug(f'Resuming download at {self.resumed} bytes')
+                await self.downloadSegments()
+            else:
+                await self.start()
+        except BaseException:
+            # keep the progress in a state file next to the partial download, so it can be resumed later
+            if self.resumable:
+                self.writeState()
+            else:
+                discardPartialDownload(self.target)
+            raise
+        self.reportProgress(True)
+        self.partfile.replace(self.target)
+        self.statefile.unlink(missing_ok=True)
+        if self.md5 is not None:
+            return str(self.md5.hexdigest())
+        return await asyncio.get_running_loop().run_in_executor(None, partial(getMD5Hash, self.target))
+
+    async def start(self) -> None:
+        # request the whole file as a range to find out whether the server supports ranges
+        self.partfile.parent.mkdir(parents=True, exist_ok=True)
+        async with self.downloader.client.stream(
+            'GET', self.url, headers={**self.headers, 'Range': 'bytes=0-'}, timeout=self.downloader.timeout
+        ) as response:
+            checkResponse(response)
+            ranges = response.status_code == 206
+            size = getContentSize(response)
+            self.state = DownloadState(self.key, size, response.headers.get('etag', ''))
+            self.resumable = ranges and size > 0
+            count = min(self.downloader.segments, size // self.downloader.minSegmentSize) if ranges else 1
+            count = max(1, count)
+            length = -(-size // count) if size else 0
+            self.state.segments = [
+                DownloadSegment(index * length, min(size, (index + 1) * length)) for index in range(count)
+            ] if size else [DownloadSegment(0, 0)]
+            with self.partfile.open('wb') as file:
+                if size:
+                    file.truncate(size)
+            # the first segment is read from the initial response, the remaining segments are requested in parallel
+            if count == 1:
+                self.md5 = hashlib.md5(usedforsecurity=False)
+            others = [
+                asyncio.create_task(self.downloadSegment(segment)) for segment in self.state.segments[1:]
+            ]
+            try:
+                try:
+                    with self.partfile.open('r+b') as file:
+                        await self.streamSegment(response, file, self.state.segments[0])
+                except TransportError as e:
+                    if not self.resumable:
+                        raise e
+                    # continue the first segment with a new request
+                    await self.downloadSegment(self.state.segments[0])
+                await asyncio.gather(*others)
+            except BaseException:
+                for task in others:
+                    task.cancel()
+                await asyncio.gather(*others, return_exceptions=True)
+                raise
+
+    async def downloadSegments(self) -> None:
+        tasks = [
+            asyncio.create_task(self.downloadSegment(segment))
+            for segment in self.state.segments if not segment.complete
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def downloadSegment(self, segment: DownloadSegment) -> None:
+        attempt = 0
+        while not segment.complete:
+            try:
+                async with self.downloader.client.stream(
+                    'GET', self.url, headers={**self.headers, 'Range': f'bytes={segment.position}-{segment.end - 1}'},
+                    timeout=self.downloader.timeout
+                ) as response:
+                    checkResponse(response)
+                    etag = response.headers.get('etag', '')
+                    if response.status_code != 206 or self.state.etag and etag and etag != self.state.etag:
+                        raise DownloadChangedError()
+                    with self.partfile.open('r+b') as file:
+                        await self.streamSegment(response, file, segment)
+            except (TransportError, DownloadResponseError) as e:
+                if isinstance(e, DownloadResponseError) and e.status < 500 or attempt >= self.downloader.retries:
+                    raise e
+                attempt += 1
+                logger.bind(name=self.url).debug(f'Retrying download segment at {segment.position}: {e}')
+                await asyncio.sleep(self.downloader.retryDelay * 2 ** attempt)
+
+    async def streamSegment(self, response: Response, file: IO[bytes], segment: DownloadSegment) -> None:
+        loop = asyncio.get_running_loop()
+        file.seek(segment.position)
+        async for data in response.aiter_bytes(self.downloader.chunkSize):
+            chunk = data[:segment.end - segment.position] if segment.end > 0 else data
+            # writing in the executor applies backpressure to the response stream without blocking the loop
+            await loop.run_in_executor(None, file.write, chunk)
+            if self.downloader.limiter:
+                await self.downloader.limiter.consume(len(chunk))
+            if self.md5 is not None:
+                self.md5.update(chunk)
+            segment.done += len(chunk)
+            self.reportProgress()
+            if segment.complete:
+                break
+        if segment.end <= 0:
+            segment.end = segment.position
+            self.state.size = max(self.state.size, segment.end)
+        elif not segment.complete:
+            raise TransportError('Connection closed before the download completed')
+
+    def reportProgress(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if self.resumable and now - self.lastState >= self.downloader.stateInterval:
+            self.lastState = now
+            self.writeState()
+        if self.progress and (force or now - self.lastProgress >= self.downloader.progressInterval):
+            self.lastProgress = now
+            self.progress(DownloadProgress(
+                self.url, self.target, self.state.received, self.state.size, self.resumed, now - self.started
+            ))
+
+    def writeState(self) -> None:
+        with contextlib.suppress(OSError):
+            self.statefile.write_text(self.state.to_json(), encoding='utf-8')
+
+
+def getPartPath(target: Path) -> Path:
+    return target.with_name(f'{target.name}.part')
+
+
+def getStatePath(target: Path) -> Path:
+    return target.with_name(f'{target.name}.part.json')
+
+
+def readDownloadState(target: Path, key: str) -> DownloadState | None:
+    """Read the state of a previous attempt to download a file to the target path, if it can be resumed"""
+    try:
+        state = DownloadState.from_json(getStatePath(target).read_text(encoding='utf-8'))
+    except (OSError, ValueError, KeyError):
+        return None
+    partfile = getPartPath(target)
+    if state.key != key or not state.size or not partfile.is_file() or partfile.stat().st_size != state.size:
+        return None
+    return state
+
+
+def discardPartialDownload(target: Path) -> None:
+    getPartPath(target).unlink(missing_ok=True)
+    getStatePath(target).unlink(missing_ok=True)
+
+
+def checkResponse(response: Response) -> None:
+    if response.status_code not in (200, 206):
+        raise DownloadResponseError(response.status_code)
+
+
+def getContentSize(response: Response) -> int:
+    if response.status_code == 206:
+        match = re.match(r'bytes\s+\d+-\d+/(\d+)', response.headers.get('content-range', ''))
+        if match:
+            return int(match.group(1))
+    try:
+        return int(response.headers.get('content-length', 0))
+    except ValueError:
+        return 0
@@ -0,0 +1,291 @@
+"""Persistent download queue with priorities and concurrency limits"""
+
+from __future__ import annotations
+
+from w3modmanager.domain.web.download import (
+    BandwidthLimiter,
+    DownloadProgress,
+    ProgressCallback,
+    discardPartialDownload,
+    readDownloadState,
+)
+
+import asyncio
+import contextlib
+import heapq
+import json
+import re
+import time
+import uuid
+
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dataclasses_json import DataClassJsonMixin
+from loguru import logger
+
+
+DownloadFunction = Callable[[str, Path, ProgressCallback, BandwidthLimiter, str], Awaitable[str]]
+'''Downloads an url to a target path with progress callback, limiter and resume key, returning the MD5 hash'''
+
+ResolveFunction = Callable[['DownloadItem'], Awaitable[str]]
+'''Requests a fresh download url for a queued item, e.g. when links expire'''
+
+
+@dataclass
+class DownloadItem(DataClassJsonMixin):
+    url: str
+    filename: str
+    priority: int = 0
+    state: str = 'queued'
+    received: int = 0
+    total: int = 0
+    error: str = ''
+    md5hash: str = ''
+    attempts: int = 0
+    modid: int = -1
+    fileid: int = -1
+    added: float = field(default_factory=time.time)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)  # noqa: A003
+
+    @property
+    def key(self) -> str:
+        return f'nexus:{self.modid}:{self.fileid}' if self.modid >= 0 and self.fileid >= 0 else self.url
+
+
+class DownloadQueue:
+    """Queue downloading files by priority with a limit of concurrent downloads, persisted across restarts"""
+
+    states = ('queued', 'downloading', 'paused', 'completed', 'failed')
+
+    def __init__(
+        self, path: Path, download: DownloadFunction, maxConcurrent: int = 2, bandwidth: int = 0,
+        resolve: ResolveFunction | None = None, maxAttempts: int = 3
+    ) -> None:
+        self.path = path
+        self.download = download
+        self.resolve = resolve
+        self.maxAttempts = max(1, maxAttempts)
+        self.maxConcurrent = max(1, maxConcurrent)
+        self.limiter = BandwidthLimiter(bandwidth)
+        self.progressCallbacks: list[Callable[[DownloadItem], Any]] = []
+        self.completedCallbacks: list[Callable[[DownloadItem], Any]] = []
+        self._items: dict[str, DownloadItem] = {}
+        self._tasks: dict[str, asyncio.Task[Any]] = {}
+        self._restored: list[str] = []
+        self._started = False
+        self._writeHandle: asyncio.TimerHandle | None = None
+        self.writeInterval = 1.0
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.read()
+
+    @property
+    def queuefile(self) -> Path:
+        return self.path.joinpath('queue.json')
+
+    @property
+    def items(self) -> list[DownloadItem]:
+        return sorted(self._items.values(), key=lambda item: (-item.priority, item.added))
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, id: str) -> DownloadItem:  # noqa: A002
+        return self._items[id]
+
+    def read(self) -> None:
+        try:
+            for data in json.loads(self.queuefile.read_text(encoding='utf-8')):
+                item = DownloadItem.from_dict(data)
+                if item.state in ('downloading', 'paused', 'failed'):
+                    # interrupted, paused or failed before closing the application, resume or retry it
+                    item.state = 'queued'
+                if item.state == 'completed':
+                    if not self.getTarget(item).is_file():
+                        continue
+                    # completed but not installed before closing the application, install it after the start
+                    self._restored.append(item.id)
+                self._items[item.id] = item
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.bind(path=self.queuefile).warning(f'Could not read download queue: {e}')
+
+    def write(self) -> None:
+        # writes are coalesced while the event loop runs, so large queues are not serialized for every change
+        if self._writeHandle is not None:
+            return
+        try:
+            self._writeHandle = asyncio.get_running_loop().call_later(self.writeInterval, self.flush)
+        except RuntimeError:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._writeHandle is not None:
+            self._writeHandle.cancel()
+            self._writeHandle = None
+        try:
+            self.queuefile.write_text(json.dumps([asdict(item) for item in self.items]), encoding='utf-8')
+        except OSError as e:
+            logger.bind(path=self.queuefile).warning(f'Could not write download queue: {e}')
+
+    def getTarget(self, item: DownloadItem) -> Path:
+        return self.path.joinpath(item.id).joinpath(item.filename)
+
+    def add(
+        self, url: str, filename: str = '', priority: int = 0, modid: int = -1, fileid: int = -1
+    ) -> DownloadItem:
+        if not filename:
+            filename = url.split('?')[0].rstrip('/').split('/')[-1] or 'download'
+        filename = re.sub(r'[^\w\-_\. ]', r'_', filename)
+        item = DownloadItem(url, filename, priority, modid=modid, fileid=fileid)
+        self._items[item.id] = item
+        self.write()
+        self.schedule()
+        return item
+
+    def remove(self, id: str) -> None:  # noqa: A002
+        item = self._items.pop(id, None)
+        if item is None:
+            return
+        task = self._tasks.pop(id, None)
+        if task:
+            task.cancel()
+        target = self.getTarget(item)
+        discardPartialDownload(target)
+        target.unlink(missing_ok=True)
+        with contextlib.suppress(OSError):
+            target.parent.rmdir()
+        self.write()
+        self.schedule()
+
+    def pause(self, id: str) -> None:  # noqa: A002
+        item = self._items[id]
+        if item.state not in ('queued', 'downloading'):
+            return
+        task = self._tasks.pop(id, None)
+        if task:
+            task.cancel()
+        item.state = 'paused'
+        self.write()
+        self.notifyProgress(item)
+        self.schedule()
+
+    def resume(self, id: str) -> None:  # noqa: A002
+        item = self._items[id]
+        if item.state not in ('paused', 'failed'):
+            return
+        item.state = 'queued'
+        item.error = ''
+        self.write()
+        self.notifyProgress(item)
+        self.schedule()
+
+    def setPriority(self, id: str, priority: int) -> None:  # noqa: A002
+        self._items[id].priority = priority
+        self.write()
+        self.schedule()
+
+    def setMaxConcurrent(self, maxConcurrent: int) -> None:
+        self.maxConcurrent = max(1, maxConcurrent)
+        self.schedule()
+
+    def setBandwidth(self, bandwidth: int) -> None:
+        self.limiter.setRate(bandwidth)
+
+    def start(self) -> None:
+        """Start downloading queued items, including those interrupted by the last shutdown, from the event loop"""
+        self._started = True
+        restored = [self._items[itemid] for itemid in self._restored if itemid in self._items]
+        self._restored.clear()
+        for item in restored:
+            for callback in self.completedCallbacks:
+                callback(item)
+        self.schedule()
+
+    async def stop(self) -> None:
+        # keep the state of running downloads as queued, so they are resumed after the next start
+        self._started = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for item in self._items.values():
+            if item.state == 'downloading':
+                item.state = 'queued'
+        self.flush()
+
+    async def join(self) -> None:
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+
+    def schedule(self) -> None:
+        free = self.maxConcurrent - len(self._tasks)
+        if not self._started or free <= 0:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning('Download queue scheduled without a running event loop')
+            return
+        queued = (item for item in self._items.values() if item.state == 'queued' and item.id not in self._tasks)
+        for item in heapq.nsmallest(free, queued, key=lambda item: (-item.priority, item.added)):
+            self._tasks[item.id] = loop.create_task(self.run(item))
+            item.state = 'downloading'
+        self.write()
+
+    async def run(self, item: DownloadItem) -> None:
+        target = self.getTarget(item)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            state = readDownloadState(target, item.key)
+            if state:
+                item.received = state.received
+            if self.resolve and item.modid >= 0 and item.fileid >= 0:
+                # download links expire, request a fresh one for every attempt
+                item.url = await self.resolve(item)
+            self.notifyProgress(item)
+            item.md5hash = await self.download(
+                item.url, target, lambda progress: self.updateProgress(item, progress), self.limiter, item.key
+            )
+            item.state = 'completed'
+            item.received = item.total = target.stat().st_size
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            item.state = 'failed'
+            item.error = str(e)
+            item.attempts += 1
+            if item.attempts < self.maxAttempts:
+                logger.bind(name=item.filename).warning(f'Download failed, retrying after the next start: {e}')
+            else:
+                logger.bind(name=item.filename).error(f'Download failed after {item.attempts} attempts: {e}')
+        finally:
+            if self._tasks.get(item.id) is asyncio.current_task():
+                del self._tasks[item.id]
+        self.write()
+        self.notifyProgress(item)
+        if item.state == 'completed':
+            for callback in self.completedCallbacks:
+                callback(item)
+        elif item.state == 'failed' and item.attempts >= self.maxAttempts:
+            # drop the download with its partial data instead of keeping it forever
+            self.remove(item.id)
+            return
+        self.schedule()
+
+    def updateProgress(self, item: DownloadItem, progress: DownloadProgress) -> None:
+        item.received = progress.received
+        item.total = progress.total
+        self.notifyProgress(item)
+
+    def notifyProgress(self, item: DownloadItem) -> None:
+        for callback in self.progressCallbacks:
+            callback(item)
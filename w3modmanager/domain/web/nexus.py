@@ -2,18 +2,26 @@ from __future__ import annotations
 
 import w3modmanager
 
+from w3modmanager.domain.web.download import BandwidthLimiter, Downloader, DownloadResponseError, ProgressCallback
+from w3modmanager.domain.web.responsecache import ResponseCache
+from w3modmanager.util.metrics import metrics
 from w3modmanager.util.util import isValidNexusModsUrl, normalizeUrl
 
 import asyncio
+import hashlib
 import platform
+import random
 import re
+import time
 
-from functools import partial
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 from urllib.parse import urlsplit
 
-from httpx import AsyncClient, HTTPError, HTTPStatusError, Request, Response, stream
+from httpx import AsyncClient, Headers, HTTPError, HTTPStatusError, Request, Response, TransportError
 from httpx import RequestError as HTTPXRequestError
 from loguru import logger
 from PySide6.QtCore import QSettings
@@ -25,6 +33,21 @@ __modsUrl = '/v1/games/witcher3/mods'
 
 __session: AsyncClient | None = None
 
+# download links expire and are specific to the api key, mod information rarely changes
+__cache = ResponseCache(ttl={
+    'md5_search': 24 * 60 * 60,
+    'files': 60 * 60,
+    'download_link': 5 * 60,
+})
+
+# single underscores, the scheduler methods would otherwise refer to mangled names
+_sentRequests = metrics.counter('nexus.requests', 'Api requests sent')
+_retriedRequests = metrics.counter('nexus.retries', 'Api requests retried')
+_limitedRequests = metrics.counter('nexus.ratelimited', 'Api requests rejected by the rate limit')
+_requestTime = metrics.histogram('nexus.time', 'Seconds per api request')
+_hourlyRemaining = metrics.gauge('nexus.remaining.hourly', 'Remaining hourly api requests')
+_dailyRemaining = metrics.gauge('nexus.remaining.daily', 'Remaining daily api requests')
+
 
 class RequestError(HTTPXRequestError):
     def __init__(self, kind: str, request: Request | None = None, response: Response | None = None) -> None:
@@ -72,11 +95,208 @@ class ResponseContentError(ResponseError):
         super().__init__(message)
 
 
+@dataclass
+class RequestBudget:
+    hourlyLimit: int = -1
+    hourlyRemaining: int = -1
+    hourlyReset: float = 0.0
+    dailyLimit: int = -1
+    dailyRemaining: int = -1
+    dailyReset: float = 0.0
+
+    @property
+    def known(self) -> bool:
+        return self.hourlyRemaining >= 0 or self.dailyRemaining >= 0
+
+    @property
+    def remaining(self) -> int:
+        # the hourly allowance stays available after the daily allowance is used up
+        return max(self.hourlyRemaining, self.dailyRemaining)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.hourlyRemaining == 0 and self.dailyRemaining == 0 and time.time() < self.hourlyReset
+
+    def getRate(self, now: float) -> float:
+        """Return the requests per second that use up the remaining allowance until it is reset, or -1 if unknown"""
+        rates = [
+            remaining / (reset - now)
+            for remaining, reset in ((self.hourlyRemaining, self.hourlyReset), (self.dailyRemaining, self.dailyReset))
+            if remaining >= 0 and reset > now
+        ]
+        return max(rates, default=-1)
+
+    def update(self, headers: Headers) -> None:
+        self.hourlyLimit = parseRateLimit(headers, 'x-rl-hourly-limit', self.hourlyLimit)
+        self.hourlyRemaining = parseRateLimit(headers, 'x-rl-hourly-remaining', self.hourlyRemaining)
+        self.hourlyReset = parseRateLimitReset(headers, 'x-rl-hourly-reset', self.hourlyReset)
+        self.dailyLimit = parseRateLimit(headers, 'x-rl-daily-limit', self.dailyLimit)
+        self.dailyRemaining = parseRateLimit(headers, 'x-rl-daily-remaining', self.dailyRemaining)
+        self.dailyReset = parseRateLimitReset(headers, 'x-rl-daily-reset', self.dailyReset)
+
+
+@dataclass
+class RequestStatus:
+    queued: int
+    running: int
+    budget: RequestBudget
+
+
+class RequestScheduler:
+    """Paces, limits and retries api requests according to the rate limit headers of the responses"""
+
+    def __init__(
+        self, maxConcurrent: int = 4, rate: float = 5.0, burst: int = 10, retries: int = 3, backoff: float = 1.0,
+        maxDelay: float = 60.0, minRate: float = 1.0
+    ) -> None:
+        self.rate = rate
+        self.maxRate = rate
+        self.minRate = min(minRate, rate)
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.maxDelay = maxDelay
+        self.budget = RequestBudget()
+        self.queued = 0
+        self.running = 0
+        self.retried = 0
+        self.statusCallbacks: list[Callable[[RequestStatus], Any]] = []
+        self._semaphore = asyncio.Semaphore(maxConcurrent)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def status(self) -> RequestStatus:
+        return RequestStatus(self.queued, self.running, self.budget)
+
+    def notifyStatus(self) -> None:
+        status = self.status
+        for callback in self.statusCallbacks:
+            callback(status)
+
+    async def request(self, client: AsyncClient, method: str, url: str, **kwargs: Any) -> Response:
+        """Send a request once a slot and a token are available, retrying rate limited and transient failures"""
+        self.queued += 1
+        self.notifyStatus()
+        waiting = True
+        try:
+            async with self._semaphore:
+                waiting = False
+                self.queued -= 1
+                self.running += 1
+                self.notifyStatus()
+                try:
+                    return await self.send(client, method, url, **kwargs)
+                finally:
+                    self.running -= 1
+        finally:
+            if waiting:
+                self.queued -= 1
+            self.notifyStatus()
+
+    async def send(self, client: AsyncClient, method: str, url: str, **kwargs: Any) -> Response:
+        attempt = 0
+        while True:
+            if self.budget.exhausted:
+                raise RequestLimitReachedError()
+            await self.acquire()
+            retryAfter = 0.0
+            _sentRequests.inc()
+            try:
+                with _requestTime.time():
+                    response = await client.request(method, url, **kwargs)
+            except TransportError as e:
+                if attempt >= self.retries:
+                    raise e
+                logger.bind(name=url).debug(f'Retrying request: {e}')
+            else:
+                self.budget.update(response.headers)
+                self.updateRate()
+                if response.status_code == 429:
+                    _limitedRequests.inc()
+                if self.budget.hourlyRemaining >= 0:
+                    _hourlyRemaining.set(self.budget.hourlyRemaining)
+                if self.budget.dailyRemaining >= 0:
+                    _dailyRemaining.set(self.budget.dailyRemaining)
+                if response.status_code not in (429, 500, 502, 503, 504) or attempt >= self.retries \
+                or response.status_code == 429 and self.budget.exhausted:
+                    return response
+                logger.bind(name=url).debug(f'Retrying request: Status {response.status_code}')
+                retryAfter = parseRateLimit(response.headers, 'retry-after', 0)
+            attempt += 1
+            self.retried += 1
+            _retriedRequests.inc()
+            await asyncio.sleep(self.getDelay(attempt, retryAfter))
+
+    async def acquire(self) -> None:
+        # waiting requests queue up on the lock, so tokens are handed out in order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def updateRate(self) -> None:
+        # the allowance is spread over the time until it is reset, the floor keeps interactive requests responsive
+        rate = self.budget.getRate(time.time())
+        if rate >= 0:
+            self.rate = max(self.minRate, min(self.maxRate, rate))
+
+    def getDelay(self, attempt: int, retryAfter: float = 0.0) -> float:
+        # full jitter spreads out retries of requests that failed together
+        jitter = random.uniform(0, self.backoff * 2 ** attempt)  # noqa: S311
+        return min(self.maxDelay, max(retryAfter, jitter))
+
+
+def parseRateLimit(headers: Headers, name: str, default: int) -> int:
+    try:
+        return int(headers[name])
+    except (KeyError, ValueError):
+        return default
+
+
+def parseRateLimitReset(headers: Headers, name: str, default: float) -> float:
+    value = headers.get(name, '')
+    for parse in (lambda: datetime.strptime(value, '%Y-%m-%d %H:%M:%S %z'), lambda: datetime.fromisoformat(value)):
+        try:
+            return parse().timestamp()
+        except ValueError:
+            pass
+    return default
+
+
+__scheduler = RequestScheduler()
+
+
+def getScheduler() -> RequestScheduler:
+    return __scheduler
+
+
+def setScheduler(scheduler: RequestScheduler) -> None:
+    global __scheduler  # noqa: PLW0603
+    scheduler.statusCallbacks.extend(__scheduler.statusCallbacks)
+    __scheduler = scheduler
+
+
 async def closeSession() -> None:
+    logger.debug(
+        f'Nexus response cache: {__cache.hits} hits, {__cache.misses} misses, {__cache.coalesced} coalesced'
+    )
+    __cache.flush()
     if __session:
         await __session.aclose()
 
 
+def setSession(session: AsyncClient | None) -> None:
+    global __session  # noqa: PLW0603
+    __session = session
+
+
 def getSession() -> AsyncClient:
     global __session  # noqa: PLW0603
     if not __session:
@@ -89,6 +309,22 @@ def getSession() -> AsyncClient:
     return __session
 
 
+def getResponseCache() -> ResponseCache:
+    return __cache
+
+
+def setCachePath(path: Path | None) -> None:
+    __cache.setPath(path)
+
+
+def getAPIKey() -> str:
+    settings = QSettings()
+    apikey = str(settings.value('nexusAPIKey', ''))
+    if not apikey:
+        raise NoAPIKeyError()
+    return apikey
+
+
 def getModId(url: str) -> int:
     if not isValidNexusModsUrl(url):
         return 0
@@ -107,7 +343,8 @@ async def getUserInformation(apikey: str) -> dict[Any, Any]:
     if not apikey:
         raise NoAPIKeyError()
     try:
-        user: Response = await getSession().get(
+        user: Response = await __scheduler.request(
+            getSession(), 'GET',
             f'{__userUrl}/validate.json', headers={
                 'apikey'.encode('ascii'): apikey.strip().encode('ascii', 'backslashreplace')},
             timeout=5.0
@@ -133,12 +370,15 @@ async def getUserInformation(apikey: str) -> dict[Any, Any]:
 
 
 async def getModInformation(md5hash: str) -> list[Any]:
-    settings = QSettings()
-    apikey = str(settings.value('nexusAPIKey', ''))
-    if not apikey:
-        raise NoAPIKeyError()
+    apikey = getAPIKey()
+    return await __cache.get(  # type: ignore
+        'md5_search', md5hash, lambda: __fetchModInformation(md5hash, apikey))
+
+
+async def __fetchModInformation(md5hash: str, apikey: str) -> list[Any]:
     try:
-        info: Response = await getSession().get(
+        info: Response = await __scheduler.request(
+            getSession(), 'GET',
             f'{__modsUrl}/md5_search/{md5hash}.json',
             headers={
                 'apikey'.encode('ascii'): apikey.strip().encode('ascii', 'backslashreplace')},
@@ -165,12 +405,15 @@ async def getModInformation(md5hash: str) -> list[Any]:
 
 
 async def getModFiles(modid: int) -> dict[Any, Any]:
-    settings = QSettings()
-    apikey = str(settings.value('nexusAPIKey', ''))
-    if not apikey:
-        raise NoAPIKeyError()
+    apikey = getAPIKey()
+    return await __cache.get(  # type: ignore
+        'files', str(modid), lambda: __fetchModFiles(modid, apikey))
+
+
+async def __fetchModFiles(modid: int, apikey: str) -> dict[Any, Any]:
     try:
-        files: Response = await getSession().get(
+        files: Response = await __scheduler.request(
+            getSession(), 'GET',
             f'{__modsUrl}/{modid}/files.json',
             headers={
                 'apikey'.encode('ascii'): apikey.strip().encode('ascii', 'backslashreplace')},
@@ -199,12 +442,16 @@ async def getModFiles(modid: int) -> dict[Any, Any]:
 
 
 async def getModFileUrls(modid: int, fileid: int) -> list[Any]:
-    settings = QSettings()
-    apikey = str(settings.value('nexusAPIKey', ''))
-    if not apikey:
-        raise NoAPIKeyError()
+    apikey = getAPIKey()
+    user = hashlib.blake2b(apikey.encode('utf-8'), digest_size=8).hexdigest()
+    return await __cache.get(  # type: ignore
+        'download_link', f'{user}:{modid}:{fileid}', lambda: __fetchModFileUrls(modid, fileid, apikey))
+
+
+async def __fetchModFileUrls(modid: int, fileid: int, apikey: str) -> list[Any]:
     try:
-        files: Response = await getSession().get(
+        files: Response = await __scheduler.request(
+            getSession(), 'GET',
             f'{__modsUrl}/{modid}/files/{fileid}/download_link.json',
             headers={
                 'apikey'.encode('ascii'): apikey.strip().encode('ascii', 'backslashreplace')},
@@ -232,38 +479,30 @@ async def getModFileUrls(modid: int, fileid: int) -> list[Any]:
     return json  # type: ignore
 
 
-async def downloadFile(url: str, target: Path) -> None:
-    settings = QSettings()
-    apikey = settings.value('nexusAPIKey', '')
-    if not apikey:
-        raise NoAPIKeyError()
-    await asyncio.get_running_loop().run_in_executor(
-        None,
-        partial(downloadFileSync, url, target, str(apikey))
-    )
-
-
-def downloadFileSync(url: str, target: Path, apikey: str) -> None:
+async def downloadFile(
+    url: str, target: Path, progress: ProgressCallback | None = None, limiter: BandwidthLimiter | None = None,
+    key: str = ''
+) -> str:
+    apikey = getAPIKey()
     try:
-        with target.open('wb') as file, stream(
-            'GET',
+        # the md5 hash is computed while downloading, saving a second read of the archive
+        return await Downloader(getSession(), limiter=limiter).download(
             url,
-            headers={
-            'apikey'.encode('ascii'): apikey.strip().encode('ascii', 'backslashreplace')},
-            timeout=250.0
-        ) as download:
-            if download.status_code == 429:
-                raise RequestLimitReachedError()
-            if download.status_code == 404:
-                raise NotFoundError(f'No file with URL {url} found')
-            if download.status_code == 403:
-                raise NoPremiumMembershipException()
-            if download.status_code == 401:
-                raise UnauthorizedError()
-            if download.status_code != 200:
-                raise ResponseError(f'Unexpected response: Status {download.status_code}')
-            for data in download.iter_bytes():
-                file.write(data)
+            target,
+            headers={'apikey': apikey.strip().encode('ascii', 'backslashreplace').decode('ascii')},
+            progress=progress,
+            key=key
+        )
+    except DownloadResponseError as e:
+        if e.status == 429:
+            raise RequestLimitReachedError() from e
+        if e.status == 404:
+            raise NotFoundError(f'No file with URL {url} found') from e
+        if e.status == 403:
+            raise NoPremiumMembershipException() from e
+        if e.status == 401:
+            raise UnauthorizedError() from e
+        raise ResponseError(str(e)) from e
     except HTTPStatusError as e:
         raise RequestError(request=e.request, response=e.response, kind=str(e)) from e
     except HTTPXRequestError as e:
@@ -0,0 +1,144 @@
+"""On-disk cache of web API responses with per-endpoint lifetimes and request coalescing"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from dataclasses_json import DataClassJsonMixin
+from loguru import logger
+
+
+@dataclass
+class ResponseCacheEntry(DataClassJsonMixin):
+    time: float
+    data: Any
+
+
+class ResponseCache:
+    """Caches json responses per endpoint, sharing identical in-flight requests between callers"""
+
+    def __init__(self, path: Path | None = None, ttl: dict[str, float] | None = None) -> None:
+        self.path = path
+        self.ttl = ttl or {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: dict[str, dict[str, ResponseCacheEntry]] = {}
+        self._pending: dict[tuple[str, str], asyncio.Task[Any]] = {}
+        self._dirty: set[str] = set()
+        self._writeHandle: asyncio.TimerHandle | None = None
+        self.writeInterval = 2.0
+
+    def setPath(self, path: Path | None) -> None:
+        self.flush()
+        self.path = path
+        self._entries.clear()
+
+    def getFile(self, endpoint: str) -> Path | None:
+        return self.path.joinpath(f'{endpoint}.json') if self.path else None
+
+    def entries(self, endpoint: str) -> dict[str, ResponseCacheEntry]:
+        if endpoint not in self._entries:
+            self._entries[endpoint] = {}
+            file = self.getFile(endpoint)
+            if file:
+                try:
+                    self._entries[endpoint] = {
+                        key: ResponseCacheEntry.from_dict(entry)
+                        for key, entry in json.loads(file.read_text(encoding='utf-8')).items()
+                    }
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.bind(path=file).warning(f'Could not read response cache: {e}')
+        return self._entries[endpoint]
+
+    def write(self, endpoint: str) -> None:
+        if not self.path:
+            return
+        # writes are coalesced while the event loop runs, so bursts of responses write every endpoint once
+        self._dirty.add(endpoint)
+        if self._writeHandle is not None:
+            return
+        try:
+            self._writeHandle = asyncio.get_running_loop().call_later(self.writeInterval, self.flush)
+        except RuntimeError:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._writeHandle is not None:
+            self._writeHandle.cancel()
+            self._writeHandle = None
+        dirty = sorted(self._dirty)
+        self._dirty.clear()
+        for endpoint in dirty:
+            self.writeEndpoint(endpoint)
+
+    def writeEndpoint(self, endpoint: str) -> None:
+        file = self.getFile(endpoint)
+        if not file:
+            return
+        # expired entries are dropped whenever the endpoint is written
+        now = time.time()
+        ttl = self.ttl.get(endpoint, 0)
+        entries = self.entries(endpoint)
+        for key in [key for key, entry in entries.items() if now - entry.time >= ttl]:
+            del entries[key]
+        try:
+            file.parent.mkdir(parents=True, exist_ok=True)
+            file.write_text(json.dumps({key: entry.to_dict() for key, entry in entries.items()}), encoding='utf-8')
+        except OSError as e:
+            logger.bind(path=file).warning(f'Could not write response cache: {e}')
+
+    def lookup(self, endpoint: str, key: str) -> ResponseCacheEntry | None:
+        entry = self.entries(endpoint).get(key)
+        if entry and time.time() - entry.time < self.ttl.get(endpoint, 0):
+            return entry
+        return None
+
+    def put(self, endpoint: str, key: str, data: Any) -> None:
+        if self.ttl.get(endpoint, 0) <= 0:
+            return
+        self.entries(endpoint)[key] = ResponseCacheEntry(time.time(), data)
+        self.write(endpoint)
+
+    def invalidate(self, endpoint: str | None = None) -> None:
+        for name in [endpoint] if endpoint else list(self.ttl):
+            self._entries[name] = {}
+            self._dirty.discard(name)
+            file = self.getFile(name)
+            if file:
+                file.unlink(missing_ok=True)
+
+    async def get(self, endpoint: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached response for the key, or fetch it once for all concurrent callers"""
+        entry = self.lookup(endpoint, key)
+        if entry:
+            self.hits += 1
+            return entry.data
+        pending = self._pending.get((endpoint, key))
+        if pending:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+
+        async def request() -> Any:
+            try:
+                data = await fetch()
+                self.put(endpoint, key, data)
+                return data
+            finally:
+                del self._pending[(endpoint, key)]
+
+        task = asyncio.create_task(request())
+        task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        self._pending[(endpoint, key)] = task
+        # shielding keeps the request running for the other callers if the first one is cancelled
+        return await asyncio.shield(task)
@@ -0,0 +1,159 @@
+"""Checks installed mods for newer files, requesting the file listing of each Nexus Mods mod once"""
+
+from __future__ import annotations
+
+from w3modmanager.domain.mod.mod import Mod
+
+import asyncio
+import json
+import time
+
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from dataclasses_json import DataClassJsonMixin
+from loguru import logger
+
+
+FilesFunction = Callable[[int], Awaitable[dict[Any, Any]]]
+
+# files in these categories are kept on the site for reference and are never offered as updates
+ignoredCategories = ('OLD_VERSION', 'ARCHIVED', 'DELETED', 'REMOVED')
+
+
+@dataclass
+class UpdateFile(DataClassJsonMixin):
+    fileid: int
+    name: str = ''
+    version: str = ''
+    category: str = ''
+    uploaded: float = 0.0
+
+
+@dataclass
+class ModUpdate(DataClassJsonMixin):
+    filename: str
+    modid: int
+    fileid: int
+    version: str = ''
+    files: list[UpdateFile] = field(default_factory=list)
+
+    @property
+    def newest(self) -> UpdateFile:
+        return self.files[0]
+
+
+class UpdateChecker:
+    """Compares installed mods with the files available on Nexus Mods and keeps the results between sessions"""
+
+    def __init__(self, path: Path, files: FilesFunction) -> None:
+        self.path = path
+        self.files = files
+        self.checked = 0.0
+        self.updates: dict[str, ModUpdate] = {}
+        self.running = False
+        self.read()
+
+    def __len__(self) -> int:
+        return len(self.updates)
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.updates
+
+    def read(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+            self.checked = float(data['checked'])
+            self.updates = {
+                filename: ModUpdate.from_dict(update) for filename, update in data['updates'].items()
+            }
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.bind(path=self.path).warning(f'Could not read update check results: {e}')
+
+    def write(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps({
+                'checked': self.checked,
+                'updates': {filename: update.to_dict() for filename, update in self.updates.items()},
+            }), encoding='utf-8')
+        except OSError as e:
+            logger.bind(path=self.path).warning(f'Could not write update check results: {e}')
+
+    def due(self, interval: float) -> bool:
+        return not self.running and time.time() - self.checked >= interval
+
+    async def check(self, mods: Iterable[Mod]) -> dict[str, ModUpdate]:
+        """Check the given mods for newer files, returns the available updates keyed by mod filename"""
+        # mods installed from different files of the same Nexus Mods mod share a single file listing request
+        groups: dict[int, list[Mod]] = {}
+        for mod in mods:
+            if mod.modid > 0 and mod.fileid > 0:
+                groups.setdefault(mod.modid, []).append(mod)
+        self.running = True
+        try:
+            responses = await asyncio.gather(*[self.files(modid) for modid in groups], return_exceptions=True)
+        finally:
+            self.running = False
+        updates: dict[str, ModUpdate] = {}
+        for (modid, group), response in zip(groups.items(), responses, strict=True):
+            if isinstance(response, BaseException):
+                logger.bind(name=group[0].package or group[0].filename).warning(
+                    f'Could not check for updates: {response}')
+                continue
+            for mod in group:
+                self.updates.pop(mod.filename, None)
+                try:
+                    files = findNewerFiles(mod, response)
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.bind(name=mod.filename).warning(f'Could not read file listing response: {e}')
+                    continue
+                if files:
+                    updates[mod.filename] = self.updates[mod.filename] = ModUpdate(
+                        mod.filename, modid, mod.fileid, mod.version, files)
+        self.checked = time.time()
+        self.write()
+        return updates
+
+    def remove(self, filename: str) -> None:
+        if self.updates.pop(filename, None):
+            self.write()
+
+
+def findNewerFiles(mod: Mod, response: dict[Any, Any]) -> list[UpdateFile]:
+    """Find the files replacing the installed file of a mod, newest first"""
+    files = {
+        int(file['file_id']): UpdateFile(
+            int(file['file_id']),
+            str(file.get('name', '')),
+            str(file.get('version', '')),
+            str(file.get('category_name', '')),
+            float(file.get('uploaded_timestamp', 0)),
+        ) for file in response['files']
+    }
+    # follow the update chain the author declared for the installed file
+    successors: dict[int, list[int]] = {}
+    for update in response.get('file_updates', []):
+        successors.setdefault(int(update['old_file_id']), []).append(int(update['new_file_id']))
+    newer: set[int] = set()
+    pending = list(successors.get(mod.fileid, []))
+    while pending:
+        fileid = pending.pop()
+        if fileid not in newer and fileid != mod.fileid:
+            newer.add(fileid)
+            pending.extend(successors.get(fileid, []))
+    # without a declared chain, later main files with a different version replace an installed main file
+    installed = files.get(mod.fileid)
+    if not newer and installed and installed.category == 'MAIN':
+        newer = {
+            file.fileid for file in files.values()
+            if file.category == 'MAIN' and file.uploaded > installed.uploaded and file.version != installed.version
+        }
+    return sorted(
+        (files[fileid] for fileid in newer if fileid in files and files[fileid].category not in ignoredCategories),
+        key=lambda file: file.uploaded, reverse=True
+    )
@@ -0,0 +1,291 @@
+"""Headless command line interface for bulk mod operations, emitting JSON Lines"""
+
+from __future__ import annotations
+
+import w3modmanager
+
+import asyncio
+import json
+import sys
+import time
+
+from argparse import ArgumentParser, Namespace
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, TypeVar, cast
+
+from loguru import logger
+
+
+if TYPE_CHECKING:
+    from w3modmanager.core.cache import ArchiveCache
+    from w3modmanager.core.model import Model
+    from w3modmanager.core.pipeline import InstallPipeline
+    from w3modmanager.domain.mod.mod import Mod
+
+    from PySide6.QtCore import QSettings
+
+
+T = TypeVar('T')
+
+
+class Output:
+    """Writes one JSON object per line and counts the results"""
+
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self.succeeded = 0
+        self.failed = 0
+
+    def emit(self, **record: Any) -> None:
+        if 'ok' in record:
+            if record['ok']:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        self.stream.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+
+def createParser() -> ArgumentParser:
+    argp = ArgumentParser(
+        prog=f'{w3modmanager.NAME} cli',
+        description=f'{w3modmanager.SUBTITLE} - headless mode, results are written as JSON Lines')
+    argp.add_argument(
+        '-g', '--game-path', type=str, default='',
+        help='game installation path, defaults to the configured path')
+    argp.add_argument(
+        '-s', '--config-path', type=str, default='',
+        help='game config path, defaults to the configured path')
+    argp.add_argument(
+        '-c', '--cache-path', type=str, default='',
+        help='cache path, defaults to the application data directory')
+    argp.add_argument(
+        '-b', '--batch', type=int, default=8,
+        help='number of operations to run concurrently')
+    argp.add_argument(
+        '--verbose', default=False, action='store_true',
+        help='write debug log messages to stderr')
+    argp.add_argument(
+        '--metrics', default=False, action='store_true',
+        help='emit the runtime metrics of the command before the summary')
+    argp.add_argument(
+        '--metrics-file', type=Path, default=None, metavar='path',
+        help='write the runtime metrics of the command as JSON to the path')
+    commands = argp.add_subparsers(dest='command', required=True, metavar='command')
+    install = commands.add_parser('install', help='install mods from archives or directories')
+    install.add_argument('paths', nargs='+', type=Path, help='archives or directories to install')
+    install.add_argument(
+        '--deep', default=False, action='store_true', help='search for mods in deeply nested directories')
+    for name, description in (('remove', 'remove'), ('enable', 'enable'), ('disable', 'disable')):
+        command = commands.add_parser(name, help=f'{description} installed mods')
+        command.add_argument(
+            'mods', nargs='+', type=str, help='mod filenames, optionally prefixed with the target, e.g. dlc:name')
+    commands.add_parser('list', help='list installed mods')
+    commands.add_parser('conflicts', help='list conflicting bundled and script files of enabled mods')
+    commands.add_parser('verify', help='check that the files of installed mods are present')
+    return argp
+
+
+def getSettings() -> QSettings:
+    # the settings are shared with the graphical interface, but only QtCore is needed to read them
+    from PySide6.QtCore import QCoreApplication, QSettings
+    QCoreApplication.setOrganizationName(w3modmanager.ORG_NAME)
+    QCoreApplication.setOrganizationDomain(w3modmanager.ORG_URL)
+    QCoreApplication.setApplicationName(w3modmanager.TITLE)
+    return QSettings()
+
+
+def getConfiguredPaths(args: Namespace, settings: QSettings) -> tuple[Path, Path, Path]:
+    gamePath, configPath = args.game_path, args.config_path
+    if not gamePath or not configPath:
+        gamePath = gamePath or str(settings.value('gamePath', ''))
+        configPath = configPath or str(settings.value('configPath', ''))
+    cachePath = args.cache_path
+    if not cachePath:
+        import appdirs
+        cachePath = appdirs.user_data_dir(w3modmanager.NAME, w3modmanager.ORG_NAME)
+    return Path(gamePath), Path(configPath), Path(cachePath)
+
+
+def getConfiguredCache(model: Model, settings: QSettings) -> ArchiveCache | None:
+    # installs use the archive cache the same way as the graphical interface
+    if settings.value('cacheArchives', 'True') != 'True':
+        return None
+    cache = model.archiveCache
+    cache.keepExtracted = settings.value('cacheExtractedArchives', 'False') == 'True'
+    cache.maxSize = cast(int, settings.value('cacheMaxSize', 4, int)) * 1024 ** 3
+    return cache
+
+
+async def runBatched(
+    items: Iterable[T], batch: int, operation: Callable[[T], Awaitable[None]]
+) -> None:
+    # operations of a batch run concurrently, the model serializes its own updates
+    items = list(items)
+    for start in range(0, len(items), max(1, batch)):
+        await asyncio.gather(*[operation(item) for item in items[start:start + batch]])
+
+
+def findMod(model: Model, name: str) -> Mod | None:
+    target, _, filename = name.rpartition(':')
+    for mod in model.values():
+        if mod.filename == filename and (not target or mod.target == target):
+            return mod
+    return None
+
+
+def describeMod(mod: Mod) -> dict[str, Any]:
+    return {
+        'filename': mod.filename,
+        'package': mod.package,
+        'target': mod.target,
+        'datatype': mod.datatype,
+        'enabled': mod.enabled,
+        'priority': mod.priority,
+        'version': mod.version,
+        'modid': mod.modid,
+        'fileid': mod.fileid,
+        'md5hash': mod.md5hash,
+        'size': mod.size,
+        'installdate': mod.installdate.isoformat(),
+    }
+
+
+async def installPath(
+    model: Model, pipeline: InstallPipeline, path: Path, deep: bool, output: Output, cache: ArchiveCache | None
+) -> None:
+    from w3modmanager.core.errors import InvalidPathError, ModelError, ModError
+
+    source = path if path.is_file() else None
+    installed: list[str] = []
+    errors: list[str] = []
+    try:
+        async with pipeline.job(path, cache=cache) as job:
+            mods = await job.read(searchlimit=0 if deep else 8)
+            md5hash = await job.getHash()
+            for mod in mods:
+                mod.md5hash = md5hash
+                try:
+                    await pipeline.add(mod)
+                except (ModelError, ModError) as e:
+                    errors.append(f'{mod.filename}: {e}')
+                    continue
+                if source:
+                    mod.source = source
+                    await model.update(mod)
+                installed.append(mod.filename)
+    except (ModelError, InvalidPathError) as e:
+        errors.append(e.message)
+    except OSError as e:
+        errors.append(e.strerror or str(e))
+    except Exception as e:
+        logger.exception(str(e))
+        errors.append(str(e))
+    output.emit(command='install', path=str(source or path), ok=bool(installed) and not errors,
+                installed=installed, errors=errors)
+
+
+async def changeMod(model: Model, command: str, name: str, output: Output) -> None:
+    mod = findMod(model, name)
+    if not mod:
+        output.emit(command=command, mod=name, ok=False, error='Mod not found')
+        return
+    try:
+        if command == 'remove':
+            await model.remove(mod)
+            ok = (mod.filename, mod.target) not in model
+        elif command == 'enable':
+            ok = mod.enabled or await model.enable(mod)
+        else:
+            ok = not mod.enabled or await model.disable(mod)
+    except Exception as e:
+        output.emit(command=command, mod=name, ok=False, error=str(e))
+        return
+    output.emit(command=command, mod=name, ok=ok, **({} if ok else {'error': f'Could not {command} mod'}))
+
+
+def verifyMod(model: Model, mod: Mod, output: Output) -> None:
+    from w3modmanager.core.errors import ModNotFoundError
+    try:
+        path = model.getModPath(mod, True)
+    except ModNotFoundError:
+        output.emit(command='verify', mod=mod.filename, target=mod.target, ok=False, missing=['.'])
+        return
+    missing = [
+        str(file) for file in [*(file.source for file in mod.files), *(file.source for file in mod.contents)]
+        if not path.joinpath(file).is_file() and not path.joinpath(f'{file}.disabled').is_file()
+    ]
+    output.emit(command='verify', mod=mod.filename, target=mod.target, ok=not missing, missing=missing)
+
+
+def listConflicts(model: Model, output: Output) -> None:
+    from w3modmanager.core.model import ModelConflicts
+    conflicts = ModelConflicts.fromModList(model.data(), 0)
+    for kind, files in (('bundled', conflicts.bundled), ('scripts', conflicts.scripts)):
+        for mod, overridden in files.items():
+            for file, other in overridden.items():
+                output.emit(command='conflicts', kind=kind, mod=mod, file=str(file.source), overriddenBy=other)
+
+
+async def run(args: Namespace, output: Output) -> int:
+    from w3modmanager.core.errors import OtherInstanceError
+    from w3modmanager.core.model import Model
+    from w3modmanager.core.pipeline import InstallPipeline
+
+    settings = getSettings()
+    gamePath, configPath, cachePath = getConfiguredPaths(args, settings)
+    try:
+        # the lock prevents changes while the graphical interface or another cli instance is running
+        model = Model(
+            gamePath, configPath, cachePath, deduplicate=settings.value('deduplicateFiles', 'False') == 'True')
+    except OtherInstanceError as e:
+        output.emit(command=args.command, ok=False, error=f'Another instance is running: {e}')
+        return 2
+    except Exception as e:
+        output.emit(command=args.command, ok=False, error=str(e))
+        return 2
+
+    start = time.perf_counter()
+    try:
+        await model.loadInstalled()
+        if args.command == 'install':
+            pipeline = InstallPipeline(model)
+            cache = getConfiguredCache(model, settings)
+            await runBatched(
+                args.paths, args.batch, lambda path: installPath(model, pipeline, path, args.deep, output, cache))
+            model.setLastUpdateTime(datetime.now(tz=timezone.utc), False)
+        elif args.command in ('remove', 'enable', 'disable'):
+            await runBatched(args.mods, args.batch, lambda name: changeMod(model, args.command, name, output))
+        elif args.command == 'list':
+            for mod in sorted(model.values()):
+                output.emit(command='list', **describeMod(mod))
+        elif args.command == 'conflicts':
+            listConflicts(model, output)
+        elif args.command == 'verify':
+            for mod in sorted(model.values()):
+                verifyMod(model, mod, output)
+        await model.flush()
+    finally:
+        model.close()
+    if args.metrics:
+        output.emit(command='metrics', **model.metrics.snapshot())
+    if args.metrics_file:
+        model.metrics.dump(args.metrics_file)
+    output.emit(
+        command='summary', succeeded=output.succeeded, failed=output.failed,
+        elapsed=round(time.perf_counter() - start, 3))
+    return 1 if output.failed else 0
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = createParser().parse_args(argv)
+    # keep stdout for results, log messages are written to stderr
+    logger.remove()
+    logger.add(sys.stderr, level='DEBUG' if args.verbose else 'WARNING', filter='w3modmanager')
+    return asyncio.run(run(args, Output(sys.stdout)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
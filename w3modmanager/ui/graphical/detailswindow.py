@@ -1,11 +1,39 @@
+from __future__ import annotations
+
 from w3modmanager.core.model import Model
 from w3modmanager.domain.mod.mod import Mod
 
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import fields
+from typing import Any, cast
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtGui import QTextCursor
-from PySide6.QtWidgets import QDialog, QFrame, QGroupBox, QScrollArea, QSizePolicy, QTextEdit, QVBoxLayout, QWidget
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QPoint,
+    QSize,
+    Qt,
+    QTimer,
+)
+from PySide6.QtGui import QColor, QKeyEvent, QKeySequence, QTextCursor
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QDialog,
+    QFrame,
+    QGroupBox,
+    QLineEdit,
+    QListView,
+    QMenu,
+    QScrollArea,
+    QSizePolicy,
+    QTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
 
 
 class DetailsWindow(QDialog):
@@ -48,87 +76,28 @@ class DetailsWindow(QDialog):
         self.info.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
         gbInfoLayout.addWidget(self.info)
 
+        self.fileLists: list[FileList] = []
+
         contentFiles = mod.contentFiles
         if contentFiles:
-            gbContents = QGroupBox('Content')
-            gbContents.setMinimumHeight(160)
-            gbContents.setSizePolicy(QSizePolicy.Policy.MinimumExpanding, QSizePolicy.Policy.MinimumExpanding)
-            innerLayout.addWidget(gbContents)
-            gbContentsLayout = QVBoxLayout(gbContents)
-
-            self.contents = QTextEdit(gbContents)
-            self.contents.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
-            self.contents.setReadOnly(True)
-            self.contents.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
-            for contentFile in contentFiles:
-                self.contents.append(f'{contentFile.source}')
-            self.contents.moveCursor(QTextCursor.MoveOperation.Start)
-            self.contents.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
-            self.contents.verticalScrollBar().setValue(self.contents.verticalScrollBar().minimum())
-            gbContentsLayout.addWidget(self.contents)
+            self.contents = self.addFileList(
+                innerLayout, 'Content', contentFiles, lambda file: str(file.source))
 
         scriptFiles = mod.scriptFiles
         if scriptFiles:
-            gbScripts = QGroupBox('Scripts')
-            gbScripts.setMinimumHeight(160)
-            innerLayout.addWidget(gbScripts)
-            innerLayout.setStretchFactor(gbScripts, 2)
-            gbScriptsLayout = QVBoxLayout(gbScripts)
-
-            self.scripts = QTextEdit(gbScripts)
-            self.scripts.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
-            self.scripts.setReadOnly(True)
-            self.scripts.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
-            conflicting = mod.filename in model.conflicts.scripts
-            if conflicting:
-                scriptFiles = sorted(scriptFiles, key=lambda file: file not in model.conflicts.scripts[mod.filename])
-            for scriptFile in scriptFiles:
-                if conflicting and scriptFile in model.conflicts.scripts[mod.filename]:
-                    conflict = model.conflicts.scripts[mod.filename][scriptFile]
-                    self.scripts.append(f'{scriptFile} <span style="color: #e94600;">conflicting with \
-                                        <strong>{conflict}</strong></span>')
-                else:
-                    self.scripts.append(f'{scriptFile}')
-            self.scripts.moveCursor(QTextCursor.MoveOperation.Start)
-            self.scripts.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
-            self.scripts.verticalScrollBar().setValue(self.scripts.verticalScrollBar().minimum())
-            gbScriptsLayout.addWidget(self.scripts)
+            self.scripts = self.addFileList(
+                innerLayout, 'Scripts', scriptFiles, str,
+                model.conflicts.scripts.get(mod.filename), 'conflicting with', QColor('#e94600'))
 
         menuFiles = mod.menuFiles
         if menuFiles:
-            gbMenus = QGroupBox('Menus')
-            gbMenus.setMinimumHeight(160)
-            innerLayout.addWidget(gbMenus)
-            gbMenusLayout = QVBoxLayout(gbMenus)
-
-            self.menus = QTextEdit(gbMenus)
-            self.menus.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
-            self.menus.setReadOnly(True)
-            self.menus.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
-            for menuFile in menuFiles:
-                self.menus.append(f'{menuFile.target} <span style="color: #888">({menuFile.source})</span>')
-            self.menus.moveCursor(QTextCursor.MoveOperation.Start)
-            self.menus.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
-            self.menus.verticalScrollBar().setValue(self.menus.verticalScrollBar().minimum())
-            gbMenusLayout.addWidget(self.menus)
+            self.menus = self.addFileList(
+                innerLayout, 'Menus', menuFiles, lambda file: f'{file.target}  ({file.source})')
 
         binFiles = mod.binFiles
         if binFiles:
-            gbFiles = QGroupBox('Bins')
-            gbFiles.setMinimumHeight(160)
-            innerLayout.addWidget(gbFiles)
-            gbFilesLayout = QVBoxLayout(gbFiles)
-
-            self.files = QTextEdit(gbFiles)
-            self.files.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
-            self.files.setReadOnly(True)
-            self.files.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
-            for binFile in binFiles:
-                self.files.append(f'{binFile.target} <span style="color: #888">({binFile.source})</span>')
-            self.files.moveCursor(QTextCursor.MoveOperation.Start)
-            self.files.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
-            self.files.verticalScrollBar().setValue(self.files.verticalScrollBar().minimum())
-            gbFilesLayout.addWidget(self.files)
+            self.files = self.addFileList(
+                innerLayout, 'Bins', binFiles, lambda file: f'{file.target}  ({file.source})')
 
         settings = mod.settings
         if settings:
@@ -180,31 +149,9 @@ class DetailsWindow(QDialog):
 
         bundled = mod.bundledFiles
         if bundled:
-            gbBundled = QGroupBox('Bundled')
-            gbBundled.setMinimumHeight(160)
-            innerLayout.addWidget(gbBundled)
-            innerLayout.setStretchFactor(gbBundled, 2)
-            gbBundledLayout = QVBoxLayout(gbBundled)
-
-            self.bundled = QTextEdit(gbBundled)
-            self.bundled.setTextInteractionFlags(Qt.TextInteractionFlag.NoTextInteraction)
-            self.bundled.setReadOnly(True)
-            self.bundled.setLineWrapMode(QTextEdit.LineWrapMode.WidgetWidth)
-            conflicting = mod.filename in model.conflicts.bundled
-            if conflicting:
-                bundled = sorted(bundled, key=lambda file: file not in model.conflicts.bundled[mod.filename])
-            for bundledFile in bundled:
-                if conflicting and bundledFile in model.conflicts.bundled[mod.filename]:
-                    conflict = model.conflicts.bundled[mod.filename][bundledFile]
-                    self.bundled.append(f'<span style="color: #888">{bundledFile.source}:</span> {bundledFile.bundled}\
-                        </span> <span style="color: #9a6700;">overridden by <strong>{conflict}</strong></span>')
-                else:
-                    self.bundled.append(f'<span style="color: #888">{bundledFile.source}:</span> \
-                        <span>{bundledFile.bundled}</span>')
-            self.bundled.moveCursor(QTextCursor.MoveOperation.Start)
-            self.bundled.setSizeAdjustPolicy(QTextEdit.SizeAdjustPolicy.AdjustToContents)
-            self.bundled.verticalScrollBar().setValue(self.bundled.verticalScrollBar().minimum())
-            gbBundledLayout.addWidget(self.bundled)
+            self.bundled = self.addFileList(
+                innerLayout, 'Bundled', bundled, lambda file: f'{file.source}: {file.bundled}',
+                model.conflicts.bundled.get(mod.filename), 'overridden by', QColor('#9a6700'))
 
         readmes = mod.readmeFiles
         if readmes:
@@ -235,3 +182,176 @@ class DetailsWindow(QDialog):
             QScrollArea {border: none; background: transparent;}
             QFrame {border: none; background: transparent;}
         ''')
+
+    def addFileList(
+        self, layout: QVBoxLayout, title: str, files: Sequence[Any], formatter: Callable[[Any], str],
+        conflicts: dict[Any, str] | None = None, relation: str = '', color: QColor | None = None
+    ) -> FileList:
+        group = QGroupBox(f'{title} ({len(files)})')
+        group.setMinimumHeight(200)
+        layout.addWidget(group)
+        layout.setStretchFactor(group, 2)
+        groupLayout = QVBoxLayout(group)
+        fileList = FileList(group, FileListModel(files, formatter, conflicts, relation, color))
+        groupLayout.addWidget(fileList)
+        self.fileLists.append(fileList)
+        return fileList
+
+
+class FileListModel(QAbstractListModel):
+    """File entries of a details section, formatted and loaded in batches while scrolling"""
+
+    batchSize = 500
+
+    def __init__(
+        self, files: Sequence[Any], formatter: Callable[[Any], str],
+        conflicts: dict[Any, str] | None = None, relation: str = '', color: QColor | None = None
+    ) -> None:
+        super().__init__()
+        self._files = files
+        self._format = formatter
+        # conflicting files are listed first, followed by the other files in their original order
+        self._conflicts = conflicts or {}
+        self._pinned = list(self._conflicts)
+        self._relation = relation
+        self._color = color
+        self._rows: list[Any] = []
+        self._position = 0
+        self._fetching = False
+        self._filter = ''
+
+    def rowCount(self, parent: QModelIndex | QPersistentModelIndex | None = None) -> int:
+        return 0 if parent is not None and parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex | QPersistentModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return self.text(self._rows[index.row()])
+        if role == Qt.ItemDataRole.ForegroundRole and self._color and self._rows[index.row()] in self._conflicts:
+            return self._color
+        return None
+
+    def text(self, file: Any) -> str:
+        if file in self._conflicts:
+            return f'{self._format(file)}  {self._relation} {self._conflicts[file]}'
+        return self._format(file)
+
+    def candidates(self, start: int = 0) -> Iterator[tuple[int, Any]]:
+        """The listed files from the position start on, with the position following each file"""
+        pinned = len(self._pinned)
+        for position in range(start, pinned + len(self._files)):
+            if position < pinned:
+                yield position + 1, self._pinned[position]
+                continue
+            file = self._files[position - pinned]
+            if not self._conflicts or file not in self._conflicts:
+                yield position + 1, file
+
+    def matches(self, file: Any) -> bool:
+        return not self._filter or self._filter in self.text(file).casefold()
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        return not parent.isValid() and self._position < len(self._pinned) + len(self._files)
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        # views can ask for more rows while being notified about inserted or reset rows
+        if parent.isValid() or self._fetching:
+            return
+        rows = self.fetchRows()
+        if rows:
+            self._fetching = True
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+            self._fetching = False
+
+    def fetchRows(self) -> list[Any]:
+        rows: list[Any] = []
+        for position, file in self.candidates(self._position):
+            self._position = position
+            if self.matches(file):
+                rows.append(file)
+                if len(rows) >= self.batchSize:
+                    return rows
+        self._position = len(self._pinned) + len(self._files)
+        return rows
+
+    def setFilter(self, text: str) -> None:
+        text = text.strip().casefold()
+        if text == self._filter:
+            return
+        self._fetching = True
+        self.beginResetModel()
+        self._filter = text
+        self._position = 0
+        self._rows = self.fetchRows()
+        self.endResetModel()
+        self._fetching = False
+
+    def texts(self, rows: Iterable[int] | None = None) -> list[str]:
+        """Text of the given rows, or of all files matching the filter including files that are not loaded yet"""
+        if rows is not None:
+            return [self.text(self._rows[row]) for row in rows]
+        return [self.text(file) for _, file in self.candidates() if self.matches(file)]
+
+
+class FileList(QWidget):
+    """Filterable list of file entries with uniform row heights, copying selected or all entries"""
+
+    def __init__(self, parent: QWidget, model: FileListModel) -> None:
+        super().__init__(parent)
+        self.model = model
+        self.model.setParent(self)
+        self.model.fetchMore(QModelIndex())
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(5)
+
+        self.filter = QLineEdit(self)
+        self.filter.setPlaceholderText('Filter...')
+        self.filter.setClearButtonEnabled(True)
+        layout.addWidget(self.filter)
+
+        self.list = QListView(self)
+        self.list.setModel(self.model)
+        self.list.setUniformItemSizes(True)
+        self.list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.list.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.list.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.list.customContextMenuRequested.connect(self.showContextMenu)
+        self.list.installEventFilter(self)
+        layout.addWidget(self.list)
+
+        # filtering formats the files, wait for typing to pause
+        self.filterTimer = QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(150)
+        self.filterTimer.timeout.connect(lambda: self.model.setFilter(self.filter.text()))
+        self.filter.textChanged.connect(lambda: self.filterTimer.start())
+
+    def eventFilter(self, obj: QObject, event: QEvent) -> bool:
+        if obj is self.list and event.type() == QEvent.Type.KeyPress \
+                and cast(QKeyEvent, event).matches(QKeySequence.StandardKey.Copy):
+            self.copySelected()
+            return True
+        return super().eventFilter(obj, event)
+
+    def copySelected(self) -> None:
+        rows = sorted(index.row() for index in self.list.selectionModel().selectedRows())
+        if rows:
+            QApplication.clipboard().setText('\n'.join(self.model.texts(rows)))
+
+    def copyAll(self) -> None:
+        QApplication.clipboard().setText('\n'.join(self.model.texts()))
+
+    def showContextMenu(self, pos: QPoint) -> None:
+        menu = QMenu(self)
+        actionCopy = menu.addAction('&Copy')
+        actionCopy.setEnabled(self.list.selectionModel().hasSelection())
+        actionCopy.triggered.connect(self.copySelected)
+        actionCopyAll = menu.addAction('Copy &All')
+        actionCopyAll.triggered.connect(self.copyAll)
+        menu.popup(self.list.viewport().mapToGlobal(pos))
@@ -0,0 +1,114 @@
+from w3modmanager.util.metrics import MetricsRegistry
+from w3modmanager.util.util import getTitleString
+
+from pathlib import Path
+from typing import Any
+
+from PySide6.QtCore import QSize, Qt, QTimer
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QApplication,
+    QDialog,
+    QFileDialog,
+    QHBoxLayout,
+    QPushButton,
+    QSizePolicy,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+
+def formatMetric(kind: str, value: Any) -> str:
+    if kind == 'histograms':
+        if not value['count']:
+            return 'no observations'
+        return f'{value["count"]} times, mean {value["mean"] * 1000:.1f} ms, ' \
+            f'min {value["min"] * 1000:.1f} ms, max {value["max"] * 1000:.1f} ms'
+    return f'{value:g}'
+
+
+class DiagnosticsWindow(QDialog):
+    def __init__(self, parent: QWidget | None, metrics: MetricsRegistry) -> None:
+        super().__init__(parent)
+
+        self.metrics = metrics
+
+        if parent:
+            self.setWindowTitle('Diagnostics')
+        else:
+            self.setWindowTitle(getTitleString('Diagnostics'))
+            self.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+
+        mainLayout = QVBoxLayout(self)
+        mainLayout.setContentsMargins(5, 5, 5, 5)
+
+        # Metrics
+
+        self.table = QTableWidget(0, 3)
+        self.table.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setDefaultSectionSize(25)
+        self.table.horizontalHeader().setHighlightSections(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setHorizontalHeaderLabels(['Metric', 'Kind', 'Value'])
+        self.table.setColumnWidth(0, 200)
+        mainLayout.addWidget(self.table)
+
+        # Actions
+
+        actionsLayout = QHBoxLayout()
+        actionsLayout.setAlignment(Qt.AlignmentFlag.AlignRight)
+        copy = QPushButton('Copy as JSON', self)
+        copy.clicked.connect(lambda: QApplication.clipboard().setText(self.metrics.toJson()))
+        actionsLayout.addWidget(copy)
+        save = QPushButton('Save as JSON', self)
+        save.clicked.connect(self.saveEvent)
+        actionsLayout.addWidget(save)
+        reset = QPushButton('Reset', self)
+        reset.clicked.connect(lambda: [self.metrics.reset(), self.refresh()])
+        actionsLayout.addWidget(reset)
+        close = QPushButton('Close', self)
+        close.clicked.connect(self.close)
+        close.setDefault(True)
+        actionsLayout.addWidget(close)
+        mainLayout.addLayout(actionsLayout)
+
+        # Setup
+
+        self.setMinimumSize(QSize(440, 300))
+        self.setSizePolicy(QSizePolicy.Policy.MinimumExpanding, QSizePolicy.Policy.MinimumExpanding)
+        self.resize(QSize(640, 440))
+
+        # the values change while operations run, the table follows them while the window is open
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.finished.connect(self.timer.stop)
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        rows = [
+            (name, kind[:-1], formatMetric(kind, value))
+            for kind, values in self.metrics.snapshot().items()
+            for name, value in values.items()
+        ]
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
+
+    def saveEvent(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(self, 'Save Metrics', 'metrics.json', 'JSON (*.json)')
+        if path:
+            self.metrics.dump(Path(path))
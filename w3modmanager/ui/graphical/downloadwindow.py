@@ -1,14 +1,12 @@
 from w3modmanager.core.model import *
 from w3modmanager.domain.web.nexus import RequestError, ResponseError, getModFiles, getModFileUrls, getModId
 from w3modmanager.ui.graphical.modlist import ModListItemDelegate
-from w3modmanager.util.util import debounce, getTitleString
+from w3modmanager.util.util import debounce, getTitleString, parseDate
 
 import html
 
 from typing import cast
 
-import dateparser
-
 from PySide6.QtCore import QModelIndex, QObject, QSize, Qt, Signal
 from PySide6.QtGui import QMouseEvent, QWheelEvent
 from PySide6.QtWidgets import (
@@ -209,7 +207,7 @@ class DownloadWindow(QDialog):
                 fileid = int(file['file_id'])
                 name = str(file['name'])
                 version = str(file['version'])
-                _uploadtime = dateparser.parse(file['uploaded_time'])
+                _uploadtime = parseDate(file['uploaded_time'])
                 uploadtime = _uploadtime.astimezone(tz=None).strftime('%Y-%m-%d %H:%M:%S') if _uploadtime else '?'
                 description = html.unescape(str(file['description']))
                 nameItem = QTableWidgetItem(name)
@@ -274,7 +272,9 @@ class DownloadWindow(QDialog):
                 ''')
             return
         try:
-            self.signals.download.emit([url[0]['URI'] for url in urls])
+            self.signals.download.emit([
+                (url[0]['URI'], self.modId, file) for url, file in zip(urls, files, strict=True)
+            ])
         except KeyError as e:
             logger.exception(
                 f'Could not find key "{e!s}" in file download response')
@@ -0,0 +1,220 @@
+"""Log sink of the output pane, formatting records on a worker thread and showing them once per frame"""
+
+from __future__ import annotations
+
+import html
+import queue
+import threading
+import time
+
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from PySide6.QtCore import QObject, QSettings, QTimer, Signal
+from PySide6.QtGui import QTextBlockFormat, QTextCharFormat, QTextCursor
+from PySide6.QtWidgets import QTextEdit
+
+
+if TYPE_CHECKING:
+    from loguru import Message
+
+
+@dataclass
+class LogLine:
+    html: str = ''
+    key: str = ''
+    '''The formatted message without the time, repeated messages with the same key are collapsed'''
+    count: int = 1
+    output: bool = False
+    modlist: bool = False
+    replace: bool = False
+    '''Whether the line replaces the last shown line, which it repeats'''
+
+    def text(self) -> str:
+        if self.count > 1:
+            return f'{self.html} <font color="#aaa">({self.count}&times;)</font>'
+        return self.html
+
+
+@dataclass
+class LogSinkStats:
+    received: int = 0
+    hidden: int = 0
+    merged: int = 0
+    dropped: int = 0
+    shown: int = 0
+    frames: int = 0
+
+
+def formatRecord(
+    message: str, level: str, time: datetime, extra: dict[str, Any], debug: bool
+) -> LogLine | None:
+    """Format a log record to user readable output, returns None for hidden debug messages"""
+    level = level.lower()
+
+    name = str(extra['name']) if 'name' in extra and extra['name'] is not None else ''
+    path = str(extra['path']) if 'path' in extra and extra['path'] is not None else ''
+    dots = bool(extra['dots']) if 'dots' in extra and extra['dots'] is not None else False
+    newline = bool(extra['newline']) if 'newline' in extra and extra['newline'] is not None else False
+    output = bool(extra['output']) if 'output' in extra and extra['output'] is not None else bool(message)
+    modlist = bool(extra['modlist']) if 'modlist' in extra and extra['modlist'] is not None else False
+
+    if level in ['debug'] and not debug:
+        return LogLine() if newline else None
+    if not output:
+        return LogLine(modlist=modlist)
+
+    n = '<br>' if newline else ''
+    d = '...' if dots else ''
+    if len(name) and len(path):
+        path = f' ({path})'
+
+    message = html.escape(message, quote=True)
+    if level in ['success', 'error', 'warning']:
+        message = f'<strong>{message}</strong>'
+    if level in ['success']:
+        message = f'<font color="#04c45e">{message}</font>'
+    if level in ['error', 'critical']:
+        message = f'<font color="#ee3b3b">{message}</font>'
+    if level in ['warning']:
+        message = f'<font color="#ff6500">{message}</font>'
+    if level in ['debug', 'trace']:
+        message = f'<font color="#aaa">{message}</font>'
+        path = f'<font color="#aaa">{path}</font>' if path else ''
+        d = f'<font color="#aaa">{d}</font>' if d else ''
+    elif len(name) and len(path):
+        path = f'<font color="#aaa">{path}</font>' if path else ''
+
+    key = f'{n}{message.strip()}{" " if name or path else ""}{name}{path}{d}'
+    timestamp = f'<font color="#aaa">{time.astimezone(tz=None).strftime("%Y-%m-%d %H:%M:%S")}</font>'
+    return LogLine(f'{n}{timestamp} {key[len(n):]}', key, output=True, modlist=modlist)
+
+
+class LogBuffer:
+    """Formatted lines waiting to be shown, collapsing repeated messages and dropping the oldest beyond the limit"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.stats = LogSinkStats()
+        self._lock = threading.Lock()
+        self._pending: list[LogLine] = []
+        self._last: LogLine | None = None
+
+    def push(self, line: LogLine) -> bool:
+        """Add a line, returns whether the buffer was empty before"""
+        with self._lock:
+            empty = not self._pending
+            last = self._last
+            if last is not None and line.key and line.key == last.key:
+                self.stats.merged += 1
+                if self._pending and self._pending[-1] is last:
+                    last.count += 1
+                    last.html = line.html
+                    return False
+                # the repeated line was already shown, show it again in its place
+                line = replace(line, count=last.count + 1, replace=True)
+            self._pending.append(line)
+            self._last = line
+            if len(self._pending) > self.limit:
+                dropped = len(self._pending) - self.limit
+                del self._pending[:dropped]
+                self.stats.dropped += dropped
+            return empty
+
+    def take(self) -> list[LogLine]:
+        with self._lock:
+            lines, self._pending = self._pending, []
+            self.stats.shown += len(lines)
+            return lines
+
+
+class LogSink(QObject):
+    """Loguru sink writing to a text edit, bounded to a number of lines and updated at most once per frame"""
+
+    pending = Signal()
+    flushed = Signal(bool, bool)
+    '''Emitted after lines were shown, with whether any of them was output or asked to show the mod list'''
+
+    def __init__(self, parent: QObject, limit: int = 5000, interval: int = 16) -> None:
+        super().__init__(parent)
+        self.output: QTextEdit | None = None
+        self.buffer = LogBuffer(limit)
+        self._records: queue.SimpleQueue[tuple[str, str, datetime, dict[str, Any]] | None] = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self.formatRecords, name='log sink', daemon=True)
+        self._worker.start()
+
+        self.interval = interval
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.flush)
+        # emitted by the worker thread, delivered on the thread of the sink
+        self.pending.connect(self.schedule)
+
+    @property
+    def stats(self) -> LogSinkStats:
+        return self.buffer.stats
+
+    def __call__(self, message: Message) -> None:
+        # only copy the record here, it is formatted by the worker thread
+        record = message.record
+        self._records.put((record['message'], record['level'].name, record['time'], dict(record['extra'])))
+
+    def attach(self, output: QTextEdit) -> None:
+        """Show the lines in the text edit, including lines logged before"""
+        self.output = output
+        output.document().setMaximumBlockCount(self.buffer.limit)
+        self.schedule()
+
+    def close(self) -> None:
+        self._records.put(None)
+
+    def formatRecords(self) -> None:
+        while True:
+            records = [self._records.get()]
+            # format everything logged in the meantime with the same settings
+            while not self._records.empty() and len(records) < self.buffer.limit:
+                records.append(self._records.get())
+            debug = QSettings().value('debugOutput', 'False') == 'True'
+            notify = False
+            for record in records:
+                if record is None:
+                    return
+                self.buffer.stats.received += 1
+                line = formatRecord(*record, debug=debug)
+                if line is None:
+                    self.buffer.stats.hidden += 1
+                    continue
+                notify = self.buffer.push(line) or notify
+            if notify:
+                self.pending.emit()
+
+    def schedule(self) -> None:
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self) -> None:
+        if self.output is None:
+            return
+        lines = self.buffer.take()
+        if not lines:
+            return
+        self.buffer.stats.frames += 1
+        start = time.perf_counter()
+        document = self.output.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for line in lines:
+            if line.replace:
+                cursor.movePosition(QTextCursor.MoveOperation.StartOfBlock, QTextCursor.MoveMode.KeepAnchor)
+                cursor.removeSelectedText()
+            elif not document.isEmpty():
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            cursor.insertHtml(line.text())
+        cursor.endEditBlock()
+        self.output.verticalScrollBar().setValue(self.output.verticalScrollBar().maximum())
+        # leave the event loop at least as much time as showing the lines took
+        self.timer.setInterval(max(self.interval, round((time.perf_counter() - start) * 1000)))
+        self.flushed.emit(any(line.output for line in lines), any(line.modlist for line in lines))
@@ -1,6 +1,8 @@
 from w3modmanager.core.model import Model
 from w3modmanager.domain.bin.merger import verifyScriptMergerPath
+from w3modmanager.domain.web.nexus import RequestStatus, getScheduler
 from w3modmanager.ui.graphical.flowlayout import FlowLayout
+from w3modmanager.ui.graphical.logsink import LogSink
 from w3modmanager.ui.graphical.modlist import ModList
 from w3modmanager.util.util import (
     createAsyncTask,
@@ -12,7 +14,6 @@ from w3modmanager.util.util import (
 )
 
 import asyncio
-import html
 
 from pathlib import Path
 from typing import Any
@@ -38,7 +39,11 @@ class MainWidget(QWidget):
     def __init__(self, parent: QWidget, model: Model) -> None:
         super().__init__(parent)
 
-        logger.add(self.log)
+        # records are shown once the output pane is created
+        logsink = self.logsink = LogSink(self)
+        logsink.flushed.connect(self.logShown)
+        loghandler = logger.add(logsink)
+        self.destroyed.connect(lambda: [logger.remove(loghandler), logsink.close()])
 
         settings = QSettings()
         self.mainlayout = QVBoxLayout()
@@ -70,6 +75,9 @@ class MainWidget(QWidget):
         detailslayout.addWidget(self.overridden)
         self.conflicts = QLabel()
         detailslayout.addWidget(self.conflicts)
+        self.requests = QLabel()
+        self.requests.setVisible(False)
+        detailslayout.addWidget(self.requests)
 
         buttonslayout = QHBoxLayout()
         buttonslayout.setContentsMargins(0, 0, 0, 0)
@@ -162,6 +170,7 @@ class MainWidget(QWidget):
         self.output.setContextMenuPolicy(Qt.ContextMenuPolicy.NoContextMenu)
         self.output.setPlaceholderText('Program output...')
         self.splitter.addWidget(self.output)
+        self.logsink.attach(self.output)
 
         # TODO: enhancement: show indicator if scripts have to be merged
 
@@ -177,7 +186,13 @@ class MainWidget(QWidget):
         else:
             self.stack.setCurrentIndex(1)
             self.splitter.setSizes([self.splitter.size().height(), 0])
+        # counts are updated when the changes could affect them, the first update counts everything
+        self.modelRevision = -1
+        self.enabledCount = 0
+        self.overriddenCount = 0
+        self.conflictsCount = 0
         model.updateCallbacks.append(self.modelUpdateEvent)
+        getScheduler().statusCallbacks.append(self.requestStatusEvent)
 
         self.tasks: set[asyncio.Task[Any]] = set()
 
@@ -205,13 +220,21 @@ class MainWidget(QWidget):
                 createAsyncTask(self.modlist.checkInstallFromURLs(urls), self.tasks)
 
     def modelUpdateEvent(self, model: Model) -> None:
+        changes = model.changesSince(self.modelRevision)
+        self.modelRevision = model.revision
+        if changes.touches('enabled'):
+            self.enabledCount = sum(1 for mod in model.values() if mod.enabled)
+        if changes.conflicts or changes.reset:
+            self.overriddenCount = sum(len(file) for file in model.conflicts.bundled.values())
+            self.conflictsCount = sum(len(file) for file in model.conflicts.scripts.values())
         total = len(model)
-        enabled = len([mod for mod in model if model[mod].enabled])
-        overridden = sum(len(file) for file in model.conflicts.bundled.values())
-        conflicts = sum(len(file) for file in model.conflicts.scripts.values())
+        enabled = self.enabledCount
+        overridden = self.overriddenCount
+        conflicts = self.conflictsCount
         self.modstotal.setText(
             f'<font color="#73b500" size="4">{total}</font> \
                 <font color="#888" text-align="center">Installed Mod{"" if total == 1 else "s"}</font>'
+            + (f' <font color="#888">({model.loadingStatus})</font>' if model.loadingStatus.loading else '')
         )
         self.modsenabled.setText(
             f'<font color="#73b500" size="4">{enabled}</font> \
@@ -235,6 +258,17 @@ class MainWidget(QWidget):
                 self.stack.setCurrentIndex(1)
                 self.repaint()
 
+    def requestStatusEvent(self, status: RequestStatus) -> None:
+        if not status.budget.known and not status.queued:
+            return
+        remaining = status.budget.remaining
+        text = f'<font color="{"#e94600" if remaining == 0 else "#73b500"}" size="4">{remaining}</font> \
+            <font color="#888">API Request{"" if remaining == 1 else "s"} Left</font>' if status.budget.known else ''
+        if status.queued:
+            text += f' <font color="#888">({status.queued} queued)</font>'
+        self.requests.setText(text)
+        self.requests.setVisible(True)
+
     def unhideOutput(self) -> None:
         if self.splitter.sizes()[1] < 10:
             self.splitter.setSizes([self.splitter.size().height(), 50])
@@ -243,59 +277,8 @@ class MainWidget(QWidget):
         if self.splitter.sizes()[0] < 10:
             self.splitter.setSizes([50, self.splitter.size().height()])
 
-    def log(self, message: Any) -> None:
-        # format log messages to user readable output
+    def logShown(self, output: bool, modlist: bool) -> None:
         settings = QSettings()
-
-        record = message.record
-        message = record['message']
-        extra = record['extra']
-        level = record['level'].name.lower()
-
-        name = str(extra['name']) if 'name' in extra and extra['name'] is not None else ''
-        path = str(extra['path']) if 'path' in extra and extra['path'] is not None else ''
-        dots = bool(extra['dots']) if 'dots' in extra and extra['dots'] is not None else False
-        newline = bool(extra['newline']) if 'newline' in extra and extra['newline'] is not None else False
-        output = bool(extra['output']) if 'output' in extra and extra['output'] is not None else bool(message)
-        modlist = bool(extra['modlist']) if 'modlist' in extra and extra['modlist'] is not None else False
-
-        if level in ['debug'] and settings.value('debugOutput', 'False') != 'True':
-            if newline:
-                self.output.append(f'')
-            return
-
-        n = '<br>' if newline else ''
-        d = '...' if dots else ''
-        if len(name) and len(path):
-            path = f' ({path})'
-
-        if output:
-            message = html.escape(message, quote=True)
-
-            if level in ['success', 'error', 'warning']:
-                message = f'<strong>{message}</strong>'
-            if level in ['success']:
-                message = f'<font color="#04c45e">{message}</font>'
-            if level in ['error', 'critical']:
-                message = f'<font color="#ee3b3b">{message}</font>'
-            if level in ['warning']:
-                message = f'<font color="#ff6500">{message}</font>'
-            if level in ['debug', 'trace']:
-                message = f'<font color="#aaa">{message}</font>'
-                path = f'<font color="#aaa">{path}</font>' if path else ''
-                d = f'<font color="#aaa">{d}</font>' if d else ''
-            elif len(name) and len(path):
-                path = f'<font color="#aaa">{path}</font>' if path else ''
-
-            time = record['time'].astimezone(tz=None).strftime('%Y-%m-%d %H:%M:%S')
-            message = f'<font color="#aaa">{time}</font> {message}'
-            self.output.append(f'{n}{message.strip()}{" " if name or path else ""}{name}{path}{d}')
-        else:
-            self.output.append(f'')
-
-        self.output.verticalScrollBar().setValue(self.output.verticalScrollBar().maximum())
-        self.output.repaint()
-
         if modlist:
             self.unhideModList()
         if settings.value('unhideOutput', 'True') == 'True' and output:
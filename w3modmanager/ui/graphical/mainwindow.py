@@ -1,8 +1,9 @@
 import w3modmanager
 
-from w3modmanager.core.model import Model
+from w3modmanager.core.model import Model, ModelChanges
 from w3modmanager.domain.bin.merger import verifyScriptMergerPath
 from w3modmanager.domain.mod.fetcher import *
+from w3modmanager.ui.graphical.diagnosticswindow import DiagnosticsWindow
 from w3modmanager.ui.graphical.downloadwindow import DownloadWindow
 from w3modmanager.ui.graphical.mainwidget import MainWidget
 from w3modmanager.ui.graphical.settingswindow import SettingsWindow
@@ -59,6 +60,7 @@ class MainWindow(QMainWindow):
         settings = QSettings()
         settings.setValue('mainWindowGeometry', self.saveGeometry())
         settings.setValue('mainWindowState', self.saveState())
+        self.mainwidget.modlist.downloads.flush()
 
     def setupMenu(self) -> None:
         self.setMenuBar(QMenuBar(self))
@@ -133,7 +135,7 @@ class MainWindow(QMainWindow):
         toggleHighlightNewest.setChecked(settings.value('highlightNewest', 'True') == 'True')
         toggleHighlightNewest.triggered.connect(lambda checked: [
             settings.setValue('highlightNewest', str(checked)),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         iconHighlightNewest = QPixmap(256, 256)
         iconHighlightNewest.fill(Qt.GlobalColor.transparent)
@@ -148,7 +150,7 @@ class MainWindow(QMainWindow):
         toggleHighlightRecent.setChecked(settings.value('highlightRecent', 'True') == 'True')
         toggleHighlightRecent.triggered.connect(lambda checked: [
             settings.setValue('highlightRecent', str(checked)),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         iconHighlightRecent = QPixmap(256, 256)
         iconHighlightRecent.fill(Qt.GlobalColor.transparent)
@@ -163,7 +165,7 @@ class MainWindow(QMainWindow):
         toggleHighlightUnmanaged.setChecked(settings.value('highlightUnmanaged', 'True') == 'True')
         toggleHighlightUnmanaged.triggered.connect(lambda checked: [
             settings.setValue('highlightUnmanaged', str(checked)),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         iconHighlightUnmanaged = QPixmap(256, 256)
         iconHighlightUnmanaged.fill(Qt.GlobalColor.transparent)
@@ -178,7 +180,7 @@ class MainWindow(QMainWindow):
         toggleHighlightSpecial.setChecked(settings.value('highlightSpecial', 'True') == 'True')
         toggleHighlightSpecial.triggered.connect(lambda checked: [
             settings.setValue('highlightSpecial', str(checked)),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         iconHighlightSpecial = QPixmap(256, 256)
         iconHighlightSpecial.fill(Qt.GlobalColor.transparent)
@@ -193,7 +195,7 @@ class MainWindow(QMainWindow):
         toggleHighlightDisabled.setChecked(settings.value('highlightDisabled', 'True') == 'True')
         toggleHighlightDisabled.triggered.connect(lambda checked: [
             settings.setValue('highlightDisabled', str(checked)),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         iconHighlightDisabled = QPixmap(256, 256)
         iconHighlightDisabled.fill(Qt.GlobalColor.transparent)
@@ -210,7 +212,7 @@ class MainWindow(QMainWindow):
         toggleColors.triggered.connect(lambda checked: [
             settings.setValue('iconColors', str(checked)),
             self.mainwidget.modlist.listmodel.setIcons(),
-            self.model.updateCallbacks.fire(self.model)
+            self.model.notify(ModelChanges(reset=True))
         ])
         toggleColors.setIcon(colrIcon)
 
@@ -240,6 +242,10 @@ class MainWindow(QMainWindow):
         actionOpenConfigDirectory = menuSettings.addAction('Open &Config directory')
         actionOpenConfigDirectory.setIcon(dirsIcon)
         actionOpenConfigDirectory.triggered.connect(lambda: util.openDirectory(self.model.configpath))
+        menuSettings.addSeparator()
+        actionDiagnostics = menuSettings.addAction('Show &Diagnostics')
+        actionDiagnostics.setIcon(gearIcon)
+        actionDiagnostics.triggered.connect(self.showDiagnosticsDialog)
 
         # info menu
 
@@ -272,7 +278,7 @@ class MainWindow(QMainWindow):
 
     def showGetUpdatesDialog(self) -> None:
         # TODO: incomplete: implement mod update download
-        pass
+        createAsyncTask(self.mainwidget.modlist.checkSelectedModsUpdates(), self.tasks)
 
     def showAddModFromFolderDialog(self) -> QFileDialog:
         dialog: QFileDialog = QFileDialog(self, 'Select Mod to install')
@@ -310,9 +316,13 @@ class MainWindow(QMainWindow):
         dialog = DownloadWindow(self, url)
         dialog.setModal(True)
         dialog.open()
-        dialog.signals.download.connect(lambda urls: createAsyncTask(
-            self.mainwidget.modlist.checkInstallFromURLs(urls, local=False), self.tasks
-        ))
+        dialog.signals.download.connect(lambda files: self.mainwidget.modlist.queueDownloads(files))
+        return dialog
+
+    def showDiagnosticsDialog(self) -> DiagnosticsWindow:
+        dialog = DiagnosticsWindow(self, self.model.metrics)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.open()
         return dialog
 
     def showSettingsDialog(self: Any, firstStart: bool = False) -> SettingsWindow:
@@ -331,7 +341,9 @@ class MainWindow(QMainWindow):
                 ),
                 self.mainwidget.startscriptmerger.setEnabled(
                     verifyScriptMergerPath(Path(str(settings.value('scriptMergerPath')))) is not None
-                )
+                ),
+                self.mainwidget.modlist.updateDownloadSettings(),
+                self.mainwidget.modlist.updateCacheSettings()
             ])
         return settingswindow
 
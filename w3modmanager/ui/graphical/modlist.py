@@ -1,8 +1,21 @@
 from w3modmanager.core.errors import ModelError, ModExistsError
 from w3modmanager.core.model import Model
+from w3modmanager.core.pipeline import InstallPipeline
 from w3modmanager.domain.mod.fetcher import *
 from w3modmanager.domain.mod.mod import Mod
-from w3modmanager.domain.web.nexus import RequestError, ResponseError, downloadFile, getCategoryName, getModInformation
+from w3modmanager.domain.web.downloadqueue import DownloadItem, DownloadQueue
+from w3modmanager.domain.web.nexus import (
+    RequestError,
+    ResponseContentError,
+    ResponseError,
+    downloadFile,
+    getCategoryName,
+    getModFiles,
+    getModFileUrls,
+    getModInformation,
+    getScheduler,
+)
+from w3modmanager.domain.web.updates import ModUpdate, UpdateChecker
 from w3modmanager.ui.graphical.detailswindow import DetailsWindow
 from w3modmanager.ui.graphical.modlistmodel import ModListModel
 from w3modmanager.util.util import *
@@ -16,12 +29,9 @@ from pathlib import Path
 from typing import cast
 from urllib.parse import unquote, urlparse
 
-import dateparser
-
 from loguru import logger
 from PySide6.QtCore import (
     QAbstractItemModel,
-    QAbstractTableModel,
     QEvent,
     QItemSelection,
     QItemSelectionModel,
@@ -30,7 +40,6 @@ from PySide6.QtCore import (
     QPersistentModelIndex,
     QPoint,
     QRect,
-    QRegularExpression,
     QSettings,
     QSortFilterProxyModel,
     Qt,
@@ -124,23 +133,22 @@ class ModListSelectionModel(QItemSelectionModel):
 
 
 class ModListFilterModel(QSortFilterProxyModel):
-    def __init__(self, parent: QWidget, source: QAbstractTableModel) -> None:
+    def __init__(self, parent: QWidget, source: ModListModel) -> None:
         super().__init__(parent)
+        self.source = source
         self.setSourceModel(source)
-        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        self.setSortCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        # rows are sorted by the source model with precomputed keys, the proxy keeps their order and only filters
+        self.source.sort(column, order)
+
+    def setSearch(self, search: str) -> None:
+        # matches are looked up in the search index of the source model once for all rows
+        self.source.search.search(search)
+        self.invalidateFilter()
 
     def filterAcceptsRow(self, row: int, parent: QModelIndex | QPersistentModelIndex) -> bool:
-        filterRegExp = self.filterRegularExpression()
-        if not filterRegExp.pattern() or not filterRegExp.isValid():
-            return True
-        sourceModel = self.sourceModel()
-        return filterRegExp.match(
-            sourceModel.data(sourceModel.index(row, 3, parent))
-        ).hasMatch() or filterRegExp.match(
-            sourceModel.data(sourceModel.index(row, 2, parent))
-        ).hasMatch()
+        return self.source.search.accepts(self.source.getMod(row))
 
 
 class ModList(QTableView):
@@ -152,9 +160,31 @@ class ModList(QTableView):
         self.hoverIndexRow = -1
         self.modmodel = model
         self.installLock = asyncio.Lock()
+        self.pipeline = InstallPipeline(model)
 
         self.tasks: set[asyncio.Task[Any]] = set()
 
+        self.downloads = DownloadQueue(
+            model.cachepath.joinpath('downloads'),
+            downloadFile,
+            cast(int, settings.value('downloadsMaxConcurrent', 2, int)),
+            cast(int, settings.value('downloadsBandwidthLimit', 0, int)) * 1024,
+            self.resolveDownloadUrl
+        )
+        self.downloads.completedCallbacks.append(
+            lambda item: createAsyncTask(self.installFromQueuedDownload(item), self.tasks))
+        # downloads are started as soon as the event loop runs, the widget is created before it does
+        QTimer.singleShot(0, self.downloads.start)
+        self.updateCacheSettings()
+
+        # check for mod updates in the background while nothing else is going on
+        self.updates = UpdateChecker(model.cachepath.joinpath('updates.json'), getModFiles)
+        self.updateTimer = QTimer(self)
+        self.updateTimer.setInterval(5 * 60 * 1000)
+        self.updateTimer.timeout.connect(self.checkUpdatesWhenIdle)
+        self.updateTimer.start()
+        QTimer.singleShot(30 * 1000, self.checkUpdatesWhenIdle)
+
         self.setMouseTracking(True)
         self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
@@ -303,7 +333,7 @@ class ModList(QTableView):
 
     def doubleClickEvent(self, index: QModelIndex) -> None:
         if self.filtermodel.mapToSource(index).column() == 0:
-            mod = self.modmodel[self.filtermodel.mapToSource(index).row()]
+            mod = self.listmodel.getMod(self.filtermodel.mapToSource(index).row())
             if mod.enabled:
                 createAsyncTask(self.modmodel.disable(mod), self.tasks)
             else:
@@ -415,15 +445,15 @@ class ModList(QTableView):
 
     def getSelectedMods(self) -> list[Mod]:
         return [
-            self.modmodel[self.filtermodel.mapToSource(cast(QModelIndex, index)).row()]
+            self.listmodel.getMod(self.filtermodel.mapToSource(cast(QModelIndex, index)).row())
             for index in self.selectionModel().selectedRows()
         ]
 
     def getHoveredMod(self) -> Mod | None:
         row = self.filtermodel.mapToSource(self.indexAt(self.viewport().mapFromGlobal(QCursor.pos()))).row()
-        if row < 0 or row >= len(self.modmodel):
+        if row < 0 or row >= self.listmodel.rowCount():
             return None
-        return self.modmodel[row]
+        return self.listmodel.getMod(row)
 
     async def enableSelectedMods(self, enable: bool = True, package: bool = False) -> None:
         if not self.selectionModel().hasSelection():
@@ -498,7 +528,7 @@ class ModList(QTableView):
             mod.version = version
             mod.fileid = fileid
             mod.uploadname = uploadname
-            uploaddate = dateparser.parse(uploadtime)
+            uploaddate = parseDate(uploadtime)
             if uploaddate:
                 mod.uploaddate = uploaddate.astimezone(tz=timezone.utc)
             else:
@@ -515,6 +545,33 @@ class ModList(QTableView):
             return False
         return True
 
+    def checkUpdatesWhenIdle(self) -> None:
+        settings = QSettings()
+        if settings.value('nexusCheckUpdates', 'False') != 'True' or not str(settings.value('nexusAPIKey', '')):
+            return
+        if not self.updates.due(24 * 60 * 60) or self.installLock.locked() or self.pipeline.busy \
+        or self.downloads.running or getScheduler().queued or not len(self.modmodel):
+            return
+        createAsyncTask(self.checkModsUpdates(list(self.modmodel.values()), False), self.tasks)
+
+    async def checkModsUpdates(self, mods: list[Mod], manual: bool = True) -> dict[str, ModUpdate]:
+        logger.bind(newline=True, output=False).debug(f'Checking {len(mods)} mods for updates')
+        updates = await self.updates.check(mods)
+        for update in updates.values():
+            logger.bind(name=update.filename).info(
+                f'Update available: {update.version or "unknown version"} -> '
+                f'{update.newest.version or "unknown version"} ({update.newest.name})')
+        if updates:
+            logger.success(f'Found updates for {len(updates)} mods')
+        else:
+            logger.bind(output=manual).info('No mod updates found')
+        return updates
+
+    async def checkSelectedModsUpdates(self) -> None:
+        if not self.selectionModel().hasSelection():
+            return
+        await self.checkModsUpdates(self.getSelectedMods())
+
     async def updateSelectedModsDetails(self) -> None:
         if not self.selectionModel().hasSelection():
             return
@@ -592,10 +649,9 @@ class ModList(QTableView):
         else:
             super().keyPressEvent(event)
 
-    def setFilter(self, search: str) -> None:
-        self.filtermodel.setFilterRegularExpression(
-            QRegularExpression(search, QRegularExpression.PatternOption.CaseInsensitiveOption)
-        )
+    @debounce(100)
+    async def setFilter(self, search: str) -> None:
+        self.filtermodel.setSearch(search)
 
     async def checkInstallFromURLs(
         self, paths: Sequence[str | QUrl], local: bool = True, web: bool = True
@@ -618,6 +674,15 @@ class ModList(QTableView):
             # we should never land here, but don't lock up the UI if it happens
             logger.exception(str(e))
             errors += 1
+        self.logInstallResult(installed, errors)
+        self.setDisabled(False)
+        self.setFocus()
+        self.installLock.release()
+
+    def logInstallResult(self, installed: int, errors: int) -> None:
+        if self.pipeline.stats:
+            logger.debug(f'Install stages: {self.pipeline.summary()}')
+            self.pipeline.resetStats()
 
         if installed > 0 or errors > 0:
             log = logger.bind(modlist=bool(installed))
@@ -628,9 +693,39 @@ class ModList(QTableView):
                 log.success(message)
             else:
                 log.error(message)
-        self.setDisabled(False)
-        self.setFocus()
-        self.installLock.release()
+
+    def queueDownloads(self, files: Sequence[tuple[str, int, int]]) -> None:
+        for url, modid, fileid in files:
+            item = self.downloads.add(url, modid=modid, fileid=fileid)
+            logger.bind(name=item.filename).info('Queued download')
+
+    def updateDownloadSettings(self) -> None:
+        settings = QSettings()
+        self.downloads.setMaxConcurrent(cast(int, settings.value('downloadsMaxConcurrent', 2, int)))
+        self.downloads.setBandwidth(cast(int, settings.value('downloadsBandwidthLimit', 0, int)) * 1024)
+
+    def updateCacheSettings(self) -> None:
+        settings = QSettings()
+        cache = self.modmodel.archiveCache
+        cache.keepExtracted = settings.value('cacheExtractedArchives', 'False') == 'True'
+        cache.maxSize = cast(int, settings.value('cacheMaxSize', 4, int)) * 1024 ** 3
+
+    async def resolveDownloadUrl(self, item: DownloadItem) -> str:
+        urls = await getModFileUrls(item.modid, item.fileid)
+        try:
+            return str(urls[0]['URI'])
+        except (IndexError, KeyError) as e:
+            raise ResponseContentError(f'Could not find key "{e!s}" in file download response') from e
+
+    async def installFromQueuedDownload(self, item: DownloadItem) -> None:
+        async with self.installLock:
+            self.setDisabled(True)
+            logger.bind(newline=True, output=False).debug('Starting install from download queue')
+            installed, errors = await self.installFromFile(self.downloads.getTarget(item), md5hash=item.md5hash)
+            self.logInstallResult(installed, errors)
+            self.setDisabled(False)
+            self.setFocus()
+        self.downloads.remove(item.id)
 
     async def installFromURL(
         self, path: str | QUrl, local: bool = True, web: bool = True, installtime: datetime | None = None
@@ -666,73 +761,63 @@ class ModList(QTableView):
         try:
             target = Path(urlparse(url).path)
             filename = re.sub(r'[^\w\-_\. ]', r'_', unquote(target.name))
-            target = Path(tempfile.gettempdir()).joinpath(
-                'w3modmanager/download').joinpath(f'{filename}')
-        except ValueError:
+            downloads = Path(tempfile.gettempdir()).joinpath('w3modmanager/download')
+            downloads.mkdir(parents=True, exist_ok=True)
+            # download into a unique directory, files with the same name can be downloaded at the same time
+            target = Path(tempfile.mkdtemp(dir=downloads)).joinpath(f'{filename}')
+        except (ValueError, OSError):
             logger.bind(name=url).exception('Wrong request URL')
             return 0, 1
         try:
-            target.parent.mkdir(parents=True, exist_ok=True)
-            logger.bind(name=url).info('Starting to download file')
-            await downloadFile(url, target)
-            installed, errors = await self.installFromFile(target, installtime)
+            async with self.pipeline.stage('download', 'net'):
+                logger.bind(name=url).info('Starting to download file')
+                md5hash = await downloadFile(url, target)
+            installed, errors = await self.installFromFile(target, installtime, md5hash)
         except (RequestError, ResponseError, Exception) as e:
             logger.bind(name=url).exception(f'Failed to download file: {e}')
             return 0, 1
         finally:
-            if target.is_file():
-                target.unlink()
+            self.pipeline.removeStagingPath(target.parent)
         return installed, errors
 
-    async def installFromFile(self, path: Path, installtime: datetime | None = None) -> tuple[int, int]:
-        originalpath = path
+    async def installFromFile(
+        self, path: Path, installtime: datetime | None = None, md5hash: str = ''
+    ) -> tuple[int, int]:
         installed = 0
         errors = 0
-        archive = path.is_file()
         source = None
-        md5hash = ''
         details = None
         detailsrequest: asyncio.Task[Any] | None = None
+        settings = QSettings()
+        cache = self.modmodel.archiveCache if settings.value('cacheArchives', 'True') == 'True' else None
 
         if not installtime:
             installtime = datetime.now(tz=timezone.utc)
         try:
-            if archive:
-                # unpack archive, set source and request details
-                md5hash = getMD5Hash(path)
-                source = path
-                settings = QSettings()
-                if settings.value('nexusGetInfo', 'False') == 'True':
+            self.modmodel.deduplicate = settings.value('deduplicateFiles', 'False') == 'True'
+            async with self.pipeline.job(path, md5hash, cache) as job:
+                source = job.source
+                if source and settings.value('nexusGetInfo', 'False') == 'True':
                     logger.bind(path=str(path), dots=True).debug('Requesting details for archive')
-                    detailsrequest = createAsyncTask(getModInformation(md5hash), self.tasks)
-                logger.bind(path=str(path), dots=True).debug('Unpacking archive')
-                path = await extractMod(source)
-
-            # validate and read mod
-            valid, exhausted = containsValidMod(path, searchlimit=8)
-            if not valid:
-                if not exhausted and self.showContinueSearchDialog(searchlimit=8):
-                    if not containsValidMod(path):
-                        raise InvalidPathError(path, 'Invalid mod')
-                elif not exhausted:
-                    raise InvalidPathError(path, 'Stopped searching for mod')
-                else:
-                    raise InvalidPathError(path, 'Invalid mod')
-            mods = await Mod.fromDirectory(path, searchCommonRoot=not archive)
-
-            installedMods = []
-            # update mod details and add mods to the model
-            for mod in mods:
-                mod.md5hash = md5hash
-                try:
-                    # TODO: incomplete: check if mod is installed, ask if replace
-                    await self.modmodel.add(mod)
-                    installedMods.append(mod)
-                    installed += 1
-                except ModExistsError:
-                    logger.bind(path=source if source else mod.source, name=mod.filename).error(f'Mod exists')
-                    errors += 1
-                    continue
+                    detailsrequest = createAsyncTask(
+                        self.requestModInformation(job.md5hash, job.hashrequest), self.tasks)
+                # unpack archive and validate and read mod
+                mods = await job.read(searchlimit=8, searchFurther=lambda: self.showContinueSearchDialog(searchlimit=8))
+                md5hash = await job.getHash()
+
+                installedMods = []
+                # update mod details and add mods to the model
+                for mod in mods:
+                    mod.md5hash = md5hash
+                    try:
+                        # TODO: incomplete: check if mod is installed, ask if replace
+                        await self.pipeline.add(mod)
+                        installedMods.append(mod)
+                        installed += 1
+                    except ModExistsError:
+                        logger.bind(path=source if source else mod.source, name=mod.filename).error(f'Mod exists')
+                        errors += 1
+                        continue
 
             # wait for details response if requested
             if detailsrequest:
@@ -768,7 +853,7 @@ class ModList(QTableView):
                             mod.version = version
                             mod.fileid = fileid
                             mod.uploadname = uploadname
-                            uploaddate = dateparser.parse(uploadtime)
+                            uploaddate = parseDate(uploadtime)
                             if uploaddate:
                                 mod.uploaddate = uploaddate.astimezone(tz=timezone.utc)
                             else:
@@ -801,15 +886,15 @@ class ModList(QTableView):
         finally:
             if detailsrequest and not detailsrequest.done():
                 detailsrequest.cancel()
-            if archive and path != originalpath:
-                try:
-                    util.removeDirectory(path)
-                except Exception:
-                    logger.bind(path=path).warning('Could not remove temporary directory')
             self.modmodel.setLastUpdateTime(installtime)
             self.repaint()
         return installed, errors
 
+    async def requestModInformation(self, md5hash: str, hashrequest: asyncio.Task[str] | None) -> list[Any]:
+        if hashrequest:
+            md5hash = await asyncio.shield(hashrequest)
+        return await getModInformation(md5hash)
+
     def showContinueSearchDialog(self, searchlimit: int) -> bool:
         messagebox = QMessageBox(self)
         messagebox.setWindowTitle('Unusual search depth')
@@ -849,7 +934,10 @@ class ModList(QTableView):
                     event.ignore()
                     return
                 filepath = Path(url.toLocalFile())
-                if isArchive(filepath) or containsValidMod(filepath, searchlimit=8)[0]:
+                # only archives readable without a 7-zip process are checked while dragging,
+                # others are checked when dropped
+                if isArchive(filepath) and archiveContainsValidMod(filepath, searchlimit=8, external=False)[0] \
+                or not isArchive(filepath) and containsValidMod(filepath, searchlimit=8)[0]:
                     self.setDisabled(False)
                     event.accept()
                     return
@@ -1,10 +1,13 @@
+from __future__ import annotations
+
 from w3modmanager.core.model import Model
-from w3modmanager.util.util import createAsyncTask, getRuntimePath
+from w3modmanager.core.search import SearchIndex
+from w3modmanager.domain.mod.mod import Mod
+from w3modmanager.util.util import createAsyncTask, debounce, getRuntimePath
 
 import asyncio
 
-from functools import cache
-from typing import Any
+from typing import Any, cast
 
 from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, QSettings, Qt
 from PySide6.QtGui import QColor, QFont, QFontDatabase, QIcon, QPainter, QPixmap
@@ -44,13 +47,36 @@ class ModListModel(QAbstractTableModel):
         self._datatypes['pat'] = 'Patch'
         self._datatypes['udf'] = 'Undefined / Mod?'
 
+        # Left|VCenter, Right|VCenter for sizes, HCenter|VCenter for counts and dates
+        self._alignment = [
+            0x0082 if col in ('size',) else
+            0x0084 if col in ('priority', 'installdate', 'binFiles', 'menuFiles', 'settings',
+                              'inputs', 'contentFiles', 'scriptFiles', 'bundledFiles',) else
+            0x0081 for _, col in self._header
+        ]
+        self._fixedFont = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+        self._boldFont = QFont()
+        self._boldFont.setBold(True)
+
+        self._mods: list[Mod] = []
+        self._rows: list[ModListRow | None] = []
+        self._sortColumn = -1
+        self._sortOrder = Qt.SortOrder.AscendingOrder
+        self._conflicts: tuple[set[str], set[str]] = (set(), set())
+
         self.setIcons()
+        self.setColors()
 
         self._lastUpdate = model.lastUpdate
         self._lastInitialization = model.lastInitialization
+        self._revision = model.revision
         self.modmodel = model
+        self.search = SearchIndex()
+        self.search.rebuild(model.values())
+        self.updateRows(list(model.values()))
+        self._conflicts = self.getConflicts()
         model.updateCallbacks.append(self.update)
-        self.update(self.modmodel)
+        self.prepareSearch()
 
     def setIcons(self) -> None:
         settings = QSettings()
@@ -101,11 +127,9 @@ class ModListModel(QAbstractTableModel):
         self._icons['spe'] = QIcon(pixmap)
 
     def clearCache(self) -> None:
-        self.data.cache_clear()
-        self.flags.cache_clear()
-        self.headerData.cache_clear()
+        self._rows = [None] * len(self._mods)
 
-    def update(self, model: Model) -> None:
+    def setColors(self) -> None:
         settings = QSettings()
 
         self._colorNewest = QColor(242, 255, 242) \
@@ -120,50 +144,208 @@ class ModListModel(QAbstractTableModel):
             if settings.value('highlightDisabled', 'True') == 'True' else None
         self._colorUnavailable = QColor(240, 240, 240)
 
+    def update(self, model: Model) -> None:
+        changes = model.changesSince(self._revision)
+        self._revision = model.revision
+        if not changes:
+            return
+        # the search index is updated first, so inserted and changed rows are filtered by their current values
+        if changes.reset:
+            self.search.rebuild(model.values())
+        else:
+            for mod in changes.removed.values():
+                self.search.remove(mod)
+            for mod in changes.added.values():
+                self.search.add(mod)
+            for mod, fields in changes.changed.values():
+                if mod in self.search and (fields is None or not fields.isdisjoint(SearchIndex.fields)):
+                    self.search.add(mod)
+        self.prepareSearch()
+        self.updateRows(list(model.values()))
+
+        if changes.reset:
+            # settings or anything else may have changed, keep only rows of mods that are shown the same
+            self.setColors()
+            self._lastUpdate = model.lastUpdate
+            self._lastInitialization = model.lastInitialization
+            self._conflicts = self.getConflicts()
+            for row, cached in enumerate(self._rows):
+                if cached is not None and cached.revision != self.getRevision(cached.mod):
+                    self._rows[row] = None
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+            self.sort(self._sortColumn, self._sortOrder)
+            return
+
+        changed: set[int] = set()
+        if changes.changed:
+            for row, mod in enumerate(self._mods):
+                if id(mod) in changes.changed:
+                    self._rows[row] = None
+                    changed.add(row)
+        if changes.lastUpdate and model.lastUpdate != self._lastUpdate:
+            # rows are highlighted by install date, only rows between the old and new time change
+            previous, self._lastUpdate = self._lastUpdate, model.lastUpdate
+            changed.update(
+                row for row, mod in enumerate(self._mods)
+                if (mod.installdate > previous) != (mod.installdate > self._lastUpdate))
+        if changes.conflicts:
+            previous = self._conflicts
+            self._conflicts = self.getConflicts()
+            filenames = (previous[0] ^ self._conflicts[0]) | (previous[1] ^ self._conflicts[1])
+            if filenames:
+                changed.update(row for row, mod in enumerate(self._mods) if mod.filename in filenames)
+        self.emitRowsChanged(changed)
+        self.sort(self._sortColumn, self._sortOrder)
+
+    @debounce(250)
+    async def prepareSearch(self) -> None:
+        # index the mods for searching in small batches while idle, a search indexes the remaining mods at once
+        while not self.search.prepare(100):
+            await asyncio.sleep(0)
+
+    def updateRows(self, mods: list[Mod]) -> None:
+        """Insert and remove rows to match the mods of the model, keeping the rows of remaining mods"""
+        current = {id(mod) for mod in mods}
+        # remove from the bottom up so the indices of the next ranges stay valid
+        last = len(self._mods) - 1
+        while last >= 0:
+            if id(self._mods[last]) in current:
+                last -= 1
+                continue
+            first = last
+            while first > 0 and id(self._mods[first - 1]) not in current:
+                first -= 1
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._mods[first:last + 1]
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+            last = first - 1
+
+        remaining = {id(mod) for mod in self._mods}
+        if self._sortColumn >= 0:
+            # sorted rows are appended and sorted into place afterwards
+            added = [mod for mod in mods if id(mod) not in remaining]
+            if added:
+                self.beginInsertRows(QModelIndex(), len(self._mods), len(self._mods) + len(added) - 1)
+                self._mods.extend(added)
+                self._rows.extend([None] * len(added))
+                self.endInsertRows()
+            return
+
+        order = [mod for mod in mods if id(mod) in remaining]
+        if any(mod is not previous for mod, previous in zip(order, self._mods, strict=True)):
+            # mods only move when they are removed and listed again, which does not happen in bulk
+            rows = {id(mod): row for row, mod in enumerate(self._mods)}
+            self.reorderRows([rows[id(mod)] for mod in order])
+
+        first = 0
+        while first < len(mods):
+            if id(mods[first]) in remaining:
+                first += 1
+                continue
+            last = first
+            while last + 1 < len(mods) and id(mods[last + 1]) not in remaining:
+                last += 1
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._mods[first:first] = mods[first:last + 1]
+            self._rows[first:first] = [None] * (last + 1 - first)
+            self.endInsertRows()
+            first = last + 1
+
+    def reorderRows(self, order: list[int]) -> None:
+        """Move the rows to the order of their previous row numbers, keeping selections and other indexes"""
         self.layoutAboutToBeChanged.emit()
-        self.clearCache()
-        self._lastUpdate = model.lastUpdate
-        self._lastInitialization = model.lastInitialization
+        positions = [0] * len(order)
+        for row, previous in enumerate(order):
+            positions[previous] = row
+        self._mods = [self._mods[row] for row in order]
+        self._rows = [self._rows[row] for row in order]
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [
+            self.createIndex(positions[index.row()], index.column()) for index in persistent])
         self.layoutChanged.emit()
-        self.dataChanged.emit(self.index(0, 0), self.index(
-            self.rowCount() - 1, self.columnCount() - 1))
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder) -> None:
+        # sorting the typed keys in python is much faster than comparing them through the proxy model,
+        # the sort is stable and rows that are already in order are not moved
+        self._sortColumn = column
+        self._sortOrder = order
+        if column < 0:
+            return
+        keys = [self.getSortKey(row, column) for row in range(len(self._mods))]
+        rows = sorted(range(len(keys)), key=keys.__getitem__, reverse=order == Qt.SortOrder.DescendingOrder)
+        if any(row != previous for row, previous in enumerate(rows)):
+            self.reorderRows(rows)
+
+    def emitRowsChanged(self, rows: set[int]) -> None:
+        # consecutive rows are reported as one range
+        ordered = sorted(rows)
+        start = 0
+        for index in range(1, len(ordered) + 1):
+            if index == len(ordered) or ordered[index] != ordered[index - 1] + 1:
+                self.dataChanged.emit(
+                    self.index(ordered[start], 0), self.index(ordered[index - 1], self.columnCount() - 1))
+                start = index
+
+    def getConflicts(self) -> tuple[set[str], set[str]]:
+        # mods shown with conflicting script and bundled files
+        conflicts = self.modmodel.conflicts
+        return (
+            {filename for filename, files in conflicts.scripts.items() if files},
+            {filename for filename, files in conflicts.bundled.items() if files},
+        )
+
+    def getRevision(self, mod: Mod) -> tuple[Any, ...]:
+        # the values shown for a mod, a row is computed again when one of these changes
+        return (
+            mod.filename, mod.package, mod.category, mod.priority, mod.enabled, mod.installed, mod.datatype,
+            mod.version, mod.size, mod.installdate, mod.source, len(mod.files), len(mod.contents),
+            len(mod.settings), len(mod.inputs), len(mod.bundled), self.modmodel.isPlaceholder(mod),
+        )
+
+    def getMod(self, row: int) -> Mod:
+        return self._mods[row]
+
+    def getSortKey(self, row: int, column: int) -> Any:
+        return self.getRow(row).sort[column]
+
+    def getRow(self, row: int) -> ModListRow:
+        cached = self._rows[row]
+        if cached is None:
+            mod = self._mods[row]
+            cached = self._rows[row] = ModListRow(mod, self.getRevision(mod), self._header)
+        return cached
+
+    def invalidateRow(self, row: int) -> None:
+        if 0 <= row < len(self._rows):
+            self._rows[row] = None
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+            self.sort(self._sortColumn, self._sortOrder)
 
     def getColumnKey(self, column: int) -> str:
         return self._header[column][1]
 
     async def setDataInternal(self, col: str, row: int, value: str) -> None:
         if col in ('filename',):
-            mod = self.modmodel[row]
+            mod = self._mods[row]
             await self.modmodel.setFilename(mod, value)
-            self.data.cache_clear()
-            self.dataChanged.emit(
-                self.index(row, 0),
-                self.index(row, self.columnCount() - 1))
+            self.invalidateRow(row)
         if col in ('package',):
-            mod = self.modmodel[row]
+            mod = self._mods[row]
             await self.modmodel.setPackage(mod, value)
-            self.data.cache_clear()
-            self.dataChanged.emit(
-                self.index(row, 0),
-                self.index(row, self.columnCount() - 1))
+            self.invalidateRow(row)
         if col in ('category',):
-            mod = self.modmodel[row]
+            mod = self._mods[row]
             await self.modmodel.setCategory(mod, value)
-            self.data.cache_clear()
-            self.dataChanged.emit(
-                self.index(row, 0),
-                self.index(row, self.columnCount() - 1))
+            self.invalidateRow(row)
         if col in ('priority',):
-            mod = self.modmodel[row]
+            mod = self._mods[row]
             try:
                 priority = max(-1, min(9999, int(value)))
             except ValueError:
                 priority = -1
             await self.modmodel.setPriority(mod, priority)
-            self.data.cache_clear()
-            self.dataChanged.emit(
-                self.index(row, 0),
-                self.index(row, self.columnCount() - 1))
+            self.invalidateRow(row)
 
     def setData(self, index: QModelIndex | QPersistentModelIndex, value: Any, _role: int = 0) -> bool:
         if not index.isValid():
@@ -174,12 +356,12 @@ class ModListModel(QAbstractTableModel):
         return True
 
     def rowCount(self, index: QModelIndex | QPersistentModelIndex | None = None) -> int:
-        return len(self.modmodel)
+        # items of a table have no children
+        return 0 if index is not None and index.isValid() else len(self._mods)
 
     def columnCount(self, index: QModelIndex | QPersistentModelIndex | None = None) -> int:
-        return len(self._header)
+        return 0 if index is not None and index.isValid() else len(self._header)
 
-    @cache  # noqa: B019
     def headerData(
         self, section: int, orientation: Qt.Orientation, role: Qt.ItemDataRole = Qt.ItemDataRole.EditRole
     ) -> Any:
@@ -189,48 +371,50 @@ class ModListModel(QAbstractTableModel):
             return None
         return self._header[section][0] if len(self._header) > section else '?'
 
-    @cache  # noqa: B019
     def flags(self, index: QModelIndex) -> Qt.ItemFlag:
-        if not index.isValid():
+        if not index.isValid() or index.row() >= len(self._mods):
+            return Qt.ItemFlag.NoItemFlags
+        row = self.getRow(index.row())
+        if row.placeholder:
+            # placeholder rows can not be changed until their directory is scanned
             return Qt.ItemFlag.NoItemFlags
         col = self.getColumnKey(index.column())
         if col in ('package', 'filename', 'category', 'priority',):
-            mod = self.modmodel[index.row()]
             # TODO: disallow editing for special 0000 mods
-            if col in ('priority',) and mod.datatype not in ('mod', 'udf',):
+            if col in ('priority',) and row.mod.datatype not in ('mod', 'udf',):
                 return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
             return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
         return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
 
-    @cache  # noqa: B019
     def data(self, index: QModelIndex, role: Qt.ItemDataRole = Qt.ItemDataRole.DisplayRole) -> Any:
-        if not index.isValid():
+        if not index.isValid() or index.row() >= len(self._mods):
             return None
-        col = self.getColumnKey(index.column())
+        column = index.column()
+        col = self.getColumnKey(column)
         if not col:
             return None
 
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.getRow(index.row()).display[column]
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._alignment[column]
+
         if role == Qt.ItemDataRole.FontRole:
             if col in ('datatype', 'size',):
-                return QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+                return self._fixedFont
             elif col in ('scriptFiles',):
-                mod = self.modmodel[index.row()]
-                if mod.filename in self.modmodel.conflicts.scripts \
-                and self.modmodel.conflicts.scripts[mod.filename]:
-                    font = QFont()
-                    font.setBold(True)
-                    return font
+                if self._mods[index.row()].filename in self._conflicts[0]:
+                    return self._boldFont
             return None
 
         if role == Qt.ItemDataRole.CheckStateRole:
             if col in ('enabled',):
-                mod = self.modmodel[index.row()]
-                val = mod[col]
-                return Qt.CheckState.Checked if val else Qt.CheckState.Unchecked
+                return Qt.CheckState.Checked if self._mods[index.row()].enabled else Qt.CheckState.Unchecked
             return None
 
         if role == Qt.ItemDataRole.BackgroundRole:
-            mod = self.modmodel[index.row()]
+            mod = self._mods[index.row()]
             if not mod.enabled:
                 return self._colorDisabled
             if col in ('priority',) and mod.datatype not in ('mod', 'udf',):
@@ -246,104 +430,129 @@ class ModListModel(QAbstractTableModel):
             return None
 
         if role == Qt.ItemDataRole.ForegroundRole:
-            mod = self.modmodel[index.row()]
-            if not mod.enabled:
+            row = self.getRow(index.row())
+            if row.placeholder:
+                return QColor(150, 150, 150)
+            if not row.mod.enabled:
                 return QColor(60, 60, 60)
             elif col in ('scriptFiles',):
-                if mod.filename in self.modmodel.conflicts.scripts \
-                and self.modmodel.conflicts.scripts[mod.filename]:
+                if row.mod.filename in self._conflicts[0]:
                     return QColor('#e94600')
             elif col in ('bundledFiles',):
-                if mod.filename in self.modmodel.conflicts.bundled \
-                and self.modmodel.conflicts.bundled[mod.filename]:
+                if row.mod.filename in self._conflicts[1]:
                     return QColor('#9a6700')
             return None
 
         if role == Qt.ItemDataRole.DecorationRole:
             if col in ('datatype',):
-                mod = self.modmodel[index.row()]
-                if mod.filename.startswith('mod0000'):
-                    return self._icons['spe']
-                val = mod[col]
-                return self._icons[val] if val in self._icons else self._icons['udf']
+                return self._icons[self.getRow(index.row()).icon]
             return None
 
         if role == Qt.ItemDataRole.ToolTipRole:
-            mod = self.modmodel[index.row()]
+            row = self.getRow(index.row())
             if col in ('datatype',):
-                val = mod[col]
+                val = row.mod[col]
                 return self._datatypes[val] if val in self._datatypes else self._datatypes['udf']
             if col in ('enabled',):
-                val = mod[col]
-                return 'Enabled' if val else 'Disabled'
-            tip = str(mod[col])
-            if len(tip) > 2000:
-                return tip[:2000] + ' ...'
-            return tip
-
-        if role == Qt.ItemDataRole.TextAlignmentRole:
-            if col in ('size',):
-                # Right|VCenter
-                return 0x0082
-            if col in ('priority', 'installdate', 'binFiles', 'menuFiles', 'settings',
-                       'inputs', 'contentFiles', 'scriptFiles', 'bundledFiles',):
-                # HCenter|VCenter
-                return 0x0084
-            # Left|VCenter
-            return 0x0081
+                return 'Enabled' if row.mod.enabled else 'Disabled'
+            if row.placeholder:
+                return 'Scanning mod directory...'
+            return row.tooltip(column, col)
 
         if role == Qt.ItemDataRole.EditRole:
             if col in ('package', 'filename', 'category', 'priority',):
-                mod = self.modmodel[index.row()]
-                return str(mod[col])
+                return str(self._mods[index.row()][col])
             return None
 
-        # role used for sorting
-        if role == Qt.ItemDataRole.UserRole:
-            mod = self.modmodel[index.row()]
-            if col in ('priority',):
-                return f'{"-" if int(mod[col]) < 0 else "+"}{abs(int(mod[col])): >20} {mod["filename"]}'
-            if col in ('size',):
-                return int(mod[col])
-            if col in ('binFiles', 'menuFiles', 'contentFiles', \
-                       'scriptFiles', 'settings', 'inputs', 'bundledFiles',):
-                return len(mod[col])
-            return str(mod[col])
+        return None
 
-        if role == Qt.ItemDataRole.DisplayRole:
-            if col in ('enabled',):
-                return None
-            mod = self.modmodel[index.row()]
-            if col in ('datatype',):
-                return str(mod[col]).upper()
-            if col in ('priority',):
-                val = mod[col]
-                if val < 0:
-                    return 'none'
-                return val
-            if col in ('installdate',):
-                return mod[col].astimezone(tz=None).strftime('%Y-%m-%d %H:%M:%S')
-            if col in ('size',):
-                val = mod[col]
-                frm = 'b'
-                val /= 1024
-                frm = 'K'
-                if val // 1024:
-                    val /= 1024
-                    frm = 'M'
-                return f'{val:.1f} {frm}'
-            if col in ('inputs', 'settings',):
-                val = 0
-                for s in mod[col]:
-                    for n in s.config.sections():
-                        val += len(s.config.items(n))
-                return val if val else None
-
-            if col in ('binFiles', 'menuFiles', 'contentFiles', 'scriptFiles', 'bundledFiles',):
-                val = len(mod[col])
-                if val < 1:
-                    return ''
-                return val
-            return str(mod[col])
 
-        return None
+class ModListRow:
+    """Display values and typed sort keys of a mod row, computed once per revision of the mod"""
+
+    __slots__ = ('mod', 'revision', 'placeholder', 'icon', 'display', 'sort', 'tooltips')
+
+    def __init__(self, mod: Mod, revision: tuple[Any, ...], header: list[tuple[str, str]]) -> None:
+        self.mod = mod
+        self.revision = revision
+        self.placeholder = bool(revision[-1])
+        self.icon = 'spe' if mod.filename.startswith('mod0000') else \
+            mod.datatype if mod.datatype in ('mod', 'dlc', 'bin', 'pat') else 'udf'
+        self.display = [self.getDisplayValue(col) for _, col in header]
+        self.sort = [self.getSortValue(col) for _, col in header]
+        self.tooltips: dict[int, str] = {}
+
+    def getDisplayValue(self, col: str) -> Any:
+        mod = self.mod
+        if col in ('enabled',):
+            return None
+        if col in ('datatype',):
+            return str(mod[col]).upper()
+        if col in ('priority',):
+            val = mod[col]
+            if val < 0:
+                return 'none'
+            return val
+        if col in ('installdate',):
+            return mod[col].astimezone(tz=None).strftime('%Y-%m-%d %H:%M:%S')
+        if col in ('size',):
+            val = mod[col]
+            frm = 'b'
+            val /= 1024
+            frm = 'K'
+            if val // 1024:
+                val /= 1024
+                frm = 'M'
+            return f'{val:.1f} {frm}'
+        if col in ('inputs', 'settings',):
+            val = 0
+            for s in mod[col]:
+                for n in s.config.sections():
+                    val += len(s.config.items(n))
+            return val if val else None
+        if col in ('binFiles', 'menuFiles', 'contentFiles', 'scriptFiles', 'bundledFiles',):
+            val = len(mod[col])
+            if val < 1:
+                return ''
+            return val
+        return str(mod[col])
+
+    def getSortValue(self, col: str) -> Any:
+        # keys of a column have the same type, strings are compared case insensitively
+        mod = self.mod
+        if col in ('priority',):
+            # mods with a priority first, then mods without, each by priority and name
+            return (mod.priority < 0, abs(mod.priority), mod.filename.casefold())
+        if col in ('enabled',):
+            return int(mod.enabled)
+        if col in ('size',):
+            return int(mod.size)
+        if col in ('installdate',):
+            return mod.installdate.timestamp()
+        if col in ('binFiles', 'menuFiles', 'contentFiles', 'scriptFiles', 'bundledFiles',):
+            return len(mod[col])
+        if col in ('inputs', 'settings',):
+            return self.getDisplayValue(col) or 0
+        return str(mod[col]).casefold()
+
+    def tooltip(self, column: int, col: str) -> str:
+        if column not in self.tooltips:
+            self.tooltips[column] = formatTooltip(self.mod[col])
+        return self.tooltips[column]
+
+
+def formatTooltip(value: Any, limit: int = 2000) -> str:
+    # lists of files can be very long, only format the elements that are shown
+    if isinstance(value, list):
+        text = '['
+        for index, item in enumerate(cast(list[Any], value)):
+            text += (', ' if index else '') + repr(item)
+            if len(text) > limit:
+                break
+        else:
+            text += ']'
+    else:
+        text = str(value)
+    if len(text) > limit:
+        return text[:limit] + ' ...'
+    return text
@@ -17,6 +17,7 @@ from PySide6.QtWidgets import (
     QLineEdit,
     QPushButton,
     QSizePolicy,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
@@ -167,7 +168,7 @@ class SettingsWindow(QDialog):
         self.nexusGetInfo.setDisabled(True)
         gbNexusModsAPILayout.addWidget(self.nexusGetInfo)
 
-        self.nexusCheckUpdates = QCheckBox('Check for Mod updates on startup', self)
+        self.nexusCheckUpdates = QCheckBox('Check for Mod updates in the background', self)
         self.nexusCheckUpdates.setChecked(settings.value('nexusCheckUpdates', 'False') == 'True')
         self.nexusCheckUpdates.setDisabled(True)
         gbNexusModsAPILayout.addWidget(self.nexusCheckUpdates)
@@ -177,6 +178,58 @@ class SettingsWindow(QDialog):
         self.nexusCheckClipboard.setDisabled(True)
         gbNexusModsAPILayout.addWidget(self.nexusCheckClipboard)
 
+        # Install
+
+        gbInstall = QGroupBox('Install Preferences', self)
+        mainLayout.addWidget(gbInstall)
+        gbInstallLayout = QVBoxLayout(gbInstall)
+        self.cacheArchives = QCheckBox('Remember detected mods of installed archives', self)
+        self.cacheArchives.setChecked(settings.value('cacheArchives', 'True') == 'True')
+        self.cacheArchives.toggled.connect(lambda checked: [
+            self.cacheExtractedArchives.setEnabled(checked),
+            self.cacheMaxSize.setEnabled(checked and self.cacheExtractedArchives.isChecked())
+        ])
+        gbInstallLayout.addWidget(self.cacheArchives)
+        self.cacheExtractedArchives = QCheckBox('Keep extracted archives for faster reinstalls', self)
+        self.cacheExtractedArchives.setChecked(settings.value('cacheExtractedArchives', 'False') == 'True')
+        self.cacheExtractedArchives.setEnabled(self.cacheArchives.isChecked())
+        self.cacheExtractedArchives.toggled.connect(lambda checked: self.cacheMaxSize.setEnabled(checked))
+        gbInstallLayout.addWidget(self.cacheExtractedArchives)
+        cacheMaxSizeLayout = QHBoxLayout()
+        cacheMaxSizeLayout.addWidget(QLabel('Size limit of kept archives', self))
+        self.cacheMaxSize = QSpinBox(self)
+        self.cacheMaxSize.setRange(1, 1024)
+        self.cacheMaxSize.setSuffix(' GiB')
+        self.cacheMaxSize.setValue(int(str(settings.value('cacheMaxSize', 4))))
+        self.cacheMaxSize.setEnabled(self.cacheArchives.isChecked() and self.cacheExtractedArchives.isChecked())
+        cacheMaxSizeLayout.addWidget(self.cacheMaxSize)
+        gbInstallLayout.addLayout(cacheMaxSizeLayout)
+        self.deduplicateFiles = QCheckBox('Link identical files of installed mods instead of copying them', self)
+        self.deduplicateFiles.setChecked(settings.value('deduplicateFiles', 'False') == 'True')
+        gbInstallLayout.addWidget(self.deduplicateFiles)
+
+        # Downloads
+
+        gbDownloads = QGroupBox('Download Preferences', self)
+        mainLayout.addWidget(gbDownloads)
+        gbDownloadsLayout = QVBoxLayout(gbDownloads)
+        downloadsMaxConcurrentLayout = QHBoxLayout()
+        downloadsMaxConcurrentLayout.addWidget(QLabel('Concurrent downloads', self))
+        self.downloadsMaxConcurrent = QSpinBox(self)
+        self.downloadsMaxConcurrent.setRange(1, 16)
+        self.downloadsMaxConcurrent.setValue(int(str(settings.value('downloadsMaxConcurrent', 2))))
+        downloadsMaxConcurrentLayout.addWidget(self.downloadsMaxConcurrent)
+        gbDownloadsLayout.addLayout(downloadsMaxConcurrentLayout)
+        downloadsBandwidthLimitLayout = QHBoxLayout()
+        downloadsBandwidthLimitLayout.addWidget(QLabel('Bandwidth limit', self))
+        self.downloadsBandwidthLimit = QSpinBox(self)
+        self.downloadsBandwidthLimit.setRange(0, 10 * 1024 ** 2)
+        self.downloadsBandwidthLimit.setSuffix(' KiB/s')
+        self.downloadsBandwidthLimit.setSpecialValueText('Unlimited')
+        self.downloadsBandwidthLimit.setValue(int(str(settings.value('downloadsBandwidthLimit', 0))))
+        downloadsBandwidthLimitLayout.addWidget(self.downloadsBandwidthLimit)
+        gbDownloadsLayout.addLayout(downloadsBandwidthLimitLayout)
+
         # Output
 
         gbOutput = QGroupBox('Output Preferences', self)
@@ -188,6 +241,10 @@ class SettingsWindow(QDialog):
         self.debugOutput = QCheckBox('Show debug output', self)
         self.debugOutput.setChecked(settings.value('debugOutput', 'False') == 'True')
         gbOutputLayout.addWidget(self.debugOutput)
+        self.traceOperations = QCheckBox('Record operation timings (requires restart)', self)
+        self.traceOperations.setToolTip('Timings are written to the traces directory in the cache path on exit')
+        self.traceOperations.setChecked(settings.value('traceOperations', 'False') == 'True')
+        gbOutputLayout.addWidget(self.traceOperations)
 
         # Actions
 
@@ -233,7 +290,14 @@ class SettingsWindow(QDialog):
         settings.setValue('nexusGetInfo', str(self.nexusGetInfo.isChecked()))
         settings.setValue('nexusCheckUpdates', str(self.nexusCheckUpdates.isChecked()))
         settings.setValue('nexusCheckClipboard', str(self.nexusCheckClipboard.isChecked()))
+        settings.setValue('cacheArchives', str(self.cacheArchives.isChecked()))
+        settings.setValue('cacheExtractedArchives', str(self.cacheExtractedArchives.isChecked()))
+        settings.setValue('cacheMaxSize', self.cacheMaxSize.value())
+        settings.setValue('deduplicateFiles', str(self.deduplicateFiles.isChecked()))
+        settings.setValue('downloadsMaxConcurrent', self.downloadsMaxConcurrent.value())
+        settings.setValue('downloadsBandwidthLimit', self.downloadsBandwidthLimit.value())
         settings.setValue('debugOutput', str(self.debugOutput.isChecked()))
+        settings.setValue('traceOperations', str(self.traceOperations.isChecked()))
         settings.setValue('unhideOutput', str(self.unhideOutput.isChecked()))
         self.close()
 
@@ -0,0 +1,183 @@
+"""Counters, gauges and histograms of runtime operations, cheap enough for hot paths and free when disabled"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, TypeVar
+
+
+_disabled = contextlib.nullcontext()
+
+_Metric = TypeVar('_Metric', 'Counter', 'Gauge', 'Histogram')
+
+defaultBounds = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+'''Upper bounds of the histogram buckets for durations in seconds'''
+
+
+class Counter:
+    """A total that only increases, like the number of hashed files"""
+
+    def __init__(self, registry: MetricsRegistry, name: str, description: str = '') -> None:
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        if self.registry.enabled:
+            with self.registry.lock:
+                self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+    def reset(self) -> None:
+        self.value = 0
+
+
+class Gauge:
+    """A current value, like the number of listed mods"""
+
+    def __init__(self, registry: MetricsRegistry, name: str, description: str = '') -> None:
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.value: float = 0
+
+    def set(self, value: float) -> None:  # noqa: A003
+        if self.registry.enabled:
+            self.value = value
+
+    def snapshot(self) -> float:
+        return self.value
+
+    def reset(self) -> None:
+        self.value = 0
+
+
+class Histogram:
+    """The distribution of observed values, like the durations of conflict updates"""
+
+    def __init__(
+        self, registry: MetricsRegistry, name: str, description: str = '', bounds: tuple[float, ...] = defaultBounds
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.description = description
+        self.bounds = bounds
+        self.reset()
+
+    def observe(self, value: float) -> None:
+        if self.registry.enabled:
+            with self.registry.lock:
+                self.count += 1
+                self.total += value
+                if value < self.min:
+                    self.min = value
+                if value > self.max:
+                    self.max = value
+                self.buckets[bisect.bisect_left(self.bounds, value)] += 1
+
+    def time(self) -> contextlib.AbstractContextManager[None]:
+        """Observe the duration of the block in seconds"""
+        if not self.registry.enabled:
+            return _disabled
+        return _Timer(self)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+            'mean': self.mean,
+            'buckets': {
+                **{f'<={bound:g}': count for bound, count in zip(self.bounds, self.buckets, strict=False)},
+                '+inf': self.buckets[-1],
+            },
+        }
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+
+class _Timer:
+    # a plain context manager, a generator based one costs several times as much on hot paths
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: Histogram) -> None:
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args: object) -> None:
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """The named metrics of the process, created once by the modules updating them"""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+
+    def counter(self, name: str, description: str = '') -> Counter:
+        return self._get(name, Counter, lambda: Counter(self, name, description))
+
+    def gauge(self, name: str, description: str = '') -> Gauge:
+        return self._get(name, Gauge, lambda: Gauge(self, name, description))
+
+    def histogram(self, name: str, description: str = '', bounds: tuple[float, ...] = defaultBounds) -> Histogram:
+        return self._get(name, Histogram, lambda: Histogram(self, name, description, bounds))
+
+    def _get(self, name: str, kind: type[_Metric], create: Callable[[], _Metric]) -> _Metric:
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = create()
+        if not isinstance(metric, kind):
+            raise ValueError(f'Metric {name} is a {type(metric).__name__.lower()}, not a {kind.__name__.lower()}')
+        return metric
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """The current values of all metrics, grouped by kind and sorted by name"""
+        result: dict[str, dict[str, Any]] = {'counters': {}, 'gauges': {}, 'histograms': {}}
+        with self.lock:
+            for name, metric in sorted(self.metrics.items()):
+                result[f'{type(metric).__name__.lower()}s'][name] = metric.snapshot()
+        return result
+
+    def toJson(self) -> str:
+        return json.dumps({'enabled': self.enabled, **self.snapshot()}, indent=2)
+
+    def dump(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.toJson() + '\n', encoding='utf-8')
+
+    def reset(self) -> None:
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.reset()
+
+
+metrics = MetricsRegistry(os.environ.get('W3MM_METRICS', '1') != '0')
+'''The metrics of the process, disabled by W3MM_METRICS=0'''
@@ -0,0 +1,168 @@
+"""Timing spans of named operations, exported as Chrome trace events, and profiling of chosen operations"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import cProfile
+import inspect
+import json
+import os
+import threading
+import time
+
+from collections import deque
+from collections.abc import Callable, Generator, Iterable
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, TypeVar
+
+from loguru import logger
+
+
+_Function = TypeVar('_Function', bound=Callable[..., Any])
+
+_disabled = contextlib.nullcontext()
+
+
+def currentTrack() -> tuple[int, str]:
+    """The id and name of the running task, or of the thread outside of tasks"""
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return id(task), task.get_name()
+    thread = threading.current_thread()
+    return thread.ident or 0, thread.name
+
+
+class Tracer:
+    """
+    Records the spans of named operations while enabled, and profiles the operations named in profile.
+    Spans of tasks are recorded on a track per task, profiles include everything else running on the same thread.
+    """
+
+    def __init__(self, enabled: bool = False, profile: Iterable[str] = (), limit: int = 200000) -> None:
+        self.enabled = enabled
+        self.profile = set(profile)
+        '''The names of the operations to profile, or * for all'''
+        self.events: deque[dict[str, Any]] = deque(maxlen=limit)
+        self.profiles: dict[str, cProfile.Profile] = {}
+        self._tracks: dict[int, str] = {}
+        self._profiling = False
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @classmethod
+    def fromEnvironment(cls: type[Tracer]) -> Tracer:
+        """Configured by W3MM_TRACE=1 and W3MM_PROFILE=<operation>,..."""
+        return cls(
+            os.environ.get('W3MM_TRACE', '') not in ('', '0'),
+            (name.strip() for name in os.environ.get('W3MM_PROFILE', '').split(',') if name.strip()),
+        )
+
+    def span(self, name: str, **args: Any) -> contextlib.AbstractContextManager[None]:
+        if not self.enabled and not self.profile:
+            return _disabled
+        return self._span(name, args)
+
+    @contextlib.contextmanager
+    def _span(self, name: str, args: dict[str, Any]) -> Generator[None, None, None]:
+        profiler = self.startProfile(name)
+        track, trackname = currentTrack()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if profiler is not None:
+                profiler.disable()
+                self._profiling = False
+            if self.enabled:
+                self._tracks.setdefault(track, trackname)
+                self.events.append({
+                    'name': name,
+                    'cat': 'w3modmanager',
+                    'ph': 'X',
+                    'ts': round((start - self._start) * 1e6, 1),
+                    'dur': round((end - start) * 1e6, 1),
+                    'pid': os.getpid(),
+                    'tid': track,
+                    'args': {key: str(value) for key, value in args.items()},
+                })
+
+    def startProfile(self, name: str) -> cProfile.Profile | None:
+        if name not in self.profile and '*' not in self.profile:
+            return None
+        with self._lock:
+            # only one profiler can be active at a time, nested and concurrent operations are part of it
+            if self._profiling:
+                return None
+            self._profiling = True
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+        try:
+            profiler.enable()
+        except ValueError:
+            # another profiler is active outside of the tracer
+            self._profiling = False
+            return None
+        return profiler
+
+    def export(self, path: Path) -> Path | None:
+        """Write the recorded spans as Chrome trace events and the profiles as pstats files, returns the trace file"""
+        with self._lock:
+            events, self.events = list(self.events), deque(maxlen=self.events.maxlen)
+            profiles, self.profiles = self.profiles, {}
+            tracks, self._tracks = self._tracks, {}
+        if not events and not profiles:
+            return None
+        path.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(tz=timezone.utc).strftime('%Y%m%d-%H%M%S')
+        pid = os.getpid()
+        metadata = [
+            {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'w3modmanager'}},
+            *({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': track, 'args': {'name': name}}
+              for track, name in tracks.items()),
+        ]
+        target = path.joinpath(f'trace-{stamp}-{pid}.json')
+        target.write_text(
+            json.dumps({'traceEvents': [*metadata, *events], 'displayTimeUnit': 'ms'}), encoding='utf-8')
+        for name, profiler in profiles.items():
+            profiler.dump_stats(path.joinpath(f'profile-{stamp}-{pid}-{name}.prof'))
+        logger.bind(path=target).debug('Exported trace')
+        return target
+
+
+tracer = Tracer.fromEnvironment()
+
+
+def traced(name: str, *arguments: str) -> Callable[[_Function], _Function]:
+    """Record calls of the function as spans, with the given arguments of the calls"""
+    def decorator(function: _Function) -> _Function:
+        signature = inspect.signature(function)
+
+        def spanArgs(args: tuple[Any, ...], kwargs: dict[str, Any]) -> dict[str, Any]:
+            if not arguments:
+                return {}
+            bound = signature.bind(*args, **kwargs).arguments
+            return {argument: bound.get(argument) for argument in arguments}
+
+        if inspect.iscoroutinefunction(function):
+            @wraps(function)
+            async def asyncWrapper(*args: Any, **kwargs: Any) -> Any:
+                if not tracer.enabled and not tracer.profile:
+                    return await function(*args, **kwargs)
+                with tracer.span(name, **spanArgs(args, kwargs)):
+                    return await function(*args, **kwargs)
+            return asyncWrapper  # type: ignore
+
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not tracer.enabled and not tracer.profile:
+                return function(*args, **kwargs)
+            with tracer.span(name, **spanArgs(args, kwargs)):
+                return function(*args, **kwargs)
+        return wrapper  # type: ignore
+    return decorator
@@ -1,6 +1,9 @@
 import w3modmanager
 
 from w3modmanager.core.errors import InvalidPathError
+from w3modmanager.util.metrics import metrics
+from w3modmanager.util.trace import traced, tracer
+from w3modmanager.util.vfs import AnyPath
 
 import asyncio
 import codecs
@@ -11,20 +14,27 @@ import os
 import re
 import shutil
 import subprocess
+import sys
 import tempfile
 
 from collections.abc import Awaitable, Callable, Coroutine, Generator
+from datetime import datetime
 from functools import partial, wraps
 from pathlib import Path
-from typing import Any
+from typing import Any, Protocol
 from urllib.parse import ParseResult, urlparse, urlsplit
 
-from charset_normalizer import detect
 from loguru import logger
-from PySide6 import __version__ as PySide6Version
+
+
+# the counts of the histograms are the numbers of hashed files and extracted archives
+_hashedBytes = metrics.counter('hash.bytes', 'Bytes hashed')
+_hashTime = metrics.histogram('hash.time', 'Seconds per hashed file')
+_extractTime = metrics.histogram('extract.time', 'Seconds per extracted archive')
 
 
 def getQtVersionString() -> str:
+    from PySide6 import __version__ as PySide6Version
     return 'PySide6 ' + PySide6Version
 
 
@@ -40,14 +50,25 @@ def getSupportedExtensions() -> list[str]:
     return ['.zip', '.rar', '.7z', '.tar', '.lzma']
 
 
-def detectEncoding(path: Path) -> str:
-    encoding = detect(path.read_bytes())
+def detectEncoding(path: AnyPath) -> str:
+    data = path.read_bytes()
+    # plain ascii needs no detection, which avoids loading charset_normalizer at startup
+    if data.isascii():
+        return 'utf-8'
+    from charset_normalizer import detect
+    encoding = detect(data)
     if encoding['confidence'] and float(encoding['confidence']) > 0.7:
         return str(encoding['encoding'])
     return 'utf-8'
 
 
-def readText(path: Path) -> str:
+def parseDate(text: str) -> datetime | None:
+    # dateparser is slow to import and only needed for web responses
+    import dateparser
+    return dateparser.parse(text)
+
+
+def readText(path: AnyPath) -> str:
     b = path.read_bytes()
     if b.startswith(codecs.BOM_UTF16_LE):
         return path.read_text(encoding='utf-16')
@@ -60,18 +81,24 @@ def readText(path: Path) -> str:
 
 def getMD5Hash(path: Path) -> str:
     hash_md5 = hashlib.md5(usedforsecurity=False)
-    with path.open('rb') as file:
-        for chunk in iter(lambda: file.read(4096), b''):
+    size = 0
+    with tracer.span('hash', path=path), _hashTime.time(), path.open('rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
             hash_md5.update(chunk)
+            size += len(chunk)
+    _hashedBytes.inc(size)
     return hash_md5.hexdigest()
 
 
-def getXXHash(path: Path) -> str:
+def getXXHash(path: AnyPath) -> str:
     import xxhash
     hash_xx = xxhash.xxh32(seed=0)
-    with path.open('rb') as file:
+    size = 0
+    with tracer.span('hash', path=path), _hashTime.time(), path.open('rb') as file:
         for chunk in iter(lambda: file.read(4096), b''):
             hash_xx.update(chunk)
+            size += len(chunk)
+    _hashedBytes.inc(size)
     return hash_xx.hexdigest()
 
 
@@ -271,15 +298,54 @@ def extractArchive(archive: Path, target: Path) -> None:
         )
 
 
-async def extractMod(archive: Path) -> Path:
+def listArchiveRaw(archive: Path) -> subprocess.CompletedProcess[bytes]:
+    command = [str(getRuntimePath('resources/tools/7zip/7z.exe')), 'l', '-slt', str(archive)]
+    if sys.platform == 'win32':
+        si = subprocess.STARTUPINFO()
+        si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        return subprocess.run(
+            command,  # noqa: S603
+            stdin=subprocess.DEVNULL, capture_output=True, check=False,
+            creationflags=subprocess.CREATE_NO_WINDOW, startupinfo=si
+        )
+    return subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, check=False)  # noqa: S603
+
+
+def listArchive(archive: Path) -> list[tuple[str, int, bool]]:
+    """List the (name, size, isdir) entries of an archive without extracting it"""
+    result = listArchiveRaw(archive)
+    if result.returncode != 0:
+        raise InvalidPathError(
+            archive,
+            result.stderr.decode('utf-8') if result.stderr else 'Could not list archive'
+        )
+    entries: list[tuple[str, int, bool]] = []
+    output = result.stdout.decode('utf-8', errors='replace')
+    # member entries follow the archive properties after the separator line
+    _, _, members = output.partition('\n----------')
+    for block in re.split(r'\r?\n\s*\r?\n', members):
+        values = dict(
+            line.split(' = ', 1) for line in block.splitlines() if ' = ' in line
+        )
+        if 'Path' not in values:
+            continue
+        size = int(values['Size']) if values.get('Size', '').isdigit() else 0
+        entries.append((values['Path'], size, values.get('Folder', '-') == '+'))
+    return entries
+
+
+@traced('extract', 'archive')
+async def extractMod(archive: Path, target: Path | None = None) -> Path:
     if not isArchive(archive):
         raise InvalidPathError(archive, 'Invalid archive')
-    target = Path(tempfile.gettempdir()).joinpath('w3modmanager/cache').joinpath(f'.{archive.stem}')
+    if target is None:
+        target = Path(tempfile.gettempdir()).joinpath('w3modmanager/cache').joinpath(f'.{archive.stem}')
     target = normalizePath(target)
-    await asyncio.get_running_loop().run_in_executor(
-        None,
-        partial(extractArchive, archive, target)
-    )
+    with _extractTime.time():
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            partial(extractArchive, archive, target)
+        )
     return target
 
 
@@ -291,15 +357,26 @@ def createAsyncTask(coro: Generator[Any, Any, Any] | Coroutine[Any, Any, Any], r
     return task
 
 
-def debounce(ms: int, cancel_running: bool = False) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Any]]:
+class Debounced(Protocol):
+    """A debounced function, with its deferred call being cancellable or run right away"""
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any: ...
+
+    def cancel(self) -> bool: ...
+
+    def flush(self) -> Awaitable[None]: ...
+
+
+def debounce(ms: int, cancel_running: bool = False) -> Callable[[Callable[..., Awaitable[Any]]], Debounced]:
     """Debounce a functions execution by {ms} milliseconds"""
-    def decorator(fun: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
+    def decorator(fun: Callable[..., Awaitable[Any]]) -> Debounced:
 
         @wraps(fun)
         def debounced(*args: Any, **kwargs: Any) -> Awaitable[Any]:
             debounced.__debounced = set()  # type: ignore
 
             def deferred() -> None:
+                debounced.pending = None  # type: ignore
                 async def internal() -> None:
                     try:
                         await fun(*args, **kwargs)
@@ -319,6 +396,7 @@ def debounce(ms: int, cancel_running: bool = False) -> Callable[[Callable[..., A
                 debounced.timer.cancel()  # type: ignore
 
             debounced.timer = asyncio.get_running_loop().call_later(ms / 1000.0, deferred)  # type: ignore
+            debounced.pending = deferred  # type: ignore
             return debounced.timer  # type: ignore
 
         def cancel() -> bool:
@@ -329,6 +407,17 @@ def debounce(ms: int, cancel_running: bool = False) -> Callable[[Callable[..., A
             except AttributeError:
                 return False
 
+        async def flush() -> None:
+            # run a deferred call right away and wait for it, e.g. before exiting
+            pending = getattr(debounced, 'pending', None)
+            if pending:
+                debounced.timer.cancel()  # type: ignore
+                pending()
+            task = getattr(debounced, 'task', None)
+            if task and not task.done():
+                await asyncio.wait([task])
+
         debounced.cancel = cancel  # type: ignore
-        return debounced
+        debounced.flush = flush  # type: ignore
+        return debounced  # type: ignore
     return decorator
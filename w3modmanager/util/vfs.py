@@ -0,0 +1,386 @@
+"""Read-only virtual filesystems for running mod detection without extraction"""
+
+from __future__ import annotations
+
+import abc
+import fnmatch
+import io
+import os
+import tarfile
+import zipfile
+
+from collections.abc import Iterable, Iterator
+from pathlib import Path, PurePosixPath
+from typing import IO, NamedTuple, TypeAlias
+
+
+class VirtualStat(NamedTuple):
+    st_size: int
+    st_mtime: float = 0.0
+
+
+class VirtualFilesystem(abc.ABC):
+    """Base class for read-only filesystem backends addressed by relative posix paths"""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @abc.abstractmethod
+    def isDir(self, path: PurePosixPath) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def isFile(self, path: PurePosixPath) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def listDir(self, path: PurePosixPath) -> list[str]:
+        ...
+
+    @abc.abstractmethod
+    def getSize(self, path: PurePosixPath) -> int:
+        ...
+
+    @abc.abstractmethod
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        ...
+
+    def realPath(self, path: PurePosixPath) -> Path | None:
+        return None
+
+    def root(self) -> VirtualPath:
+        return VirtualPath(self)
+
+
+class DirectoryFilesystem(VirtualFilesystem):
+    """Virtual filesystem backed by a directory on disk"""
+
+    def __init__(self, path: Path) -> None:
+        super().__init__(path.name)
+        self.path = path
+
+    def isDir(self, path: PurePosixPath) -> bool:
+        return self.path.joinpath(path).is_dir()
+
+    def isFile(self, path: PurePosixPath) -> bool:
+        return self.path.joinpath(path).is_file()
+
+    def listDir(self, path: PurePosixPath) -> list[str]:
+        return sorted(os.listdir(self.path.joinpath(path)))
+
+    def getSize(self, path: PurePosixPath) -> int:
+        return self.path.joinpath(path).stat().st_size
+
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        return self.path.joinpath(path).read_bytes()
+
+    def realPath(self, path: PurePosixPath) -> Path | None:
+        return self.path.joinpath(path)
+
+
+class TreeFilesystem(VirtualFilesystem):
+    """Virtual filesystem built from a flat listing of member paths"""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._dirs: dict[PurePosixPath, set[str]] = {PurePosixPath(): set()}
+        self._files: dict[PurePosixPath, int] = {}
+
+    def addMember(self, name: str, size: int = 0, isdir: bool = False) -> PurePosixPath | None:
+        path = normalizeMemberName(name)
+        if path is None:
+            return None
+        if isdir:
+            self._addDir(path)
+        elif path.parts:
+            self._addDir(path.parent)
+            self._dirs[path.parent].add(path.name)
+            self._files[path] = size
+        return path
+
+    def _addDir(self, path: PurePosixPath) -> None:
+        if path in self._dirs:
+            return
+        self._addDir(path.parent)
+        self._dirs[path] = set()
+        self._dirs[path.parent].add(path.name)
+
+    def isDir(self, path: PurePosixPath) -> bool:
+        return path in self._dirs
+
+    def isFile(self, path: PurePosixPath) -> bool:
+        return path in self._files
+
+    def listDir(self, path: PurePosixPath) -> list[str]:
+        if path not in self._dirs:
+            raise NotADirectoryError(str(path))
+        return sorted(self._dirs[path])
+
+    def getSize(self, path: PurePosixPath) -> int:
+        if path in self._files:
+            return self._files[path]
+        if path in self._dirs:
+            return 0
+        raise FileNotFoundError(str(path))
+
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        raise OSError(f'Reading is not supported: {self.name}/{path}')
+
+    def members(self) -> Iterable[PurePosixPath]:
+        return self._files.keys()
+
+
+class MemoryFilesystem(TreeFilesystem):
+    """Virtual filesystem holding its files in memory"""
+
+    def __init__(self, name: str, files: dict[str, bytes] | None = None) -> None:
+        super().__init__(name)
+        self._contents: dict[PurePosixPath, bytes] = {}
+        for member, content in (files or {}).items():
+            self.addFile(member, content)
+
+    def addFile(self, name: str, content: bytes = b'') -> None:
+        path = self.addMember(name, len(content))
+        if path is not None and path.parts:
+            self._contents[path] = content
+
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        if path not in self._contents:
+            raise FileNotFoundError(str(path))
+        return self._contents[path]
+
+
+class ZipFilesystem(TreeFilesystem):
+    """Virtual filesystem reading the central directory of a zip archive"""
+
+    def __init__(self, archive: Path) -> None:
+        super().__init__(archive.stem)
+        self.archive = archive
+        self._members: dict[PurePosixPath, str] = {}
+        with zipfile.ZipFile(archive) as zipFile:
+            for info in zipFile.infolist():
+                path = self.addMember(info.filename, info.file_size, info.is_dir())
+                if path is not None and not info.is_dir():
+                    self._members[path] = info.filename
+
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        if path not in self._members:
+            raise FileNotFoundError(str(path))
+        with zipfile.ZipFile(self.archive) as zipFile:
+            return zipFile.read(self._members[path])
+
+
+class TarFilesystem(TreeFilesystem):
+    """Virtual filesystem reading the member headers of a tar archive"""
+
+    def __init__(self, archive: Path) -> None:
+        super().__init__(archive.stem)
+        self.archive = archive
+        self._members: dict[PurePosixPath, str] = {}
+        with tarfile.open(archive) as tar:
+            for info in tar.getmembers():
+                if not info.isfile() and not info.isdir():
+                    continue
+                path = self.addMember(info.name, info.size, info.isdir())
+                if path is not None and info.isfile():
+                    self._members[path] = info.name
+
+    def readBytes(self, path: PurePosixPath) -> bytes:
+        if path not in self._members:
+            raise FileNotFoundError(str(path))
+        with tarfile.open(self.archive) as tar:
+            file = tar.extractfile(self._members[path])
+            if file is None:
+                raise FileNotFoundError(str(path))
+            return file.read()
+
+
+class SevenZipFilesystem(TreeFilesystem):
+    """Virtual filesystem reading the member listing of any archive supported by 7-Zip"""
+
+    def __init__(self, archive: Path) -> None:
+        from w3modmanager.util.util import listArchive
+
+        super().__init__(archive.stem)
+        self.archive = archive
+        for name, size, isdir in listArchive(archive):
+            self.addMember(name, size, isdir)
+
+
+class VirtualPath:
+    """A path inside a virtual filesystem, mirroring the parts of the pathlib API used for mod detection"""
+
+    __slots__ = ('filesystem', 'path')
+
+    def __init__(self, filesystem: VirtualFilesystem, path: PurePosixPath | str = '') -> None:
+        self.filesystem = filesystem
+        self.path = PurePosixPath(path)
+
+    @property
+    def name(self) -> str:
+        if not self.path.parts:
+            return self.filesystem.name
+        if self.path.parts[0] == '..':
+            return ''
+        return self.path.name
+
+    @property
+    def suffix(self) -> str:
+        return PurePosixPath(self.name).suffix
+
+    @property
+    def stem(self) -> str:
+        return PurePosixPath(self.name).stem
+
+    @property
+    def parts(self) -> tuple[str, ...]:
+        return self.path.parts
+
+    @property
+    def parent(self) -> VirtualPath:
+        # the root has a detached parent outside of the filesystem, like the directory containing an archive
+        if not self.path.parts:
+            return VirtualPath(self.filesystem, '..')
+        return VirtualPath(self.filesystem, self.path.parent)
+
+    @property
+    def parents(self) -> list[VirtualPath]:
+        return [VirtualPath(self.filesystem, parent) for parent in self.path.parents]
+
+    def joinpath(self, *others: str | os.PathLike[str]) -> VirtualPath:
+        path = normalizeMemberName(self.path.joinpath(*(os.fspath(other) for other in others)).as_posix())
+        if path is None:
+            raise ValueError(f'Path outside of virtual filesystem: {self}/{"/".join(map(str, others))}')
+        return VirtualPath(self.filesystem, path)
+
+    def __truediv__(self, other: str | os.PathLike[str]) -> VirtualPath:
+        return self.joinpath(other)
+
+    def relative_to(self, other: VirtualPath) -> Path:
+        if other.filesystem is not self.filesystem:
+            raise ValueError(f'{self!s} is not in the same filesystem as {other!s}')
+        return Path(self.path.relative_to(other.path))
+
+    def is_dir(self) -> bool:
+        return self.filesystem.isDir(self.path)
+
+    def is_file(self) -> bool:
+        return self.filesystem.isFile(self.path)
+
+    def exists(self) -> bool:
+        return self.is_dir() or self.is_file()
+
+    def iterdir(self) -> Iterator[VirtualPath]:
+        for name in self.filesystem.listDir(self.path):
+            yield VirtualPath(self.filesystem, self.path.joinpath(name))
+
+    def glob(self, pattern: str) -> Iterator[VirtualPath]:
+        yield from _glob(self, PurePosixPath(pattern).parts)
+
+    def stat(self) -> VirtualStat:
+        return VirtualStat(self.filesystem.getSize(self.path))
+
+    def read_bytes(self) -> bytes:
+        return self.filesystem.readBytes(self.path)
+
+    def read_text(self, encoding: str | None = None, errors: str | None = None) -> str:
+        return self.read_bytes().decode(encoding or 'utf-8', errors or 'strict')
+
+    def open(self, mode: str = 'rb') -> IO[bytes]:  # noqa: A003
+        if mode != 'rb':
+            raise OSError(f'Virtual filesystems are read-only: {self}')
+        return io.BytesIO(self.read_bytes())
+
+    def samefile(self, other: VirtualPath) -> bool:
+        return isinstance(other, VirtualPath) and other.filesystem is self.filesystem and other.path == self.path
+
+    def realpath(self) -> Path | None:
+        return self.filesystem.realPath(self.path)
+
+    def as_posix(self) -> str:
+        return self.path.as_posix()
+
+    def __str__(self) -> str:
+        return f'{self.filesystem.name}/{self.path.as_posix()}' if self.path.parts else self.filesystem.name
+
+    def __repr__(self) -> str:
+        return f'VirtualPath({self.filesystem.name!r}, {self.path.as_posix()!r})'
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VirtualPath):
+            return NotImplemented
+        return self.filesystem is other.filesystem and self.path == other.path
+
+    def __hash__(self) -> int:
+        return hash((id(self.filesystem), self.path))
+
+    def __lt__(self, other: VirtualPath) -> bool:
+        return self.path < other.path
+
+
+AnyPath: TypeAlias = Path | VirtualPath
+'''A path on disk or inside a virtual filesystem'''
+
+
+def relativePath(path: AnyPath, root: AnyPath) -> Path:
+    """The path relative to the root, both on disk or both inside the same virtual filesystem"""
+    if isinstance(path, VirtualPath) and isinstance(root, VirtualPath):
+        return path.relative_to(root)
+    if isinstance(path, Path) and isinstance(root, Path):
+        return path.relative_to(root)
+    raise ValueError(f'{path!s} is not in the same filesystem as {root!s}')
+
+
+def isSamePath(path: AnyPath, other: AnyPath) -> bool:
+    if isinstance(path, VirtualPath):
+        return isinstance(other, VirtualPath) and path.samefile(other)
+    return isinstance(other, Path) and path.samefile(other)
+
+
+def normalizeMemberName(name: str) -> PurePosixPath | None:
+    # normalize archive member names, rejecting names that escape the archive root
+    parts: list[str] = []
+    for part in name.replace('\\', '/').split('/'):
+        if part in ('', '.'):
+            continue
+        if part == '..':
+            if not parts:
+                return None
+            parts.pop()
+            continue
+        parts.append(part)
+    return PurePosixPath(*parts)
+
+
+def openArchive(archive: Path) -> VirtualFilesystem:
+    """Open the member listing of an archive as a virtual filesystem"""
+    return openBuiltinArchive(archive) or SevenZipFilesystem(archive)
+
+
+def openBuiltinArchive(archive: Path) -> VirtualFilesystem | None:
+    """Open the member listing of a zip or tar archive, which is read without starting a 7-Zip process"""
+    suffix = archive.suffix.lower()
+    if suffix == '.zip' and zipfile.is_zipfile(archive):
+        return ZipFilesystem(archive)
+    if suffix in ('.tar', '.lzma') and tarfile.is_tarfile(archive):
+        return TarFilesystem(archive)
+    return None
+
+
+def _glob(path: VirtualPath, parts: tuple[str, ...]) -> Iterator[VirtualPath]:
+    if not parts:
+        yield path
+        return
+    head, rest = parts[0], parts[1:]
+    if head == '**':
+        yield from _glob(path, rest)
+        for child in path.iterdir():
+            if child.is_dir():
+                yield from _glob(child, parts)
+        return
+    for child in path.iterdir():
+        if fnmatch.fnmatch(child.name, head):
+            if not rest:
+                yield child
+            elif child.is_dir():
+                yield from _glob(child, rest)